@@ -8,8 +8,29 @@ class ApiConfig(AppConfig):
 
     def ready(self):
         """Start background scheduler when Django app is ready.
-        Avoid duplicate starts under autoreload; the scheduler itself guards too.
+        Every server worker calls this (management commands leave the scheduler off);
+        the scheduler elects a single leader via a file lock.
+        SQLite connections are switched to WAL so workers share the live feed tables.
+        Writes to historical disasters update the monthly rollups and bump the data
+        version behind the cached endpoints; edits to existing rows mark the risk index
+        for a full rebuild.
         """
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save, pre_save
+        from .models import HistoricalDisaster
+        from .pipeline.data_version import bump_history_version
+        from .pipeline.live_feed import enable_sqlite_wal
+        from .pipeline.risk_index import risk_index_post_save
+        from .pipeline.rollups import rollup_post_delete, rollup_post_save, rollup_pre_save
+
+        connection_created.connect(enable_sqlite_wal, dispatch_uid="api_sqlite_wal")
+        pre_save.connect(rollup_pre_save, sender=HistoricalDisaster, dispatch_uid="api_rollup_pre_save")
+        post_save.connect(rollup_post_save, sender=HistoricalDisaster, dispatch_uid="api_rollup_saved")
+        post_delete.connect(rollup_post_delete, sender=HistoricalDisaster, dispatch_uid="api_rollup_deleted")
+        post_save.connect(bump_history_version, sender=HistoricalDisaster, dispatch_uid="api_history_saved")
+        post_save.connect(risk_index_post_save, sender=HistoricalDisaster, dispatch_uid="api_risk_index_saved")
+        post_delete.connect(bump_history_version, sender=HistoricalDisaster, dispatch_uid="api_history_deleted")
+
         try:
             from .pipeline.scheduler import scheduler
             scheduler.start()
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from ...pipeline.data_version import bump_history_version
+from ...pipeline.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the monthly disaster rollups from all historical disasters."
+
+    def handle(self, *args, **options):
+        buckets = rebuild()
+        bump_history_version()
+        self.stdout.write(self.style.SUCCESS(f"Rollups rebuilt: {buckets} type x state x month buckets"))
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from ...pipeline.risk_index import risk_index
+
+
+class Command(BaseCommand):
+    help = "Fold new historical disasters and predictions into the district risk index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild from scratch instead of incrementally.")
+
+    def handle(self, *args, **options):
+        stats = risk_index.refresh(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(f"Risk index refreshed: {stats['keys']} keys | {stats['history_rows']} historical rows"))
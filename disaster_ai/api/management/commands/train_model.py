@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from django.core.management.base import BaseCommand
 
-from ...pipeline.trainer import train_and_save
+from ...pipeline.search import run_search
+from ...pipeline.trainer import train_and_save, train_incremental, train_streaming, load_training_data, encode_labels
 
 
 class Command(BaseCommand):
@@ -11,9 +12,63 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("--no-csv", action="store_true", help="Do not use CSVs; force synthetic.")
         parser.add_argument("--n-per-class", type=int, default=1500, help="Synthetic rows per class if falling back.")
+        parser.add_argument("--force", action="store_true", help="Retrain even if data and config are unchanged since the last run.")
+        parser.add_argument("--incremental", action="store_true", help="Update the current model from CSVs added since the last run.")
+        parser.add_argument("--new-trees", type=int, default=50, help="Trees/stages added per incremental update.")
+        parser.add_argument("--streaming", action="store_true", help="Out-of-core training over CSVs, chunk by chunk.")
+        parser.add_argument("--chunk-size", type=int, default=50000, help="Rows per chunk in streaming mode.")
+        parser.add_argument("--epochs", type=int, default=1, help="Passes over the data in streaming mode.")
+        parser.add_argument("--no-resume", action="store_true", help="Ignore any streaming checkpoint and start over.")
+        parser.add_argument("--search", action="store_true", help="Cross-validated hyperparameter search, then train with the best config.")
+        parser.add_argument("--trials", type=int, default=20, help="Search trials to sample.")
+        parser.add_argument("--folds", type=int, default=3, help="Stratified CV folds per trial.")
+        parser.add_argument("--budget", type=float, default=600, help="Search wall-clock budget in seconds.")
+        parser.add_argument("--workers", type=int, default=None, help="Search worker processes (default: CPU count).")
+        parser.add_argument("--max-latency-ms", type=float, default=None, help="Reject configs slower than this per prediction.")
+        parser.add_argument("--max-size-mb", type=float, default=None, help="Reject configs whose pickled model exceeds this size.")
 
     def handle(self, *args, **options):
+        if options["incremental"]:
+            meta = train_incremental(n_new_trees=int(options["new_trees"]))
+            self.stdout.write(self.style.SUCCESS(f"Model updated: {meta.get('model')} | rows={meta.get('incremental_rows')} | batch_accuracy={meta.get('batch_accuracy')}"))
+            return
+
+        if options["streaming"]:
+            meta = train_streaming(
+                chunk_size=int(options["chunk_size"]),
+                epochs=int(options["epochs"]),
+                resume=not options["no_resume"],
+            )
+            self.stdout.write(self.style.SUCCESS(f"Model trained (streaming): {meta.get('model')} | accuracy={meta.get('accuracy')} | rows={meta.get('rows_seen')}"))
+            return
+
         prefer_csv = not options["no_csv"]
         n_per_class = int(options["n_per_class"])
-        meta = train_and_save(n_per_class=n_per_class, prefer_csv=prefer_csv)
+
+        params = None
+        if options["search"]:
+            X, y = load_training_data(n_per_class=n_per_class, prefer_csv=prefer_csv)
+            max_size_mb = options["max_size_mb"]
+            results = run_search(
+                X,
+                encode_labels(y),
+                n_trials=int(options["trials"]),
+                folds=int(options["folds"]),
+                budget_seconds=float(options["budget"]),
+                workers=options["workers"],
+                max_latency_ms=options["max_latency_ms"],
+                max_size_bytes=int(max_size_mb * 1024 * 1024) if max_size_mb is not None else None,
+            )
+            self.stdout.write(
+                f"Search: {results['trials_completed']}/{results['trials_requested']} trials ({results['trials_failed']} failed)"
+                f"{' (budget reached)' if results['stopped_early'] else ''} | best={results['best_params']} | cv_accuracy={results['best_accuracy']}"
+            )
+            if results["best_params"] is None:
+                self.stdout.write(self.style.WARNING("No trial met the constraints; training with default parameters."))
+            params = results["best_params"]
+
+        meta = train_and_save(n_per_class=n_per_class, prefer_csv=prefer_csv, params=params, force=options["force"])
+        if meta.get("skipped"):
+            self.stdout.write(self.style.SUCCESS(f"Model up to date (trained_at={meta.get('trained_at')}); use --force to retrain."))
+            return
         self.stdout.write(self.style.SUCCESS(f"Model trained: {meta.get('model')} | accuracy={meta.get('accuracy')} | features={len(meta.get('features', []))}"))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceFetchState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_type', models.CharField(choices=[('weather', 'Weather API'), ('satellite', 'Satellite Data'), ('seismic', 'Seismic Data'), ('social_media', 'Social Media'), ('news', 'News API')], max_length=20)),
+                ('location', models.CharField(max_length=100)),
+                ('last_fetch', models.DateTimeField(blank=True, null=True)),
+                ('last_values', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('source_type', 'location')},
+            },
+        ),
+    ]
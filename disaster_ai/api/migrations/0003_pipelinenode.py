@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_sourcefetchstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('node_id', models.CharField(max_length=100, unique=True)),
+                ('hostname', models.CharField(blank=True, max_length=255)),
+                ('heartbeat_at', models.DateTimeField()),
+                ('lease_expires_at', models.DateTimeField(db_index=True)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
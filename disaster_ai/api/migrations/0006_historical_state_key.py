@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:55
+
+from django.db import migrations, models
+
+
+def fill_state_key(apps, schema_editor):
+    HistoricalDisaster = apps.get_model('api', 'HistoricalDisaster')
+    rows = list(HistoricalDisaster.objects.only('id', 'state'))
+    for row in rows:
+        row.state_key = ' '.join(str(row.state).split()).casefold()
+    HistoricalDisaster.objects.bulk_update(rows, ['state_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_live_feed_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicaldisaster',
+            name='state_key',
+            field=models.CharField(default='', editable=False, max_length=50),
+        ),
+        migrations.RunPython(fill_state_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='historicaldisaster',
+            index=models.Index(fields=['-date', '-id'], name='hist_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicaldisaster',
+            index=models.Index(fields=['state_key', '-date', '-id'], name='hist_state_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:59
+
+from django.db import migrations, models
+
+
+def fill_rollups(apps, schema_editor):
+    # Same aggregate as rollups.rebuild(), against the historical models
+    from django.db.models import Count, Max, Sum
+    from django.db.models.functions import TruncMonth
+
+    HistoricalDisaster = apps.get_model('api', 'HistoricalDisaster')
+    DisasterRollup = apps.get_model('api', 'DisasterRollup')
+    grouped = (
+        HistoricalDisaster.objects
+        .annotate(month=TruncMonth('date'))
+        .values('type', 'state_key', 'month')
+        .annotate(n=Count('id'), casualties=Sum('casualties'), damage=Sum('damage_estimate'), state=Max('state'))
+        .order_by()
+    )
+    DisasterRollup.objects.bulk_create(
+        (
+            DisasterRollup(
+                type=g['type'], state_key=g['state_key'], state=g['state'], month=g['month'],
+                count=g['n'], casualties=g['casualties'] or 0, damage_estimate=g['damage'] or 0,
+            )
+            for g in grouped.iterator(chunk_size=2000)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_historical_state_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DisasterRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(max_length=20)),
+                ('state_key', models.CharField(max_length=50)),
+                ('state', models.CharField(max_length=50)),
+                ('month', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('casualties', models.BigIntegerField(default=0)),
+                ('damage_estimate', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month'], name='api_disaste_month_d2e99a_idx'), models.Index(fields=['state_key', 'month'], name='api_disaste_state_k_ca6e40_idx')],
+                'constraints': [models.UniqueConstraint(fields=('type', 'state_key', 'month'), name='rollup_bucket_unique')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:02
+
+from django.db import migrations, models
+
+
+# Copies of api.pipeline.geo as of this migration, so later changes there cannot alter it
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def _encode(lat, lon, precision=9):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[bits])
+            bits = bit = 0
+    return ''.join(chars)
+
+
+def _coordinates_of(value):
+    try:
+        if isinstance(value, dict):
+            lat = value.get('lat', value.get('latitude'))
+            lon = value.get('lon', value.get('lng', value.get('longitude')))
+        elif isinstance(value, (list, tuple)) and len(value) == 2:
+            lat, lon = value
+        else:
+            return None, None
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None, None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None, None
+    return lat, lon
+
+
+def fill_spatial(apps, schema_editor):
+    HistoricalDisaster = apps.get_model('api', 'HistoricalDisaster')
+    rows = list(HistoricalDisaster.objects.exclude(coordinates=None).only('id', 'coordinates'))
+    for row in rows:
+        row.lat, row.lon = _coordinates_of(row.coordinates)
+        row.geohash = _encode(row.lat, row.lon) if row.lat is not None else ''
+    HistoricalDisaster.objects.bulk_update(rows, ['lat', 'lon', 'geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_disasterrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicaldisaster',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='historicaldisaster',
+            name='lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicaldisaster',
+            name='lon',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_spatial, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='historicaldisaster',
+            index=models.Index(fields=['geohash'], name='hist_geohash_idx'),
+        ),
+    ]
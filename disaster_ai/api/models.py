@@ -22,6 +22,8 @@ class HistoricalDisaster(models.Model):
     type = models.CharField(max_length=20, choices=DISASTER_TYPES)
     subtype = models.CharField(max_length=50, blank=True)
     state = models.CharField(max_length=50)
+    # Case-folded copy of state, kept in sync by save(), so state lookups can use an index
+    state_key = models.CharField(max_length=50, editable=False, default='')
     district = models.CharField(max_length=50)
     city = models.CharField(max_length=50, blank=True)
     date = models.DateField()
@@ -29,6 +31,10 @@ class HistoricalDisaster(models.Model):
     casualties = models.IntegerField(default=0)
     damage_estimate = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     coordinates = models.JSONField(null=True, blank=True)  # {lat: float, lon: float}
+    # Indexed copies of coordinates, kept in sync by save(), for radius and bounding-box queries
+    lat = models.FloatField(null=True, blank=True, editable=False)
+    lon = models.FloatField(null=True, blank=True, editable=False)
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
     source = models.CharField(max_length=50, default='manual')
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -37,8 +43,27 @@ class HistoricalDisaster(models.Model):
         indexes = [
             models.Index(fields=['type', 'state', 'date']),
             models.Index(fields=['state', 'district']),
+            models.Index(fields=['-date', '-id'], name='hist_date_id_idx'),
+            models.Index(fields=['state_key', '-date', '-id'], name='hist_state_date_id_idx'),
+            models.Index(fields=['geohash'], name='hist_geohash_idx'),
         ]
     
+    @staticmethod
+    def normalize_state(state):
+        return ' '.join(str(state).split()).casefold()
+    
+    def fill_derived(self):
+        """Set the columns derived from state and coordinates; bulk writers call this themselves."""
+        from .pipeline.geo import coordinates_of, encode
+        
+        self.state_key = self.normalize_state(self.state)
+        self.lat, self.lon = coordinates_of(self.coordinates)
+        self.geohash = encode(self.lat, self.lon) if self.lat is not None else ''
+    
+    def save(self, *args, **kwargs):
+        self.fill_derived()
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"{self.type} in {self.state} on {self.date}"
 
@@ -168,3 +193,88 @@ class ExternalDataSource(models.Model):
     
     def __str__(self):
         return f"{self.name} ({self.source_type})"
+
+class SourceFetchState(models.Model):
+    """Last fetch per (source, location), so the scheduler resumes on schedule after a restart."""
+    source_type = models.CharField(max_length=20, choices=ExternalDataSource.SOURCE_TYPES)
+    location = models.CharField(max_length=100)
+    last_fetch = models.DateTimeField(null=True, blank=True)
+    last_values = models.JSONField(default=dict)  # Features returned by the last successful fetch
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['source_type', 'location']
+    
+    def __str__(self):
+        return f"{self.source_type} for {self.location} at {self.last_fetch}"
+
+class PipelineNode(models.Model):
+    """Membership lease of a node running the prediction scheduler; locations are
+    partitioned across nodes whose lease has not expired."""
+    node_id = models.CharField(max_length=100, unique=True)
+    hostname = models.CharField(max_length=255, blank=True)
+    heartbeat_at = models.DateTimeField()
+    lease_expires_at = models.DateTimeField(db_index=True)
+    joined_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.node_id} (lease until {self.lease_expires_at})"
+
+class AlertEvent(models.Model):
+    """Alert delivered by the database alert sink."""
+    location = models.CharField(max_length=100)
+    disaster = models.CharField(max_length=30)
+    risk_level = models.CharField(max_length=20, blank=True)
+    probability = models.FloatField(null=True, blank=True)
+    payload = models.JSONField(default=dict)  # Alert as emitted
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['location', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.disaster} alert for {self.location} at {self.created_at}"
+
+class LiveFeedEvent(models.Model):
+    """Live feed history shared by all workers; the autoincrement id is the sequence number."""
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Live feed event {self.pk}"
+
+class LiveFeedState(models.Model):
+    """Single row holding whether the live feed runs and which worker's thread runs it."""
+    running = models.BooleanField(default=False)
+    owner = models.CharField(max_length=150, blank=True)  # Token of the runner thread
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Live feed {'running' if self.running else 'stopped'} ({self.owner or 'no runner'})"
+
+class DisasterRollup(models.Model):
+    """Historical disaster totals per type, state and month, maintained alongside HistoricalDisaster."""
+    type = models.CharField(max_length=20)
+    state_key = models.CharField(max_length=50)  # HistoricalDisaster.state_key
+    state = models.CharField(max_length=50)  # Display name, as last written
+    month = models.DateField()  # First day of the month
+    count = models.IntegerField(default=0)
+    casualties = models.BigIntegerField(default=0)
+    damage_estimate = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['type', 'state_key', 'month'], name='rollup_bucket_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['month']),
+            models.Index(fields=['state_key', 'month']),
+        ]
+    
+    def __str__(self):
+        return f"{self.count} {self.type} in {self.state} during {self.month:%Y-%m}"
@@ -0,0 +1,499 @@
+from __future__ import annotations
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except Exception:  # pragma: no cover
+    requests = None
+
+from .leader import FileLeaderLock
+from .model_store import MODEL_DIR
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_DIR = MODEL_DIR / "alert_spool"
+
+# HTTP statuses worth retrying; any other 4xx means the payload itself was rejected
+_RETRYABLE_STATUS = {408, 425, 429}
+
+
+class SinkError(Exception):
+    """Delivery failed; `pending` holds the alerts of the batch that were not delivered."""
+
+    def __init__(self, message: str, pending: Optional[List[dict]] = None):
+        super().__init__(message)
+        self.pending = pending
+
+
+class AlertSink:
+    """Destination for alerts. write() receives a whole batch and raises on failure."""
+
+    name = "sink"
+
+    def write(self, alerts: List[dict]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class StdoutSink(AlertSink):
+    name = "stdout"
+
+    def write(self, alerts: List[dict]) -> None:
+        sys.stdout.write("".join(json.dumps(a, ensure_ascii=False) + "\n" for a in alerts))
+        sys.stdout.flush()
+
+
+class FileSink(AlertSink):
+    """Appends alerts as JSON lines."""
+
+    name = "file"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def write(self, alerts: List[dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(a, ensure_ascii=False) + "\n" for a in alerts))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class HttpSink(AlertSink):
+    """POSTs alerts over a pooled keep-alive session.
+    With batch=True the whole batch goes in one request as a JSON array; otherwise one
+    request per alert, as endpoints such as the backend's /api/disasters expect.
+    """
+
+    name = "http"
+
+    def __init__(self, url: str, timeout: float = 5.0, batch: bool = False, pool_size: int = 4):
+        if requests is None:
+            raise RuntimeError("requests is required for the HTTP alert sink. Install via: pip install requests")
+        self.url = url
+        self.timeout = timeout
+        self.batch = batch
+        self._session = requests.Session()
+        # Retries are handled by the dispatcher's spool, not by urllib3
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def _post(self, payload) -> None:
+        resp = self._session.post(self.url, json=payload, timeout=self.timeout)
+        if resp.status_code >= 500 or resp.status_code in _RETRYABLE_STATUS:
+            raise SinkError(f"HTTP {resp.status_code} from {self.url}")
+        if resp.status_code >= 400:
+            logger.warning("Alert rejected by %s (HTTP %s); dropping", self.url, resp.status_code)
+
+    def write(self, alerts: List[dict]) -> None:
+        if self.batch:
+            try:
+                self._post(alerts)
+            except requests.RequestException as e:
+                raise SinkError(str(e)) from e
+            return
+        for i, alert in enumerate(alerts):
+            try:
+                self._post(alert)
+            except (requests.RequestException, SinkError) as e:
+                raise SinkError(str(e), pending=alerts[i:]) from e
+
+    def close(self) -> None:
+        self._session.close()
+
+
+class DbSink(AlertSink):
+    """Stores alerts in the AlertEvent table with one bulk insert per batch."""
+
+    name = "db"
+
+    def write(self, alerts: List[dict]) -> None:
+        from django.db import close_old_connections, transaction
+        from ..models import AlertEvent
+
+        close_old_connections()
+        events = [
+            AlertEvent(
+                location=str(a.get("location", ""))[:100],
+                disaster=str(a.get("disaster") or a.get("type") or "")[:30],
+                risk_level=str(a.get("risk_level") or a.get("severity") or "")[:20],
+                probability=a.get("accuracy", a.get("probability")),
+                payload=a,
+            )
+            for a in alerts
+        ]
+        with transaction.atomic():
+            AlertEvent.objects.bulk_create(events)
+
+
+class _Spool:
+    """Undelivered batches on disk, one JSON-lines segment per batch, replayed oldest first.
+    Once max_bytes is exceeded the oldest segments are discarded.
+
+    Every worker process of a channel shares the directory. Any of them may append, but
+    only the process holding the directory's replay lock reads segments back, so a
+    segment is never sent by two processes.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._replay_lock = FileLeaderLock(self.directory / "replay.lock")
+
+    def _segments(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("*.jsonl"))
+
+    def append(self, alerts: List[dict]) -> None:
+        if not alerts:
+            return
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Zero-padded so lexical order is append order, also across restarts; the pid keeps
+            # names unique between processes
+            path = self.directory / f"{time.time_ns():020d}-{os.getpid()}-{next(self._seq):06d}.jsonl"
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text("".join(json.dumps(a, ensure_ascii=False) + "\n" for a in alerts), encoding="utf-8")
+            os.replace(tmp, path)
+            self._enforce_limit()
+
+    def _enforce_limit(self) -> None:
+        segments = self._segments()
+        sizes = [p.stat().st_size for p in segments]
+        total = sum(sizes)
+        for path, size in zip(segments, sizes):
+            if total <= self.max_bytes:
+                break
+            self.dropped += self._count(path)
+            path.unlink(missing_ok=True)
+            total -= size
+
+    @staticmethod
+    def _count(path: Path) -> int:
+        with open(path, "rb") as f:
+            return sum(1 for _ in f)
+
+    def claim(self) -> bool:
+        """Take the replay lock; False while another process is replaying."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self._replay_lock.try_acquire()
+
+    def release(self) -> None:
+        self._replay_lock.release()
+
+    def has_backlog(self) -> bool:
+        with self._lock:
+            return bool(self._segments())
+
+    def oldest(self):
+        with self._lock:
+            for path in self._segments():
+                try:
+                    text = path.read_text(encoding="utf-8")
+                except FileNotFoundError:
+                    # Discarded by another process enforcing the size limit
+                    continue
+                return path, [json.loads(line) for line in text.splitlines() if line.strip()]
+            return None
+
+    def remove(self, path: Path) -> None:
+        with self._lock:
+            path.unlink(missing_ok=True)
+
+    def replace(self, path: Path, alerts: List[dict]) -> None:
+        """Rewrite a segment with the alerts of it that are still undelivered."""
+        with self._lock:
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text("".join(json.dumps(a, ensure_ascii=False) + "\n" for a in alerts), encoding="utf-8")
+            os.replace(tmp, path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            segments = self._segments()
+            return {
+                "segments": len(segments),
+                "bytes": sum(p.stat().st_size for p in segments),
+                "dropped": self.dropped,
+            }
+
+
+class _SinkState:
+    def __init__(self, sink: AlertSink, spool: _Spool):
+        self.sink = sink
+        self.spool = spool
+        self.attempts = 0
+        self.next_retry_at = 0.0
+        self.delivered = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+
+class AlertDispatcher:
+    """Fans alerts out to sinks from a background thread.
+
+    publish() never blocks: alerts go onto a bounded in-memory queue, or straight to each
+    sink's disk spool when that is full. The worker delivers batches of up to batch_size,
+    or whatever arrived within flush_interval. A batch a sink fails to take is spooled,
+    and the sink is retried with jittered exponential backoff. Spooled batches are
+    replayed before new alerts so per-sink order is preserved. The spool survives
+    restarts, so undelivered alerts are sent by the next process.
+    """
+
+    def __init__(
+        self,
+        sinks: List[AlertSink],
+        name: str = "alerts",
+        spool_dir: Path = DEFAULT_SPOOL_DIR,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        queue_size: int = 10000,
+        max_spool_bytes: int = 50 * 1024 * 1024,
+        backoff_base: float = 1.0,
+        backoff_max: float = 300.0,
+    ):
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._states = [
+            _SinkState(sink, _Spool(Path(spool_dir) / name / f"{i}-{sink.name}", max_spool_bytes))
+            for i, sink in enumerate(sinks)
+        ]
+        self._published = 0
+        self._overflowed = 0
+        self._counter_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ----------------------
+    # Producer side
+    # ----------------------
+    def publish(self, alert: dict) -> None:
+        self.publish_many([alert])
+
+    def publish_many(self, alerts: List[dict]) -> None:
+        if not alerts:
+            return
+        self._ensure_started()
+        with self._counter_lock:
+            self._published += len(alerts)
+        for i, alert in enumerate(alerts):
+            try:
+                self._queue.put_nowait(alert)
+            except queue.Full:
+                overflow = alerts[i:]
+                with self._counter_lock:
+                    self._overflowed += len(overflow)
+                for state in self._states:
+                    state.spool.append(overflow)
+                return
+
+    # ----------------------
+    # Lifecycle
+    # ----------------------
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=f"AI-Alerts-{self.name}", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Deliver (or spool) everything queued and stop the worker."""
+        if self._thread is None or self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        for state in self._states:
+            try:
+                state.sink.close()
+            except Exception:
+                pass
+
+    # ----------------------
+    # Worker
+    # ----------------------
+    def _next_batch(self) -> List[dict]:
+        batch: List[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            for state in self._states:
+                self._deliver(state, batch)
+        # Shutdown: one last attempt, anything undeliverable stays in the spool
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        batches = [leftover[i:i + self.batch_size] for i in range(0, len(leftover), self.batch_size)] or [[]]
+        for state in self._states:
+            state.next_retry_at = 0.0
+            for batch in batches:
+                self._deliver(state, batch)
+
+    def _deliver(self, state: _SinkState, batch: List[dict]) -> None:
+        if state.spool.has_backlog():
+            # Backlog pending: keep order by queueing behind it
+            state.spool.append(batch)
+            if time.monotonic() >= state.next_retry_at:
+                self._replay(state)
+            return
+        if not batch:
+            return
+        try:
+            state.sink.write(batch)
+        except Exception as e:
+            pending = getattr(e, "pending", None) or batch
+            state.delivered += len(batch) - len(pending)
+            state.spool.append(pending)
+            self._failed(state, e)
+        else:
+            state.delivered += len(batch)
+
+    def _replay(self, state: _SinkState) -> None:
+        if not state.spool.claim():
+            # Another process is replaying this spool; it will send these segments
+            return
+        try:
+            self._replay_claimed(state)
+        finally:
+            state.spool.release()
+
+    def _replay_claimed(self, state: _SinkState) -> None:
+        while True:
+            segment = state.spool.oldest()
+            if segment is None:
+                return
+            path, alerts = segment
+            try:
+                state.sink.write(alerts)
+            except Exception as e:
+                pending = getattr(e, "pending", None) or alerts
+                state.delivered += len(alerts) - len(pending)
+                if len(pending) < len(alerts):
+                    state.spool.replace(path, pending)
+                self._failed(state, e)
+                return
+            state.delivered += len(alerts)
+            state.spool.remove(path)
+            state.attempts = 0
+
+    def _failed(self, state: _SinkState, error: Exception) -> None:
+        state.failures += 1
+        state.attempts += 1
+        state.last_error = str(error)
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (state.attempts - 1)))
+        state.next_retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+
+    # ----------------------
+    # Observability
+    # ----------------------
+    def stats(self) -> dict:
+        with self._counter_lock:
+            published, overflowed = self._published, self._overflowed
+        return {
+            "published": published,
+            "queued": self._queue.qsize(),
+            "overflowed_to_spool": overflowed,
+            "sinks": [
+                {
+                    "sink": s.sink.name,
+                    "delivered": s.delivered,
+                    "failures": s.failures,
+                    "retry_in_seconds": round(max(0.0, s.next_retry_at - time.monotonic()), 1),
+                    "last_error": s.last_error,
+                    "spool": s.spool.stats(),
+                }
+                for s in self._states
+            ],
+        }
+
+
+def build_sinks(names: str) -> List[AlertSink]:
+    """Sinks from a comma-separated list of stdout, file, http and db."""
+    from django.conf import settings
+
+    sinks: List[AlertSink] = []
+    for name in (n.strip().lower() for n in names.split(",")):
+        if name == "stdout":
+            sinks.append(StdoutSink())
+        elif name == "file":
+            sinks.append(FileSink(getattr(settings, "PIPELINE_ALERT_FILE_PATH", MODEL_DIR / "alerts.jsonl")))
+        elif name == "http":
+            url = getattr(settings, "PIPELINE_ALERT_HTTP_URL", "")
+            if url:
+                sinks.append(HttpSink(url, batch=getattr(settings, "PIPELINE_ALERT_HTTP_BATCH", False)))
+        elif name == "db":
+            sinks.append(DbSink())
+    return sinks
+
+
+_dispatchers: Dict[str, AlertDispatcher] = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_dispatcher(channel: str = "pipeline") -> AlertDispatcher:
+    """Shared dispatcher per channel: "pipeline" delivers to PIPELINE_ALERT_SINKS,
+    "backend" to the backend's disaster endpoint (BACKEND_ALERT_URL)."""
+    with _dispatchers_lock:
+        if channel not in _dispatchers:
+            from django.conf import settings
+
+            if channel == "backend":
+                sinks = [HttpSink(getattr(settings, "BACKEND_ALERT_URL", "http://localhost:5000/api/disasters"))]
+            else:
+                sinks = build_sinks(getattr(settings, "PIPELINE_ALERT_SINKS", "stdout"))
+            _dispatchers[channel] = AlertDispatcher(
+                sinks,
+                name=channel,
+                spool_dir=Path(getattr(settings, "PIPELINE_ALERT_SPOOL_DIR", DEFAULT_SPOOL_DIR)),
+                batch_size=getattr(settings, "PIPELINE_ALERT_BATCH_SIZE", 50),
+                flush_interval=getattr(settings, "PIPELINE_ALERT_FLUSH_SECONDS", 1.0),
+                max_spool_bytes=int(getattr(settings, "PIPELINE_ALERT_MAX_SPOOL_MB", 50) * 1024 * 1024),
+            )
+        return _dispatchers[channel]
+
+
+def alert_stats() -> Dict[str, dict]:
+    with _dispatchers_lock:
+        return {channel: d.stats() for channel, d in _dispatchers.items()}
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+import time
+from typing import List, Optional
+
+
+class AuditWriter:
+    """Write-behind queue for PredictionRequest audit rows.
+
+    record() only enqueues the row's fields and never touches the database, so request
+    latency excludes the audit write. A background thread bulk-inserts whatever is queued
+    once batch_size rows are waiting or flush_interval seconds have passed. When the queue
+    is full new records are dropped and counted rather than blocking the request. close(),
+    registered with atexit, flushes everything still queued. created_at is set when the
+    batch is written; completed_at carries the time the request actually finished.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 2.0, queue_size: int = 10000):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._counters = {"recorded": 0, "written": 0, "dropped": 0, "write_errors": 0, "batches": 0}
+        self._counter_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_error: Optional[str] = None
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._counter_lock:
+            self._counters[name] += n
+
+    def record(self, **fields) -> bool:
+        """Queue one PredictionRequest row; False if it was dropped because the queue is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("recorded")
+        return True
+
+    # ----------------------
+    # Lifecycle
+    # ----------------------
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="AI-Audit", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Write everything queued and stop the worker."""
+        if self._thread is None or self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+    # ----------------------
+    # Worker
+    # ----------------------
+    def _next_batch(self) -> List[dict]:
+        batch: List[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self) -> List[dict]:
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                return rows
+
+    def _write(self, batch: List[dict]) -> None:
+        if not batch:
+            return
+        from ..models import PredictionRequest
+
+        try:
+            PredictionRequest.objects.bulk_create([PredictionRequest(**fields) for fields in batch])
+        except Exception as e:
+            # Audit rows are not worth blocking or retrying the pipeline for
+            self.last_error = str(e)
+            self._count("write_errors")
+            self._count("dropped", len(batch))
+            return
+        self._count("written", len(batch))
+        self._count("batches")
+
+    def _run(self) -> None:
+        from django.db import connection
+
+        try:
+            while not self._stop.is_set():
+                self._write(self._next_batch())
+            leftover = self._drain()
+            for i in range(0, len(leftover), self.batch_size):
+                self._write(leftover[i:i + self.batch_size])
+        finally:
+            connection.close()
+
+    # ----------------------
+    # Observability
+    # ----------------------
+    def stats(self) -> dict:
+        with self._counter_lock:
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "queue_depth": self._queue.qsize(),
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "last_error": self.last_error,
+        }
+
+
+def _from_settings() -> AuditWriter:
+    from django.conf import settings
+
+    return AuditWriter(
+        batch_size=int(getattr(settings, "PIPELINE_AUDIT_BATCH_SIZE", 100)),
+        flush_interval=float(getattr(settings, "PIPELINE_AUDIT_FLUSH_SECONDS", 2.0)),
+        queue_size=int(getattr(settings, "PIPELINE_AUDIT_QUEUE_SIZE", 10000)),
+    )
+
+
+audit_log = _from_settings()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from .model_store import model_version
+from .predictor import (
+    current_model,
+    feature_overrides,
+    features_for_location,
+    model_label,
+    parse_location,
+    predict_proba_matrix,
+    risk_level_from_prob,
+    severity_from_prob,
+    to_feature_vector,
+)
+from .trainer import DISASTER_CLASSES
+
+
+_NONE_IDX = DISASTER_CLASSES.index("none")
+
+
+def _resolve(item: dict, max_age: float) -> Tuple[str, Dict[str, float], str]:
+    """(location name, features, feature source) for one batch item."""
+    name, lat, lon = parse_location(item)
+    supplied = feature_overrides(item)
+    # A raw feature row without a location is scored as given
+    if "location" not in item and lat is None and supplied:
+        return name, supplied, "request"
+    feats, source = features_for_location(name, lat=lat, lon=lon, overrides=supplied, max_age=max_age)
+    return name, feats, source
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    it = iter(items)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def score_batch(
+    items: Iterable,
+    chunk_size: int = 256,
+    persist: bool = False,
+    max_items: int = 10000,
+    max_age: float = 3600,
+    fetch_workers: int = 8,
+) -> Iterator[dict]:
+    """Score request items chunk by chunk, yielding one result dict per item and a final summary.
+
+    Items are consumed lazily, so only one chunk is in memory at a time. Per chunk, locations
+    needing features are resolved concurrently, then one predict_proba call scores the whole
+    chunk. With persist=True each chunk's top predictions are bulk-inserted in one transaction.
+    An item that cannot be resolved yields an error result instead of failing the batch.
+    """
+    from django.db import transaction
+    from django.utils import timezone as dj_timezone
+    from ..models import DisasterPrediction
+
+    started = time.time()
+    model = current_model()
+    version = model_version()
+    label = model_label(model)
+    counts = {"count": 0, "errors": 0, "chunks": 0, "persisted": 0}
+    pool = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="AI-BatchFetch")
+
+    def resolve(entry):
+        index, item = entry
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("item must be a JSON object")
+            return index, _resolve(item, max_age), None
+        except Exception as e:
+            return index, None, str(e)
+
+    pending = iter(items)
+    try:
+        numbered = enumerate(itertools.islice(pending, max_items))
+        for chunk in _chunks(numbered, chunk_size):
+            resolved = list(pool.map(resolve, chunk))
+            ok = [(index, r) for index, r, err in resolved if err is None]
+            results: Dict[int, dict] = {
+                index: {"index": index, "error": err} for index, _, err in resolved if err is not None
+            }
+
+            rows = []
+            if ok:
+                X = np.array([to_feature_vector(feats) for _, (_, feats, _) in ok])
+                probas = predict_proba_matrix(model, X)
+                today = dj_timezone.now().date()
+                for (index, (name, feats, source)), proba in zip(ok, probas):
+                    best = int(np.argmax(proba))
+                    risk = np.delete(proba, _NONE_IDX)
+                    top_risk = int(np.argmax(risk))
+                    top_risk += top_risk >= _NONE_IDX  # index back into DISASTER_CLASSES
+                    results[index] = {
+                        "index": index,
+                        "location": name,
+                        "prediction": DISASTER_CLASSES[best],
+                        "probability": round(float(proba[best]), 4),
+                        "risk_level": risk_level_from_prob(float(proba[top_risk])),
+                        "class_probabilities": dict(zip(DISASTER_CLASSES, map(float, np.round(proba, 4)))),
+                        "feature_source": source,
+                    }
+                    if persist:
+                        probability = round(float(proba[top_risk]), 4)
+                        rows.append(DisasterPrediction(
+                            type=DISASTER_CLASSES[top_risk],
+                            location=name,
+                            predicted_date=today,
+                            severity=severity_from_prob(probability),
+                            confidence=round(float(proba[best]), 4),
+                            probability=probability,
+                            model_used=label,
+                            model_version=version,
+                            input_features={"features": feats, "feature_source": source},
+                            prediction_metadata={"batch": True, "model_class": type(model).__name__},
+                        ))
+            if rows:
+                with transaction.atomic():
+                    DisasterPrediction.objects.bulk_create(rows)
+                counts["persisted"] += len(rows)
+
+            counts["chunks"] += 1
+            counts["count"] += len(chunk)
+            counts["errors"] += len(chunk) - len(ok)
+            for index, _ in chunk:
+                yield results[index]
+    finally:
+        pool.shutdown(wait=False)
+
+    yield {"summary": {
+        **counts,
+        "model_version": version,
+        # islice stopped at max_items; anything left in the source was not scored
+        "truncated": next(pending, None) is not None,
+        "processing_time": round(time.time() - started, 4),
+    }}
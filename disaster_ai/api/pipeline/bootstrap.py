@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from .model_store import BASE_DIR, MODEL_DIR, get_model, load_meta
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+BOOTSTRAP_LOG_PATH = MODEL_DIR / "bootstrap_train.log"
+BOOTSTRAP_STATUS_PATH = MODEL_DIR / "bootstrap_train.json"
+BOOTSTRAP_LOCK_PATH = MODEL_DIR / "bootstrap_train.lock"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _alive(pid) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class _BootstrapTrainer:
+    """Trains the first model in a low-priority subprocess when none exists yet,
+    so neither the scheduler thread nor request handling waits on it.
+
+    Every worker process calls ensure_started(), so the run is shared through a status
+    file: the launch happens under an exclusive file lock, a run whose process is still
+    alive is never started twice, and a failed run is retried only after a backoff that
+    doubles with each consecutive failure.
+    """
+
+    def __init__(self, retry_seconds: float = 60.0, max_retry_seconds: float = 3600.0, check_interval: float = 5.0):
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._next_check = 0.0
+
+    # ----------------------
+    # Shared state
+    # ----------------------
+    @staticmethod
+    def _read() -> dict:
+        try:
+            return json.loads(BOOTSTRAP_STATUS_PATH.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+
+    @staticmethod
+    def _write(state: dict) -> None:
+        tmp = BOOTSTRAP_STATUS_PATH.with_name(f"{BOOTSTRAP_STATUS_PATH.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, BOOTSTRAP_STATUS_PATH)
+
+    def _try_lock(self) -> Optional[int]:
+        fd = os.open(BOOTSTRAP_LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _due(self, state: dict) -> bool:
+        """Whether a new run may start given the shared state."""
+        if state.get("state") == "training" and _alive(state.get("pid")):
+            return False
+        if state.get("state") == "failed" and time.time() < float(state.get("retry_after") or 0):
+            return False
+        return True
+
+    # ----------------------
+    # Launch
+    # ----------------------
+    def ensure_started(self, n_per_class: int = 500) -> None:
+        with self._lock:
+            now = time.time()
+            if now < self._next_check or (self._proc is not None and self._proc.poll() is None):
+                return
+            self._next_check = now + self.check_interval
+            if not self._due(self._read()):
+                return
+            fd = self._try_lock()
+            if fd is None:
+                # Another process is deciding right now
+                return
+            try:
+                state = self._read()
+                if not self._due(state) or get_model() is not None:
+                    return
+                self._launch(n_per_class, int(state.get("failures") or 0))
+            finally:
+                os.close(fd)
+
+    def _launch(self, n_per_class: int, failures: int) -> None:
+        cmd = [sys.executable, str(BASE_DIR / "manage.py"), "train_model", "--n-per-class", str(n_per_class)]
+        # The child loads the Django app too; keep it from starting its own scheduler
+        env = {**os.environ, "PIPELINE_SCHEDULER_ENABLED": "0"}
+        kwargs = {}
+        if os.name == "nt":
+            kwargs["creationflags"] = subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        with open(BOOTSTRAP_LOG_PATH, "ab") as log:
+            proc = subprocess.Popen(cmd, cwd=str(BASE_DIR), env=env, stdout=log, stderr=subprocess.STDOUT, **kwargs)
+        if hasattr(os, "setpriority"):
+            try:
+                os.setpriority(os.PRIO_PROCESS, proc.pid, 10)
+            except OSError:
+                pass
+        self._proc = proc
+        state = {"state": "training", "pid": proc.pid, "started_at": _now(), "finished_at": None, "returncode": None, "failures": failures}
+        self._write(state)
+        threading.Thread(target=self._wait, args=(proc, state), name="AI-Bootstrap", daemon=True).start()
+
+    def _wait(self, proc: subprocess.Popen, state: dict) -> None:
+        code = proc.wait()
+        failures = 0 if code == 0 else int(state["failures"]) + 1
+        retry_after = None
+        if code != 0:
+            retry_after = time.time() + min(self.max_retry_seconds, self.retry_seconds * 2 ** (failures - 1))
+        self._write({
+            **state,
+            "state": "succeeded" if code == 0 else "failed",
+            "finished_at": _now(),
+            "returncode": code,
+            "failures": failures,
+            "retry_after": retry_after,
+        })
+
+    def status(self) -> dict:
+        state = self._read()
+        name = state.get("state") or "idle"
+        if name == "training" and not _alive(state.get("pid")):
+            # The launching process went away before recording the outcome
+            name = "unknown"
+        return {
+            "state": name,
+            "started_at": state.get("started_at"),
+            "finished_at": state.get("finished_at"),
+            "returncode": state.get("returncode"),
+            "failures": state.get("failures", 0),
+            "retry_after": state.get("retry_after"),
+        }
+
+
+bootstrap = _BootstrapTrainer()
+
+
+def model_readiness() -> dict:
+    """Which model predictions are served from, for the status endpoint."""
+    ready = get_model() is not None
+    meta = load_meta() if ready else {}
+    return {
+        "ready": ready,
+        "serving": meta.get("model", "RandomForestClassifier") if ready else "RuleBasedModel",
+        "trained_at": meta.get("trained_at"),
+        "accuracy": meta.get("accuracy"),
+        "accuracy_at_full_fit": meta.get("accuracy_at_full_fit"),
+        "batch_accuracy": meta.get("batch_accuracy"),
+        "bootstrap": bootstrap.status(),
+    }
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import glob
+import io
 import os
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple
 
 import numpy as np
 
@@ -26,9 +27,10 @@ FEATURES = [
     "cloud_cover",
 ]
 LABEL_COL = "label"  # expected classes: none, flood, cyclone, wildfire, earthquake, drought
+ALLOWED_LABELS = {"none", "flood", "cyclone", "wildfire", "earthquake", "drought"}
 
 
-def _find_csv_files(base_dir: Path) -> List[Path]:
+def _find_csv_files(base_dir: Path, modified_after: Optional[float] = None) -> List[Path]:
     candidates = []
     # Look for CSVs directly under the project root
     candidates.extend([Path(x) for x in glob.glob(str(base_dir / "*.csv"))])
@@ -53,7 +55,12 @@ def _find_csv_files(base_dir: Path) -> List[Path]:
     dir_pat = os.getenv("TRAINING_DATA_DIR")
     if dir_pat:
         candidates.extend([Path(x) for x in glob.glob(str(Path(dir_pat) / "*.csv"))])
-    return list({c.resolve() for c in candidates})
+    files = list({c.resolve() for c in candidates})
+
+    # Incremental runs only want files written since the last training run
+    if modified_after is not None:
+        files = [f for f in files if f.stat().st_mtime > modified_after]
+    return files
 
 
 def _coerce_numeric(df: 'pd.DataFrame', cols: List[str]) -> 'pd.DataFrame':
@@ -65,15 +72,34 @@ def _coerce_numeric(df: 'pd.DataFrame', cols: List[str]) -> 'pd.DataFrame':
     return df
 
 
-def load_csv_dataset(base_dir: Path) -> Tuple[np.ndarray, np.ndarray]:
+def _normalize_labels(df: 'pd.DataFrame') -> 'pd.DataFrame':
+    # Label normalization
+    if LABEL_COL not in df.columns:
+        # Try fallbacks
+        for alt in ["target", "class", "disaster", "disaster_type"]:
+            if alt in df.columns:
+                df[LABEL_COL] = df[alt].astype(str).str.lower()
+                break
+    if LABEL_COL not in df.columns:
+        raise RuntimeError(f"Missing label column '{LABEL_COL}' in CSV files")
+
+    # Clean labels
+    df[LABEL_COL] = df[LABEL_COL].astype(str).str.strip().str.lower()
+
+    # Drop rows with no label
+    return df[df[LABEL_COL].notna() & (df[LABEL_COL] != "")]
+
+
+def load_csv_dataset(base_dir: Path, modified_after: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
     """Load and merge CSVs into feature matrix X and labels y.
     Columns required: FEATURES + LABEL_COL. Missing numeric columns are imputed by median.
     Rows missing LABEL_COL are dropped.
+    If modified_after (epoch seconds) is given, only files modified later are read.
     """
     if pd is None:
         raise RuntimeError("pandas is required to load CSV datasets. Install via: pip install pandas")
 
-    files = _find_csv_files(base_dir)
+    files = _find_csv_files(base_dir, modified_after=modified_after)
     if not files:
         raise FileNotFoundError("No CSV files found in data/raw, data, dataset, or datasets directories.")
 
@@ -92,21 +118,7 @@ def load_csv_dataset(base_dir: Path) -> Tuple[np.ndarray, np.ndarray]:
     # Normalize columns to expected schema; coerce numeric
     df = _coerce_numeric(df, FEATURES)
 
-    # Label normalization
-    if LABEL_COL not in df.columns:
-        # Try fallbacks
-        for alt in ["target", "class", "disaster", "disaster_type"]:
-            if alt in df.columns:
-                df[LABEL_COL] = df[alt].astype(str).str.lower()
-                break
-    if LABEL_COL not in df.columns:
-        raise RuntimeError(f"Missing label column '{LABEL_COL}' in CSV files")
-
-    # Clean labels
-    df[LABEL_COL] = df[LABEL_COL].astype(str).str.strip().str.lower()
-
-    # Drop rows with no label
-    df = df[df[LABEL_COL].notna() & (df[LABEL_COL] != "")]
+    df = _normalize_labels(df)
 
     # Impute missing numeric features by median
     for c in FEATURES:
@@ -114,8 +126,7 @@ def load_csv_dataset(base_dir: Path) -> Tuple[np.ndarray, np.ndarray]:
         df[c] = df[c].fillna(med if np.isfinite(med) else 0.0)
 
     # Filter to known classes
-    allowed = {"none", "flood", "cyclone", "wildfire", "earthquake", "drought"}
-    df = df[df[LABEL_COL].isin(allowed)]
+    df = df[df[LABEL_COL].isin(ALLOWED_LABELS)]
 
     # Remove extreme outliers (5-sigma clip per column)
     for c in FEATURES:
@@ -130,6 +141,119 @@ def load_csv_dataset(base_dir: Path) -> Tuple[np.ndarray, np.ndarray]:
     return X, y
 
 
+def list_csv_files(base_dir: Path) -> List[Path]:
+    """Training CSVs in a stable order, so chunk positions are reproducible across runs."""
+    return sorted(_find_csv_files(base_dir))
+
+
+def files_signature(files: List[Path]) -> List[list]:
+    """Cheap identity of a file set (path, size, mtime) without reading contents."""
+    sig = []
+    for f in files:
+        st = f.stat()
+        sig.append([str(f), st.st_size, st.st_mtime_ns])
+    return sig
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of bytes [start, end) of a file."""
+
+    def __init__(self, path: Path, start: int, end: int):
+        self._fh = open(path, "rb")
+        self._fh.seek(start)
+        self._left = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = min(len(b), self._left)
+        if n <= 0:
+            return 0
+        data = self._fh.read(n)
+        b[:len(data)] = data
+        self._left -= len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._fh.close()
+        super().close()
+
+
+def _stripe_ranges(path: Path, stripes: int) -> List[Tuple[int, int]]:
+    # Split the data section into byte ranges aligned to row boundaries
+    size = path.stat().st_size
+    with open(path, "rb") as fh:
+        fh.readline()  # header
+        data_start = fh.tell()
+        bounds = [data_start]
+        for i in range(1, stripes):
+            fh.seek(data_start + (size - data_start) * i // stripes)
+            fh.readline()
+            bounds.append(max(fh.tell(), bounds[-1]))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def iter_csv_chunks(
+    files: List[Path],
+    chunksize: int = 50000,
+    start: Tuple[int, int] = (0, 0),
+    stripes: int = 16,
+) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+    """Stream (file_idx, chunk_idx, X, y) chunks without loading whole files.
+    Each file is read as `stripes` byte ranges in parallel and every chunk takes
+    chunksize/stripes rows from each, so files sorted by label still yield mixed chunks
+    (incremental learners otherwise forget earlier classes). Rows must not contain
+    embedded newlines. Features are coerced to float with NaN left in place (imputation
+    needs global stats, which the caller accumulates); rows with unknown labels are dropped.
+    Chunks before start=(file_idx, chunk_idx) are skipped, whole files without being read.
+    """
+    if pd is None:
+        raise RuntimeError("pandas is required to load CSV datasets. Install via: pip install pandas")
+
+    for file_idx, f in enumerate(files):
+        if file_idx < start[0]:
+            continue
+        try:
+            columns = list(pd.read_csv(f, nrows=0).columns)
+            ranges = _stripe_ranges(f, max(1, stripes))
+        except Exception:
+            continue
+        per_stripe = max(1, chunksize // max(1, len(ranges)))
+        readers = [
+            pd.read_csv(io.BufferedReader(_ByteRange(f, a, b)), names=columns, header=None, chunksize=per_stripe)
+            for a, b in ranges
+        ]
+        try:
+            chunk_idx = 0
+            while readers:
+                parts = []
+                for reader in list(readers):
+                    try:
+                        parts.append(next(reader))
+                    except StopIteration:
+                        reader.close()
+                        readers.remove(reader)
+                if not parts:
+                    break
+                idx, chunk_idx = chunk_idx, chunk_idx + 1
+                if file_idx == start[0] and idx < start[1]:
+                    continue
+                df = _coerce_numeric(pd.concat(parts, ignore_index=True), FEATURES)
+                try:
+                    df = _normalize_labels(df)
+                except RuntimeError:
+                    break
+                df = df[df[LABEL_COL].isin(ALLOWED_LABELS)]
+                if df.empty:
+                    continue
+                yield file_idx, idx, df[FEATURES].to_numpy(dtype=float), df[LABEL_COL].to_numpy(dtype=str)
+        finally:
+            for reader in readers:
+                reader.close()
+
+
 def balance_by_oversample(X: np.ndarray, y: np.ndarray, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
     rng = np.random.default_rng(seed)
     classes, counts = np.unique(y, return_counts=True)
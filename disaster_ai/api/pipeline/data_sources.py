@@ -75,6 +75,14 @@ def fetch_satellite_indices(lat: float, lon: float) -> Dict[str, Any]:
     }
 
 
+# Fetchers keyed by ExternalDataSource.source_type; the scheduler runs each on its own interval
+SOURCE_FETCHERS = {
+    "weather": fetch_openweather,
+    "seismic": fetch_usgs_earthquakes,
+    "satellite": fetch_satellite_indices,
+}
+
+
 def collect_features(lat: float, lon: float) -> Dict[str, Any]:
     ow = fetch_openweather(lat, lon)
     usgs = fetch_usgs_earthquakes(lat, lon)
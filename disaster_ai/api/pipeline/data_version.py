@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .model_store import MODEL_DIR
+
+
+DEFAULT_STAMP_PATH = MODEL_DIR / "history_version.json"
+
+
+class VersionStamp:
+    """Version of a data set, shared by every worker process through a small JSON file.
+
+    bump() writes a new unique version and the time of the change; current() re-reads
+    the file only when its stat() identity (mtime, inode, size) changed, so checking the
+    version costs one stat() and no database work. Every bump replaces the file, so the
+    inode moves even when two bumps land within the filesystem's timestamp granularity.
+    Versions are nanosecond timestamps rather than counters, so two processes bumping at
+    once can never leave the same version behind for different data.
+    """
+
+    def __init__(self, path: Path = DEFAULT_STAMP_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._cached = {"stat": None, "version": "0", "modified": None}
+
+    def current(self) -> Tuple[str, Optional[float]]:
+        """(version, epoch seconds of the last change); ("0", None) before the first bump."""
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return "0", None
+        key, mtime = (st.st_mtime_ns, st.st_ino, st.st_size), st.st_mtime_ns
+        with self._lock:
+            if self._cached["stat"] != key:
+                try:
+                    data = json.loads(self.path.read_text(encoding="utf-8"))
+                    self._cached.update(version=str(data["version"]), modified=float(data["modified"]))
+                except Exception:
+                    # Half-written or corrupt: fall back to the mtime, which still moves on change
+                    self._cached.update(version=f"m{mtime:x}", modified=mtime / 1e9)
+                self._cached["stat"] = key
+            return self._cached["version"], self._cached["modified"]
+
+    def bump(self) -> str:
+        version = f"{time.time_ns():x}"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temp name: threads of one process may bump at the same time
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": version, "modified": time.time()}, f)
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        return version
+
+
+def _from_settings() -> VersionStamp:
+    from django.conf import settings
+
+    return VersionStamp(Path(getattr(settings, "HISTORY_VERSION_PATH", DEFAULT_STAMP_PATH)))
+
+
+history_version = _from_settings()
+
+
+def bump_history_version(sender=None, **kwargs) -> None:
+    """post_save/post_delete receiver for HistoricalDisaster. Bulk writes (bulk_create,
+    update(), raw imports) send no signals; history.import_disasters() calls this for them."""
+    history_version.bump()
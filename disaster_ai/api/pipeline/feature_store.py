@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+from .data_sources import SOURCE_FETCHERS
+from .model_store import MODEL_DIR
+from .trainer import FEATURES
+
+
+DEFAULT_STORE_DIR = MODEL_DIR / "feature_store"
+
+# Stored per row next to the features: seconds since each source's values were fetched (NaN if missing)
+FRESHNESS_COLUMNS = [f"age_{source}" for source in SOURCE_FETCHERS]
+
+
+def _slug(location: str) -> str:
+    digest = hashlib.sha1(location.encode("utf-8")).hexdigest()[:8]
+    return f"{re.sub(r'[^A-Za-z0-9]+', '_', location).strip('_')[:40]}-{digest}"
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Exclusive lock on `path` across processes, blocking until it is granted."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        yield
+    finally:
+        # Closing the descriptor drops the lock
+        os.close(fd)
+
+
+def _write_json(path: Path, payload) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class FeatureStore:
+    """Append-only time series of collected feature vectors, one directory per location.
+
+    A location's rows live in fixed-size segments. Each segment holds one memory-mapped
+    float32 .npy laid out column-major (columns x rows), so one feature over time is a
+    contiguous read, plus an int64 .npy of epoch-millisecond timestamps. manifest.json
+    lists the segments with their row count, time span and column names, and is rewritten
+    atomically after each append. Range reads skip segments outside the requested span
+    and mask the rest vectorised. Timestamps need not arrive in order, so backfills can
+    be appended too.
+
+    Several processes may append to the same location (the scheduler leader, stream
+    ingest, request workers), so appends hold an flock on the location's .lock file and
+    re-read the manifest under it. Only callers passing create=True start a new location.
+    """
+
+    def __init__(self, root: Path = DEFAULT_STORE_DIR, segment_rows: int = 4096):
+        self.root = Path(root)
+        self.segment_rows = segment_rows
+        self.columns: List[str] = list(FEATURES) + FRESHNESS_COLUMNS
+        self._lock = threading.Lock()
+        # Writable memmaps of each location's open segment: slug -> (segment name, values, ts)
+        self._open: Dict[str, Tuple[str, np.memmap, np.memmap]] = {}
+
+    # ----------------------
+    # Manifests and segments
+    # ----------------------
+    def _dir(self, location: str) -> Path:
+        return self.root / _slug(location)
+
+    @staticmethod
+    def _read_manifest(directory: Path) -> Optional[dict]:
+        path = directory / "manifest.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _new_segment(self, location: str, manifest: dict) -> dict:
+        directory = self._dir(location)
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"{len(manifest['segments']):06d}"
+        values = np.lib.format.open_memmap(
+            directory / f"{name}.values.npy", mode="w+", dtype=np.float32,
+            shape=(len(self.columns), self.segment_rows),
+        )
+        values[:] = np.nan
+        ts = np.lib.format.open_memmap(directory / f"{name}.ts.npy", mode="w+", dtype=np.int64, shape=(self.segment_rows,))
+        segment = {"name": name, "rows": 0, "ts_min": None, "ts_max": None, "columns": list(self.columns)}
+        manifest["segments"].append(segment)
+        self._open[_slug(location)] = (name, values, ts)
+        return segment
+
+    def _writable(self, location: str, manifest: dict) -> Tuple[dict, np.memmap, np.memmap]:
+        slug = _slug(location)
+        segment = manifest["segments"][-1] if manifest["segments"] else None
+        if segment is None or segment["rows"] >= self.segment_rows or segment["columns"] != self.columns:
+            segment = self._new_segment(location, manifest)
+        opened = self._open.get(slug)
+        if opened is None or opened[0] != segment["name"]:
+            directory = self._dir(location)
+            values = np.load(directory / f"{segment['name']}.values.npy", mmap_mode="r+")
+            ts = np.load(directory / f"{segment['name']}.ts.npy", mmap_mode="r+")
+            opened = (segment["name"], values, ts)
+            self._open[slug] = opened
+        return segment, opened[1], opened[2]
+
+    # ----------------------
+    # Write
+    # ----------------------
+    def append(
+        self,
+        location: str,
+        features: Dict[str, float],
+        timestamp: Optional[float] = None,
+        freshness: Optional[Dict[str, float]] = None,
+        create: bool = True,
+    ) -> bool:
+        """Record one collected vector. `freshness` maps source type to the age of its values in seconds.
+        With create=False a location the store does not hold yet is skipped; returns whether the row was written."""
+        ts_ms = int((time.time() if timestamp is None else timestamp) * 1000)
+        row = np.full(len(self.columns), np.nan, dtype=np.float32)
+        for i, name in enumerate(FEATURES):
+            value = features.get(name)
+            if value is not None:
+                row[i] = float(value)
+        for source, age in (freshness or {}).items():
+            column = f"age_{source}"
+            if column in self.columns and age is not None:
+                row[self.columns.index(column)] = float(age)
+
+        directory = self._dir(location)
+        if not create and not (directory / "manifest.json").exists():
+            return False
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock, _file_lock(directory / ".lock"):
+            # Another process may have appended since: the manifest on disk is authoritative
+            manifest = self._read_manifest(directory) or {"location": location, "segments": []}
+            segment, values, ts = self._writable(location, manifest)
+            i = segment["rows"]
+            values[:, i] = row
+            ts[i] = ts_ms
+            segment["rows"] = i + 1
+            segment["ts_min"] = ts_ms if segment["ts_min"] is None else min(segment["ts_min"], ts_ms)
+            segment["ts_max"] = ts_ms if segment["ts_max"] is None else max(segment["ts_max"], ts_ms)
+            # Data first, then the manifest that makes the row visible
+            values.flush()
+            ts.flush()
+            _write_json(directory / "manifest.json", manifest)
+        return True
+
+    # ----------------------
+    # Read
+    # ----------------------
+    def read(
+        self,
+        location: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        columns: Optional[List[str]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows of a location with start <= timestamp < end (epoch seconds), in time order.
+        Returns (timestamps in epoch ms, float32 matrix of rows x columns).
+        """
+        columns = list(columns or self.columns)
+        lo = -np.inf if start is None else start * 1000
+        hi = np.inf if end is None else end * 1000
+        directory = self._dir(location)
+        manifest = self._read_manifest(directory)
+        ts_parts, value_parts = [], []
+        for segment in (manifest or {}).get("segments", []):
+            n = segment["rows"]
+            if not n or segment["ts_max"] < lo or segment["ts_min"] >= hi:
+                continue
+            ts = np.load(directory / f"{segment['name']}.ts.npy", mmap_mode="r")[:n]
+            values = np.load(directory / f"{segment['name']}.values.npy", mmap_mode="r")
+            mask = (ts >= lo) & (ts < hi)
+            if not mask.any():
+                continue
+            index = {name: i for i, name in enumerate(segment["columns"])}
+            block = np.full((int(mask.sum()), len(columns)), np.nan, dtype=np.float32)
+            for j, name in enumerate(columns):
+                if name in index:
+                    block[:, j] = values[index[name], :n][mask]
+            ts_parts.append(np.asarray(ts[mask]))
+            value_parts.append(block)
+        if not ts_parts:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(columns)), dtype=np.float32)
+        ts_all = np.concatenate(ts_parts)
+        values_all = np.concatenate(value_parts)
+        order = np.argsort(ts_all, kind="stable")
+        return ts_all[order], values_all[order]
+
+    def latest(self, location: str, max_age: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """Newest row of a location as a dict (missing values left out), or None if there is
+        none or it is older than max_age seconds. Only the segment holding it is read."""
+        directory = self._dir(location)
+        segments = [s for s in (self._read_manifest(directory) or {}).get("segments", []) if s["rows"]]
+        if not segments:
+            return None
+        segment = max(segments, key=lambda s: s["ts_max"])
+        if max_age is not None and segment["ts_max"] < (time.time() - max_age) * 1000:
+            return None
+        n = segment["rows"]
+        ts = np.load(directory / f"{segment['name']}.ts.npy", mmap_mode="r")[:n]
+        values = np.load(directory / f"{segment['name']}.values.npy", mmap_mode="r")
+        row = values[:, int(np.argmax(ts))]
+        return {name: float(v) for name, v in zip(segment["columns"], row) if not np.isnan(v)}
+
+    def locations(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        found = []
+        for directory in sorted(self.root.iterdir()):
+            manifest = self._read_manifest(directory) if directory.is_dir() else None
+            if manifest is not None:
+                found.append(manifest["location"])
+        return found
+
+    def scan(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Tuple[str, np.ndarray, np.ndarray]]:
+        """(location, timestamps, rows) for every location with data in the range."""
+        for location in self.locations():
+            ts, values = self.read(location, start, end)
+            if len(ts):
+                yield location, ts, values
+
+    def stats(self) -> dict:
+        rows = 0
+        size = 0
+        locations = self.locations()
+        for location in locations:
+            directory = self._dir(location)
+            manifest = self._read_manifest(directory) or {"segments": []}
+            rows += sum(s["rows"] for s in manifest["segments"])
+            size += sum(p.stat().st_size for p in directory.glob("*.npy"))
+        return {"locations": len(locations), "rows": rows, "bytes": size}
+
+
+feature_store = FeatureStore()
+
+
+def record_features(
+    location: str,
+    features: Dict[str, float],
+    freshness: Optional[Dict[str, float]] = None,
+    create: bool = True,
+) -> None:
+    """Append to the shared store when PIPELINE_FEATURE_STORE is on; never raises.
+    Request paths pass create=False so arbitrary user-supplied names cannot allocate segments."""
+    from django.conf import settings
+
+    if not getattr(settings, "PIPELINE_FEATURE_STORE", True):
+        return
+    try:
+        feature_store.append(location, features, freshness=freshness, create=create)
+    except Exception:
+        # Recording is best-effort; scoring must not depend on it
+        pass
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import math
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Geohash precision stored on rows (cells of about 5 x 5 m)
+GEOHASH_PRECISION = 9
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# (min_lat, min_lon, max_lat, max_lon)
+BBox = Tuple[float, float, float, float]
+
+
+def encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[bits])
+            bits = bit = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) in degrees of a geohash cell."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def coordinates_of(value) -> Tuple[Optional[float], Optional[float]]:
+    """(lat, lon) from a coordinates JSON value ({lat, lon}, {latitude, longitude}, {lat, lng} or [lat, lon])."""
+    try:
+        if isinstance(value, dict):
+            lat = value.get("lat", value.get("latitude"))
+            lon = value.get("lon", value.get("lng", value.get("longitude")))
+        elif isinstance(value, (list, tuple)) and len(value) == 2:
+            lat, lon = value
+        else:
+            return None, None
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None, None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None, None
+    return lat, lon
+
+
+def bbox_around(lat: float, lon: float, radius_km: float) -> List[BBox]:
+    """Boxes covering the circle: one, or two when it crosses the antimeridian."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    # Longitude degrees shrink towards the poles; a circle around a pole spans every longitude
+    cos_lat = math.cos(math.radians(lat))
+    if min_lat <= -90.0 or max_lat >= 90.0 or cos_lat < 1e-6 or dlat / cos_lat >= 180.0:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    dlon = dlat / cos_lat
+    west, east = lon - dlon, lon + dlon
+    if west < -180.0:
+        return [(min_lat, west + 360.0, max_lat, 180.0), (min_lat, -180.0, max_lat, east)]
+    if east > 180.0:
+        return [(min_lat, west, max_lat, 180.0), (min_lat, -180.0, max_lat, east - 360.0)]
+    return [(min_lat, west, max_lat, east)]
+
+
+def cover(bbox: BBox, max_cells: int = 32) -> List[str]:
+    """Geohash prefixes whose cells together cover the box, at the finest precision that
+    needs at most max_cells of them."""
+    min_lat, min_lon, max_lat, max_lon = bbox
+    precision = 1
+    for p in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(p)
+        cells = (math.floor(max_lat / height) - math.floor(min_lat / height) + 1) * (
+            math.floor(max_lon / width) - math.floor(min_lon / width) + 1
+        )
+        if cells <= max_cells:
+            precision = p
+            break
+    height, width = cell_size(precision)
+    prefixes = set()
+    lat = min_lat
+    while True:
+        lon = min_lon
+        while True:
+            prefixes.add(encode(lat, lon, precision))
+            if lon >= max_lon:
+                break
+            lon = min(max_lon, lon + width)
+        if lat >= max_lat:
+            break
+        lat = min(max_lat, lat + height)
+    return sorted(prefixes)
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+# ----------------------
+# Queries on HistoricalDisaster
+# ----------------------
+def _candidates(queryset, boxes: Sequence[BBox]):
+    """Rows in the geohash cells covering the boxes, then inside one of the boxes itself.
+    Prefixes become range conditions, which the geohash index serves (LIKE would not on SQLite)."""
+    from django.db.models import Q
+
+    cells, inside = Q(), Q()
+    for bbox in boxes:
+        for prefix in cover(bbox):
+            cells |= Q(geohash__gte=prefix, geohash__lt=prefix + "~")
+        min_lat, min_lon, max_lat, max_lon = bbox
+        inside |= Q(lat__gte=min_lat, lat__lte=max_lat, lon__gte=min_lon, lon__lte=max_lon)
+    return queryset.filter(cells, inside)
+
+
+def within_bbox(queryset, bbox: BBox, fields: Sequence[str], limit: int = 1000) -> List[dict]:
+    """Rows inside the box, newest first. Callers bound the box size (HISTORICAL_MAX_BBOX_DEGREES):
+    the cell ranges are the access path and the candidates are sorted before the limit applies."""
+    return list(_candidates(queryset, [bbox]).order_by("-date", "-id").values(*fields)[:limit])
+
+
+def within_radius(queryset, lat: float, lon: float, radius_km: float, fields: Sequence[str], limit: int = 1000) -> List[dict]:
+    """Rows within radius_km of (lat, lon), nearest first, each with distance_km.
+    Candidates come from the covering cells; exact haversine distances are computed for
+    all of them at once."""
+    # No ordering: the model's default (-date) would make SQLite walk the date index instead
+    candidates = _candidates(queryset, bbox_around(lat, lon, radius_km)).order_by()
+    rows = list(candidates.values(*fields, "lat", "lon"))
+    if not rows:
+        return []
+    distances = haversine_km(
+        lat, lon,
+        np.fromiter((r["lat"] for r in rows), dtype=np.float64, count=len(rows)),
+        np.fromiter((r["lon"] for r in rows), dtype=np.float64, count=len(rows)),
+    )
+    inside = np.flatnonzero(distances <= radius_km)
+    nearest = inside[np.argsort(distances[inside], kind="stable")][:limit]
+    helpers = {"lat", "lon"} - set(fields)
+    return [
+        {**{k: v for k, v in rows[i].items() if k not in helpers}, "distance_km": round(float(distances[i]), 3)}
+        for i in nearest
+    ]
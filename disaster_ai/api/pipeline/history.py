@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import base64
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+# Fields of HistoricalDisaster exposed by the historical endpoints, in response order
+HISTORY_FIELDS = (
+    "id", "type", "subtype", "state", "district", "city", "date", "severity",
+    "casualties", "damage_estimate", "coordinates", "source", "created_at",
+)
+
+# Export formats and their content types
+EXPORT_FORMATS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Always read: the pagination key
+_KEY_FIELDS = ("date", "id")
+
+
+def parse_fields(raw: Optional[str]) -> Tuple[str, ...]:
+    """Requested projection from a comma-separated ?fields= value; all fields when empty.
+    id and date are always included since the cursor is built from them."""
+    if not raw:
+        return HISTORY_FIELDS
+    wanted = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = wanted - set(HISTORY_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(f for f in HISTORY_FIELDS if f in wanted or f in _KEY_FIELDS)
+
+
+def encode_cursor(day: date, pk: int) -> str:
+    return base64.urlsafe_b64encode(f"{day.isoformat()}|{pk}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[date, int]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        day, pk = raw.split("|")
+        return date.fromisoformat(day), int(pk)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def serialize_row(row: dict) -> dict:
+    """JSON-ready copy of a .values() row, with the types the endpoints have always returned."""
+    out = {}
+    for key, value in row.items():
+        if isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = float(value)
+        out[key] = value
+    return out
+
+
+def ordered(queryset, fields: Sequence[str] = HISTORY_FIELDS):
+    """Newest first on (date, id), projected to plain dicts."""
+    return queryset.order_by("-date", "-id").values(*fields)
+
+
+def history_page(queryset, cursor: Optional[str], limit: int, fields: Sequence[str] = HISTORY_FIELDS) -> Tuple[List[dict], Optional[str]]:
+    """One page of rows after `cursor`, newest first, and the cursor of the next page (None at the end).
+
+    Keyset pagination: the page starts strictly below the (date, id) the cursor encodes, so
+    every page is an index range scan no matter how deep, and rows inserted meanwhile do not
+    shift the pages already handed out.
+    """
+    from django.db.models import Q
+
+    if cursor:
+        day, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(date__lt=day) | Q(date=day, id__lt=pk))
+    rows = list(ordered(queryset, fields)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["date"], rows[-1]["id"])
+    return [serialize_row(r) for r in rows], next_cursor
+
+
+def _buffered(pieces: Iterable[str], size: int = 64 * 1024) -> Iterator[str]:
+    """Join small pieces into writes of roughly `size` characters."""
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _csv_lines(rows: Iterable[dict], fields: Sequence[str]) -> Iterator[str]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def line(values) -> str:
+        writer.writerow(values)
+        text = out.getvalue()
+        out.seek(0)
+        out.truncate()
+        return text
+
+    yield line(fields)
+    for row in rows:
+        yield line([json.dumps(v) if isinstance(v, (dict, list)) else ("" if v is None else v) for v in row.values()])
+
+
+def export_rows(queryset, fmt: str, fields: Sequence[str] = HISTORY_FIELDS, chunk_size: int = 2000) -> Iterator[str]:
+    """The whole queryset, newest first, as text chunks of a JSON array, NDJSON or CSV.
+    Rows come from a server-side cursor in `chunk_size` batches, so memory use does not
+    grow with the table."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    rows = (serialize_row(r) for r in ordered(queryset, fields).iterator(chunk_size=chunk_size))
+    if fmt == "csv":
+        pieces = _csv_lines(rows, fields)
+    elif fmt == "ndjson":
+        pieces = (json.dumps(r, ensure_ascii=False) + "\n" for r in rows)
+    else:
+        def array():
+            yield "["
+            for i, row in enumerate(rows):
+                yield ("," if i else "") + json.dumps(row, ensure_ascii=False)
+            yield "]"
+        pieces = array()
+    return _buffered(pieces)
+
+
+def gzip_chunks(chunks: Iterable[str]) -> Iterator[bytes]:
+    """Compress a text stream incrementally into one gzip member."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def import_disasters(rows: List, batch_size: int = 1000) -> int:
+    """Bulk-insert unsaved HistoricalDisaster instances, keeping what save() and its signals
+    would maintain: derived columns, the monthly rollups and the data version behind the caches."""
+    from django.db import transaction
+    from ..models import HistoricalDisaster
+    from .data_version import bump_history_version
+    from .rollups import apply_rows
+
+    for row in rows:
+        row.fill_derived()
+    with transaction.atomic():
+        HistoricalDisaster.objects.bulk_create(rows, batch_size=batch_size)
+        apply_rows(rows)
+    bump_history_version()
+    return len(rows)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from django.conf import settings
+from django.db.models import Q
+
+from .partition import default_node_id
+
+
+def enable_sqlite_wal(sender, connection, **kwargs) -> None:
+    """connection_created hook: WAL lets workers read the live feed while another one writes."""
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+
+
+class SharedEventLog:
+    """Live feed history in the LiveFeedEvent table, shared by every worker process.
+
+    The autoincrement primary key is the sequence number, so readers in any process ask
+    for everything after a sequence number they have seen and get one consistent order.
+    Rows beyond the newest `history_size` are trimmed on append. wait() polls the table
+    every `poll_interval` seconds, and wakes immediately for appends made in this process.
+    """
+
+    def __init__(self, history_size: int = 50, poll_interval: float = 1.0):
+        self.history_size = max(1, history_size)
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def _events(rows) -> List[dict]:
+        return [{**payload, "seq": seq} for seq, payload in rows]
+
+    @property
+    def last_seq(self) -> int:
+        from ..models import LiveFeedEvent
+
+        return LiveFeedEvent.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+    def __len__(self) -> int:
+        from ..models import LiveFeedEvent
+
+        return LiveFeedEvent.objects.count()
+
+    def append(self, event: dict) -> int:
+        from ..models import LiveFeedEvent
+
+        seq = LiveFeedEvent.objects.create(payload=event).id
+        LiveFeedEvent.objects.filter(id__lte=seq - self.history_size).delete()
+        with self._cond:
+            self._cond.notify_all()
+        return seq
+
+    def since(self, seq: int, limit: Optional[int] = None) -> List[dict]:
+        """Events with a sequence number above `seq`, oldest first."""
+        from ..models import LiveFeedEvent
+
+        rows = LiveFeedEvent.objects.filter(id__gt=seq).order_by("id").values_list("id", "payload")
+        return self._events(rows[:limit] if limit else rows)
+
+    def latest(self, n: int) -> List[dict]:
+        from ..models import LiveFeedEvent
+
+        if n <= 0:
+            return []
+        rows = LiveFeedEvent.objects.order_by("-id").values_list("id", "payload")[:n]
+        return self._events(reversed(list(rows)))
+
+    def wait(self, seq: int, timeout: float) -> bool:
+        """Block until an event newer than `seq` exists; False on timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.last_seq > seq:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            with self._cond:
+                self._cond.wait(min(self.poll_interval, remaining))
+
+
+class LiveFeedControl:
+    """Run state of the live feed in the single LiveFeedState row.
+
+    claim() flips the feed on and hands out a token, unless a feed is already running
+    under a live lease. The runner renews the lease while it keeps going. stop() from any
+    worker clears `running`, and the runner sees that on its next check. A runner that
+    dies lets its lease lapse, so a later start elsewhere takes over.
+    """
+
+    def __init__(self, lease_seconds: float = 60, check_interval: float = 2.0):
+        self.lease_seconds = lease_seconds
+        self.check_interval = check_interval
+        self.node_id = f"{default_node_id()}:{os.getpid()}"
+        self._row_ready = False
+
+    def _state(self):
+        from ..models import LiveFeedState
+
+        if not self._row_ready:
+            LiveFeedState.objects.get_or_create(pk=1)
+            self._row_ready = True
+        return LiveFeedState.objects.filter(pk=1)
+
+    def claim(self) -> Optional[str]:
+        """Start the feed; returns the runner token, or None if it is already running."""
+        now = datetime.now(timezone.utc)
+        token = f"{self.node_id}:{uuid.uuid4().hex[:8]}"
+        claimed = self._state().filter(
+            Q(running=False) | Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now)
+        ).update(running=True, owner=token, started_at=now, lease_expires_at=now + timedelta(seconds=self.lease_seconds))
+        return token if claimed else None
+
+    def keep_running(self, token: str) -> bool:
+        """Renew the runner lease; False once the feed was stopped or taken over."""
+        now = datetime.now(timezone.utc)
+        return bool(self._state().filter(running=True, owner=token).update(
+            lease_expires_at=now + timedelta(seconds=self.lease_seconds)
+        ))
+
+    def sleep(self, token: str, seconds: float) -> bool:
+        """Sleep between feed updates, returning early with False if the feed was stopped."""
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            time.sleep(min(self.check_interval, max(0.0, deadline - time.monotonic())))
+            if not self.keep_running(token):
+                return False
+        return True
+
+    def release(self, token: str) -> None:
+        self._state().filter(owner=token).update(owner="", lease_expires_at=None)
+
+    def stop(self) -> None:
+        self._state().update(running=False)
+
+    def is_running(self) -> bool:
+        now = datetime.now(timezone.utc)
+        return self._state().filter(running=True, lease_expires_at__gt=now).exists()
+
+
+live_events = SharedEventLog(
+    int(getattr(settings, "LIVE_FEED_HISTORY_SIZE", 50)),
+    poll_interval=float(getattr(settings, "LIVE_FEED_POLL_SECONDS", 1.0)),
+)
+live_feed_control = LiveFeedControl(lease_seconds=float(getattr(settings, "LIVE_FEED_LEASE_SECONDS", 60)))
@@ -1,5 +1,7 @@
 import os
 import json
+import tempfile
+import threading
 from pathlib import Path
 
 try:
@@ -13,16 +15,34 @@ MODEL_DIR = BASE_DIR / "models"
 MODEL_DIR.mkdir(parents=True, exist_ok=True)
 MODEL_PATH = MODEL_DIR / "disaster_risk_model.pkl"
 META_PATH = MODEL_DIR / "model_meta.json"
+SEARCH_RESULTS_PATH = MODEL_DIR / "search_results.json"
+
+
+def _replace_atomically(path: Path, write) -> None:
+    """Write through `write(file)` to a uniquely named temp file beside `path`, then swap it in,
+    so readers in other processes never load a half-written file."""
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
 
 
 def save_model(model, meta: dict | None = None) -> None:
     if joblib is not None:
-        joblib.dump(model, MODEL_PATH)
+        _replace_atomically(MODEL_PATH, lambda f: joblib.dump(model, f))
     else:
-        with open(MODEL_PATH, "wb") as f:
-            pickle.dump(model, f)
+        _replace_atomically(MODEL_PATH, lambda f: pickle.dump(model, f))
+    # Metadata last: once it names the new model, the model file is already in place
     if meta is not None:
-        META_PATH.write_text(json.dumps(meta, indent=2))
+        _replace_atomically(META_PATH, lambda f: f.write(json.dumps(meta, indent=2).encode()))
 
 
 def load_model():
@@ -37,6 +57,25 @@ def load_model():
         return pickle.load(f)
 
 
+_cache_lock = threading.Lock()
+_cached = {"mtime": None, "model": None}
+
+
+def get_model():
+    """Return the persisted model, reloading only when the file on disk changed.
+    Lets long-running loops pick up a newly trained model (hot swap) without restarting.
+    """
+    try:
+        mtime = MODEL_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _cache_lock:
+        if _cached["mtime"] != mtime:
+            _cached["model"] = load_model()
+            _cached["mtime"] = mtime
+        return _cached["model"]
+
+
 def load_meta() -> dict:
     if META_PATH.exists():
         try:
@@ -44,3 +83,65 @@ def load_meta() -> dict:
         except Exception:
             return {}
     return {}
+
+
+_version_cached = {"key": None, "version": "heuristic"}
+
+
+def model_version() -> str:
+    """Short identifier of the persisted model (its training time), or "heuristic" without one.
+    The metadata file is only re-read when the model or metadata on disk changed.
+    """
+    try:
+        key = (MODEL_PATH.stat().st_mtime_ns, META_PATH.stat().st_mtime_ns if META_PATH.exists() else None)
+    except FileNotFoundError:
+        return "heuristic"
+    with _cache_lock:
+        if _version_cached["key"] != key:
+            _version_cached["version"] = str(load_meta().get("trained_at") or "heuristic")[:19]
+            _version_cached["key"] = key
+        return _version_cached["version"]
+
+
+def save_search_results(results: dict) -> None:
+    SEARCH_RESULTS_PATH.write_text(json.dumps(results, indent=2))
+
+
+def load_best_params() -> dict:
+    """Best hyperparameters from the last search, or {} if none was run."""
+    if SEARCH_RESULTS_PATH.exists():
+        try:
+            return dict(json.loads(SEARCH_RESULTS_PATH.read_text()).get("best_params") or {})
+        except Exception:
+            return {}
+    return {}
+
+
+CHECKPOINT_DIR = MODEL_DIR / "checkpoints"
+STREAMING_CHECKPOINT_PATH = CHECKPOINT_DIR / "streaming_train.pkl"
+
+
+def save_checkpoint(state: dict, path: Path = STREAMING_CHECKPOINT_PATH) -> None:
+    """Atomically persist training progress so an interrupted run can resume."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: Path = STREAMING_CHECKPOINT_PATH) -> dict | None:
+    if not path.exists():
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def clear_checkpoint(path: Path = STREAMING_CHECKPOINT_PATH) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes.
+    When a node joins or leaves, only the keys on its arcs change owner (~1/N of them).
+    """
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = 64):
+        self.nodes = sorted(set(nodes))
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._owners = [n for _, n in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        idx = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[idx]
+
+
+def default_node_id() -> str:
+    return socket.gethostname()
+
+
+class ClusterMembership:
+    """This node's lease in PipelineNode plus the current ring of live members.
+    A node that stops heartbeating drops out once its lease expires and its
+    locations move to the remaining nodes.
+    """
+
+    def __init__(self, node_id: str, lease_seconds: float = 30, vnodes: int = 64):
+        self.node_id = node_id
+        self.lease_seconds = lease_seconds
+        self.vnodes = vnodes
+        self.ring = HashRing([node_id], vnodes)
+
+    def heartbeat(self) -> bool:
+        """Renew the lease and refresh membership; returns True if the member set changed."""
+        from ..models import PipelineNode
+
+        now = datetime.now(timezone.utc)
+        PipelineNode.objects.update_or_create(
+            node_id=self.node_id,
+            defaults={
+                "hostname": socket.gethostname(),
+                "heartbeat_at": now,
+                "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+            },
+        )
+        live = list(PipelineNode.objects.filter(lease_expires_at__gt=now).values_list("node_id", flat=True))
+        if self.node_id not in live:
+            live.append(self.node_id)
+        changed = sorted(set(live)) != self.ring.nodes
+        if changed:
+            self.ring = HashRing(live, self.vnodes)
+        return changed
+
+    def leave(self) -> None:
+        from ..models import PipelineNode
+
+        PipelineNode.objects.filter(node_id=self.node_id).delete()
+
+    def owns(self, key: str) -> bool:
+        return self.ring.owner(key) == self.node_id
+
+    def members(self) -> List[str]:
+        return list(self.ring.nodes)
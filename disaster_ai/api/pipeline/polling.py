@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict
+
+import numpy as np
+
+from .trainer import DISASTER_CLASSES
+
+
+_NONE_IDX = DISASTER_CLASSES.index("none")
+
+
+class AdaptivePollingPolicy:
+    """Per-location polling multiplier driven by the latest class probabilities.
+
+    Risk is the highest non-"none" probability. A location within `margin` of the alert
+    threshold, or whose risk rose by at least `rise` since the previous score, is polled
+    at min_interval, or at its source's base interval if that is already shorter. A
+    moderate-risk location runs at the base interval. Only a calm, stable location is
+    polled less often: it backs off geometrically by `backoff` per observation up to
+    max_interval.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        min_interval: float = 300,
+        max_interval: float = 21600,
+        margin: float = 0.15,
+        rise: float = 0.05,
+        backoff: float = 2.0,
+    ):
+        self.threshold = threshold
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.margin = margin
+        self.rise = rise
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._risk: Dict[str, float] = {}
+        self._multiplier: Dict[str, float] = {}  # 0.0 means "poll at min_interval"
+
+    def observe(self, location: str, proba) -> bool:
+        """Record a new score; returns True if the location should be polled sooner."""
+        proba = np.asarray(proba, dtype=float)
+        risk = float(np.delete(proba, _NONE_IDX).max()) if len(proba) > 1 else 0.0
+        with self._lock:
+            prev_risk = self._risk.get(location)
+            prev_mult = self._multiplier.get(location, 1.0)
+            self._risk[location] = risk
+            rising = prev_risk is not None and risk - prev_risk >= self.rise
+            if risk >= self.threshold - self.margin or rising:
+                mult = 0.0
+            elif risk >= self.threshold / 2:
+                mult = 1.0
+            else:
+                # Capped where any base interval would already be clamped to max_interval
+                mult = min(max(prev_mult, 1.0) * self.backoff, self.max_interval / max(self.min_interval, 1.0))
+            self._multiplier[location] = mult
+            return mult < prev_mult
+
+    def interval_for(self, location: str, base_interval: float) -> float:
+        with self._lock:
+            mult = self._multiplier.get(location, 1.0)
+        if mult == 0.0:
+            return float(min(self.min_interval, base_interval))
+        if mult <= 1.0:
+            return float(base_interval)
+        return float(min(self.max_interval, max(self.min_interval, base_interval * mult)))
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                loc: {"risk": round(self._risk[loc], 4), "multiplier": self._multiplier.get(loc, 1.0)}
+                for loc in self._risk
+            }
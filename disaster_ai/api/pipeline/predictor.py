@@ -1,15 +1,17 @@
 from __future__ import annotations
 
-import json
 import threading
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 import numpy as np
 
-from .model_store import load_model, load_meta
-from .trainer import FEATURES, DISASTER_CLASSES
+from .model_store import get_model, load_meta
+from .trainer import FEATURES, DISASTER_CLASSES, RuleBasedModel
+from .alerts import get_dispatcher
 from .data_sources import collect_features
+from .feature_store import record_features
+from .suppression import alert_events, get_suppressor
 
 
 # Default monitoring locations: (name, lat, lon)
@@ -21,6 +23,86 @@ DEFAULT_LOCATIONS = [
     ("Santiago, Chile", -33.4489, -70.6693),
 ]
 
+# Places predict_disaster can resolve by name, in addition to the monitored ones: name -> (lat, lon)
+KNOWN_LOCATIONS = {name: (lat, lon) for name, lat, lon in DEFAULT_LOCATIONS}
+KNOWN_LOCATIONS.update({
+    "Mumbai, India": (19.0760, 72.8777),
+    "Chennai, India": (13.0827, 80.2707),
+    "Kolkata, India": (22.5726, 88.3639),
+    "Bangalore, India": (12.9716, 77.5946),
+    "Ahmedabad, India": (23.0225, 72.5714),
+    "Hyderabad, India": (17.3850, 78.4867),
+    "Pune, India": (18.5204, 73.8567),
+})
+
+
+def resolve_coordinates(name: str) -> Tuple[float, float] | None:
+    """Coordinates of a known place, matched on the full name or the part before the comma."""
+    if name in KNOWN_LOCATIONS:
+        return KNOWN_LOCATIONS[name]
+    city = name.split(",")[0].strip().lower()
+    for known, coords in KNOWN_LOCATIONS.items():
+        if known.split(",")[0].strip().lower() == city:
+            return coords
+    return None
+
+
+def parse_location(data: dict) -> Tuple[str, float | None, float | None]:
+    """(name, lat, lon) from a request item whose location is a name or
+    {city, state, coordinates: {lat, lon}}; top-level lat/lon also count."""
+    location = data.get("location", "Unknown Location")
+    if isinstance(location, dict):
+        name = location.get("city") or location.get("district") or location.get("state") or "Unknown"
+        coords = location.get("coordinates") or {}
+    else:
+        name = str(location)
+        coords = {}
+    lat = coords.get("lat", data.get("lat"))
+    lon = coords.get("lon", data.get("lon"))
+    return name, float(lat) if lat is not None else None, float(lon) if lon is not None else None
+
+
+def feature_overrides(data: dict) -> Dict[str, float]:
+    """Feature values supplied with a request item: under weather_data, features, or flat."""
+    supplied = {**(data.get("weather_data") or {}), **(data.get("features") or {})}
+    for name in FEATURES:
+        if name in data:
+            supplied[name] = data[name]
+    return supplied
+
+
+def features_for_location(
+    name: str,
+    lat: float | None = None,
+    lon: float | None = None,
+    overrides: Dict[str, float] | None = None,
+    max_age: float = 3600,
+) -> Tuple[Dict[str, float], str]:
+    """Feature dict for an on-demand prediction and where it came from.
+    Prefers the feature store's latest row for the location when it is younger than max_age,
+    then a live fetch (recorded to the store when ingest already tracks the location, so
+    repeat requests are served locally).
+    Request-supplied values for known FEATURES override either.
+    """
+    from .feature_store import feature_store
+
+    stored = feature_store.latest(name, max_age=max_age)
+    if stored is not None:
+        feats, source = {k: v for k, v in stored.items() if k in FEATURES}, "feature_store"
+    else:
+        coords = (lat, lon) if lat is not None and lon is not None else resolve_coordinates(name)
+        if coords is not None:
+            feats, source = collect_features(*coords), "live"
+            record_features(name, feats, create=False)
+        else:
+            feats, source = {}, "defaults"
+    if overrides:
+        supplied = {k: overrides[k] for k in FEATURES if overrides.get(k) is not None}
+        if supplied:
+            feats = {**feats, **supplied}
+            source += "+request"
+    return feats, source
+
 
 def to_feature_vector(feature_dict: Dict[str, float]) -> List[float]:
     return [float(feature_dict.get(k, 0.0) or 0.0) for k in FEATURES]
@@ -36,47 +118,104 @@ def risk_level_from_prob(prob: float) -> str:
     return "Low"
 
 
-def predict_for_location(model, name: str, lat: float, lon: float, threshold: float = 0.7):
-    feats = collect_features(lat, lon)
-    x = np.array([to_feature_vector(feats)])
+# DisasterPrediction.model_used label per persisted estimator class
+MODEL_LABELS = {
+    "RandomForestClassifier": "random_forest",
+    "ExtraTreesClassifier": "random_forest",
+    "XGBClassifier": "xgboost",
+}
+
+
+def model_label(model) -> str:
+    return MODEL_LABELS.get(type(model).__name__, "ensemble")
 
+
+def severity_from_prob(prob: float) -> str:
+    """DisasterPrediction.severity for a class probability."""
+    if prob > 0.7:
+        return "high"
+    if prob > 0.4:
+        return "medium"
+    return "low"
+
+
+def predict_proba_matrix(model, X: np.ndarray) -> np.ndarray:
+    """Class probabilities for a batch of feature vectors, one row per vector."""
     # Support models without predict_proba
     if hasattr(model, "predict_proba"):
-        proba = model.predict_proba(x)[0]
-    else:
-        # softmax on decision function if available else dummy
-        pred_idx = int(getattr(model, "predict", lambda X: [0])(x)[0])
-        proba = np.zeros(len(DISASTER_CLASSES))
-        proba[pred_idx] = 1.0
+        return np.asarray(model.predict_proba(X))
+    # one-hot of the predicted class
+    idx = np.asarray(getattr(model, "predict", lambda X: [0] * len(X))(X), dtype=int)
+    proba = np.zeros((len(X), len(DISASTER_CLASSES)))
+    proba[np.arange(len(X)), idx] = 1.0
+    return proba
+
+
+def predict_proba_row(model, feature_dict: Dict[str, float]) -> np.ndarray:
+    return predict_proba_matrix(model, np.array([to_feature_vector(feature_dict)]))[0]
 
+
+def alert_from_proba(name: str, proba, threshold: float = 0.7) -> dict | None:
     best_idx = int(np.argmax(proba))
     best_class = DISASTER_CLASSES[best_idx]
     best_prob = float(proba[best_idx])
 
     if best_class != "none" and best_prob >= threshold:
-        out = {
+        return {
             "location": name,
             "disaster": best_class.capitalize(),
             "risk_level": risk_level_from_prob(best_prob),
             "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
             "accuracy": round(best_prob, 4),
         }
-        print(json.dumps(out, ensure_ascii=False))
+    return None
 
 
-def run_predictions(locations=None, threshold: float = 0.7):
-    model = load_model()
+def score_location(model, name: str, feature_dict: Dict[str, float], threshold: float = 0.7) -> np.ndarray:
+    """Score already-collected features for one location, emit an alert if above threshold,
+    and return the class probabilities.
+    """
+    proba = predict_proba_row(model, feature_dict)
+    out = alert_from_proba(name, proba, threshold)
+    events = alert_events(get_suppressor(), name, out)
+    if events:
+        get_dispatcher().publish_many(events)
+    return proba
+
+
+def predict_for_location(model, name: str, lat: float, lon: float, threshold: float = 0.7):
+    feats = collect_features(lat, lon)
+    record_features(name, feats)
+    return score_location(model, name, feats, threshold=threshold)
+
+
+def current_model():
+    """The persisted model, or the heuristic fallback while bootstrap training runs."""
+    model = get_model()
     if model is None:
-        # Train quickly on the fly if no model present
+        # Bootstrap training runs out of process; serve heuristics until it lands
         try:
-            from .trainer import train_and_save
-            train_and_save(n_per_class=500)
-            model = load_model()
+            from .bootstrap import bootstrap
+            bootstrap.ensure_started(n_per_class=500)
         except Exception:
-            return
+            pass
+        model = RuleBasedModel()
+    return model
+
+
+def run_predictions(locations=None, threshold: float = 0.7):
+    """Score a batch of locations through the staged streaming pipeline; returns its stats."""
+    from .stream import StreamingPipeline
+
+    model = current_model()
 
     if locations is None:
         locations = DEFAULT_LOCATIONS
 
-    for name, lat, lon in locations:
-        predict_for_location(model, name, lat, lon, threshold=threshold)
+    pipeline = StreamingPipeline(lambda: model, threshold=threshold, suppressor=get_suppressor()).start()
+    try:
+        for name, lat, lon in locations:
+            pipeline.submit_location(name, lat, lon)
+    finally:
+        pipeline.close()
+    return pipeline.stats()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class ResponseCache:
+    """In-process LRU of response payloads with a TTL, bound to one model version.
+
+    Keys are built by the caller from normalised request fields (or the request path). Entries expire
+    `ttl_seconds` after they were stored, and the least recently used one is evicted
+    beyond `max_entries`. Passing a different model version to get() or put() empties
+    the cache, so a promoted model never serves answers computed by the previous one.
+    """
+
+    def __init__(self, ttl_seconds: float = 900, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        return json.dumps(parts, sort_keys=True, default=str)
+
+    def _check_version(self, version: str) -> None:
+        if version != self._version:
+            if self._entries:
+                self._counters["invalidations"] += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: str, version: str) -> Optional[Tuple[Any, float]]:
+        """(payload, age in seconds) or None."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            stored_at, payload = entry
+            if now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._counters["expired"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return payload, now - stored_at
+
+    def put(self, key: str, version: str, payload: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_ratio": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "version": self._version,
+        }
+
+
+def _from_settings(prefix: str, ttl_seconds: float, max_entries: int) -> ResponseCache:
+    from django.conf import settings
+
+    return ResponseCache(
+        ttl_seconds=float(getattr(settings, f"{prefix}_TTL_SECONDS", ttl_seconds)),
+        max_entries=int(getattr(settings, f"{prefix}_MAX_ENTRIES", max_entries)),
+    )
+
+
+prediction_cache = _from_settings("PREDICTION_CACHE", 900, 1024)
+# Serialized historical/trends payloads; the data version invalidates them, the TTL only bounds memory
+history_cache = _from_settings("HISTORY_CACHE", 86400, 256)
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .model_store import MODEL_DIR
+from .trainer import DISASTER_CLASSES
+
+
+DEFAULT_INDEX_PATH = MODEL_DIR / "risk_index.npz"
+
+RISK_TYPES = [c for c in DISASTER_CLASSES if c != "none"]
+
+# (arrays, key -> row, raw name -> row memo): replaced as a whole, never mutated in place
+# apart from the memo, so a reader always sees one consistent index
+Snapshot = Tuple[Dict[str, np.ndarray], Dict[str, int], Dict[str, int]]
+
+# Weight of one historical event by severity
+SEVERITY_WEIGHT = {"low": 1.0, "medium": 2.0, "high": 3.0, "critical": 4.0}
+
+
+def location_key(location) -> str:
+    """Lookup key of a location: the district (or city, or first part of a name), case-folded."""
+    if isinstance(location, dict):
+        location = location.get("district") or location.get("city") or location.get("name") or location.get("state") or ""
+    name = str(location or "").split(",")[0]
+    return " ".join(name.split()).casefold()
+
+
+class RiskIndex:
+    """Precomputed risk per district, kept as sorted numpy arrays and shared through an .npz file.
+
+    For each key the index holds the event count and severity-weighted event total from
+    HistoricalDisaster, and the latest model probability per disaster type from
+    DisasterPrediction. refresh() only reads rows above the id watermarks of the last
+    refresh; when historical rows disappeared, or a saved row changed its district or
+    severity (invalidate(), from post_save), it rebuilds. QuerySet.update() sends no
+    signals, so rows edited that way only reach the index with refresh(full=True). Scores are computed once per
+    refresh: the historical component saturates as 1 - exp(-weighted / history_scale),
+    the model component is the highest latest probability, and the combined score is
+    their weighted mean over the components a key has. assess() resolves names through
+    a key -> row dict (memoising the raw names it has seen, as normalising costs more than
+    the lookup) and gathers every column with one index array.
+
+    assess() never builds: refresh() runs in the background on the scheduler leader (every
+    refresh_interval and after the history data version moves) or through the
+    refresh_risk_index command, and request workers pick up the saved file by its mtime.
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_INDEX_PATH,
+        history_weight: float = 0.4,
+        model_weight: float = 0.6,
+        history_scale: float = 10.0,
+        refresh_interval: float = 60.0,
+    ):
+        self.path = Path(path)
+        self.history_weight = history_weight
+        self.model_weight = model_weight
+        self.history_scale = history_scale
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._snapshot: Snapshot = self._build_snapshot(self._empty())
+
+    @property
+    def stale_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.stale")
+
+    def invalidate(self) -> None:
+        """Make the next refresh, in whichever process runs it, a full rebuild."""
+        self.stale_path.parent.mkdir(parents=True, exist_ok=True)
+        self.stale_path.touch()
+
+    @staticmethod
+    def _empty() -> Dict[str, np.ndarray]:
+        return {
+            "keys": np.array([], dtype="<U64"),
+            "events": np.zeros(0, dtype=np.int32),
+            "weighted": np.zeros(0, dtype=np.float32),
+            "model": np.zeros((0, len(RISK_TYPES)), dtype=np.float32),
+            "history_score": np.zeros(0, dtype=np.float32),
+            "model_score": np.zeros(0, dtype=np.float32),
+            "score": np.zeros(0, dtype=np.float32),
+            "watermarks": np.zeros(3, dtype=np.int64),  # last history id, last prediction id, history rows
+        }
+
+    @staticmethod
+    def _empty_row() -> Dict[str, np.ndarray]:
+        """A single all-missing row, so lookups against an empty index still gather."""
+        return {
+            "events": np.zeros(1, dtype=np.int32),
+            "model": np.full((1, len(RISK_TYPES)), np.nan, dtype=np.float32),
+            "history_score": np.full(1, np.nan, dtype=np.float32),
+            "model_score": np.full(1, np.nan, dtype=np.float32),
+            "score": np.full(1, np.nan, dtype=np.float32),
+        }
+
+    @staticmethod
+    def _build_snapshot(arrays: Dict[str, np.ndarray]) -> Snapshot:
+        return arrays, {key: i for i, key in enumerate(arrays["keys"].tolist())}, {}
+
+    # ----------------------
+    # Build
+    # ----------------------
+    def _score(self, arrays: Dict[str, np.ndarray]) -> None:
+        history = 1.0 - np.exp(-arrays["weighted"] / self.history_scale)
+        history[arrays["events"] == 0] = np.nan
+        model = arrays["model"]
+        has_model = ~np.isnan(model).all(axis=1)
+        model_score = np.full(len(model), np.nan, dtype=np.float32)
+        model_score[has_model] = np.nanmax(model[has_model], axis=1)
+        parts = np.stack([history, model_score])
+        weights = np.array([[self.history_weight], [self.model_weight]], dtype=np.float32) * ~np.isnan(parts)
+        total = weights.sum(axis=0)
+        score = np.where(total > 0, np.nansum(parts * weights, axis=0) / np.where(total > 0, total, 1), np.nan)
+        arrays["history_score"] = history.astype(np.float32)
+        arrays["model_score"] = model_score
+        arrays["score"] = score.astype(np.float32)
+
+    def refresh(self, full: bool = False) -> dict:
+        """Fold rows added since the last refresh into the index and save it; returns stats."""
+        from ..models import DisasterPrediction, HistoricalDisaster
+
+        with self._lock:
+            self._load()
+            if self.stale_path.exists():
+                # Removed before reading, so an edit made during the rebuild marks it again
+                self.stale_path.unlink(missing_ok=True)
+                full = True
+            arrays = self._empty() if full else {k: v.copy() for k, v in self._snapshot[0].items()}
+            last_history, last_prediction, history_rows = (int(v) for v in arrays["watermarks"])
+            if HistoricalDisaster.objects.filter(id__lte=last_history).count() != history_rows:
+                # Rows were deleted since; counts cannot be decremented without the old rows
+                arrays = self._empty()
+                last_history = last_prediction = history_rows = 0
+
+            positions = {key: i for i, key in enumerate(arrays["keys"].tolist())}
+            new_keys: List[str] = []
+            events: Dict[int, int] = {}
+            weighted: Dict[int, float] = {}
+            latest: Dict[tuple, float] = {}
+
+            def slot(key: str) -> int:
+                if key not in positions:
+                    positions[key] = len(positions)
+                    new_keys.append(key)
+                return positions[key]
+
+            history = HistoricalDisaster.objects.filter(id__gt=last_history).order_by("id")
+            for pk, district, severity in history.values_list("id", "district", "severity").iterator(chunk_size=5000):
+                i = slot(location_key(district))
+                events[i] = events.get(i, 0) + 1
+                weighted[i] = weighted.get(i, 0.0) + SEVERITY_WEIGHT.get(severity, 2.0)
+                last_history = pk
+                history_rows += 1
+
+            predictions = DisasterPrediction.objects.filter(id__gt=last_prediction, type__in=RISK_TYPES).order_by("id")
+            for pk, location, kind, probability in predictions.values_list("id", "location", "type", "probability").iterator(chunk_size=5000):
+                # Later rows overwrite earlier ones: the latest probability per location and type
+                latest[(slot(location_key(location)), RISK_TYPES.index(kind))] = probability
+                last_prediction = pk
+
+            if new_keys:
+                arrays["keys"] = np.concatenate([arrays["keys"], np.array(new_keys, dtype="<U64")])
+                arrays["events"] = np.concatenate([arrays["events"], np.zeros(len(new_keys), dtype=np.int32)])
+                arrays["weighted"] = np.concatenate([arrays["weighted"], np.zeros(len(new_keys), dtype=np.float32)])
+                arrays["model"] = np.concatenate([arrays["model"], np.full((len(new_keys), len(RISK_TYPES)), np.nan, dtype=np.float32)])
+            if events:
+                idx = np.fromiter(events.keys(), dtype=np.int64)
+                arrays["events"][idx] += np.fromiter(events.values(), dtype=np.int32)
+                arrays["weighted"][idx] += np.fromiter(weighted.values(), dtype=np.float32)
+            if latest:
+                rows, cols = (np.array(v, dtype=np.int64) for v in zip(*latest.keys()))
+                arrays["model"][rows, cols] = np.fromiter(latest.values(), dtype=np.float32)
+
+            # Sorted by key, so incremental refreshes and full rebuilds save the same arrays
+            order = np.argsort(arrays["keys"], kind="stable")
+            for name in ("keys", "events", "weighted", "model"):
+                arrays[name] = arrays[name][order]
+            arrays["watermarks"] = np.array([last_history, last_prediction, history_rows], dtype=np.int64)
+            self._score(arrays)
+            self._save(arrays)
+            return {"keys": len(arrays["keys"]), "history_rows": history_rows, "new_history": sum(events.values()), "new_predictions": len(latest)}
+
+    # ----------------------
+    # Persistence
+    # ----------------------
+    def _save(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.stem}.{os.getpid()}.tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, self.path)
+        self._snapshot = self._build_snapshot(arrays)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    def _load(self) -> None:
+        """Pick up an index written by another process."""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with np.load(self.path) as data:
+                arrays = {name: data[name] for name in data.files}
+            self._score(arrays)  # weights may differ from the writer's settings
+            snapshot = self._build_snapshot(arrays)
+        except Exception:
+            return
+        self._snapshot = snapshot
+        self._mtime = mtime
+
+    def reload(self) -> None:
+        """Pick up a newer saved index if one exists; skipped while a refresh holds the lock."""
+        if self._lock.acquire(blocking=False):
+            try:
+                self._load()
+            finally:
+                self._lock.release()
+
+    # ----------------------
+    # Lookup
+    # ----------------------
+    def assess(self, locations: Sequence) -> dict:
+        """Vectorised lookup; returns arrays parallel to `locations`. Unknown locations get NaN scores."""
+        self.reload()
+        arrays, positions, aliases = self._snapshot
+
+        def position(location) -> int:
+            if not isinstance(location, str):
+                return positions.get(location_key(location), -1)
+            pos = aliases.get(location)
+            if pos is None:
+                pos = positions.get(location_key(location), -1)
+                if len(aliases) < 100000:
+                    aliases[location] = pos
+            return pos
+
+        pos = np.fromiter(map(position, locations), dtype=np.int64, count=len(locations))
+        found = pos >= 0
+
+        def pick(values, fill):
+            out = values[pos]  # -1 picks the last row; masked below
+            out[~found] = fill
+            return out
+
+        if not len(arrays["keys"]):
+            pos[:] = 0
+            arrays = {**arrays, **self._empty_row()}
+        return {
+            "found": found,
+            "score": pick(arrays["score"], np.nan),
+            "history_score": pick(arrays["history_score"], np.nan),
+            "model_score": pick(arrays["model_score"], np.nan),
+            "events": pick(arrays["events"], 0),
+            "model": pick(arrays["model"], np.nan),
+        }
+
+    def stats(self) -> dict:
+        arrays = self._snapshot[0]
+        last_history, last_prediction, history_rows = (int(v) for v in arrays["watermarks"])
+        return {
+            "keys": int(len(arrays["keys"])),
+            "history_rows": history_rows,
+            "last_prediction_id": last_prediction,
+            "bytes": int(sum(a.nbytes for a in arrays.values())),
+        }
+
+
+def assessments(index: RiskIndex, locations: Iterable) -> List[dict]:
+    """One JSON-ready assessment per location, from a single vectorised lookup."""
+    locations = list(locations)
+    result = index.assess(locations)
+
+    def values(array) -> list:
+        # NaN -> None, everything rounded in one pass
+        return [None if v != v else v for v in np.round(array.astype(np.float64), 4).tolist()]
+
+    score = result["score"]
+    levels = np.select([np.isnan(score), score < 0.3, score < 0.7], ["unknown", "low", "medium"], "high").tolist()
+    model = values(result["model"].ravel())
+    width = len(RISK_TYPES)
+    out = []
+    for i, (location, risk, level, events, history, model_score) in enumerate(zip(
+        locations, values(score), levels, result["events"].tolist(),
+        values(result["history_score"]), values(result["model_score"]),
+    )):
+        probabilities = model[i * width:(i + 1) * width]
+        out.append({
+            "location": location,
+            "risk_score": risk,
+            "risk_level": level,
+            "historical_events": events,
+            "history_score": history,
+            "model_score": model_score,
+            "model_probabilities": {t: p for t, p in zip(RISK_TYPES, probabilities) if p is not None},
+        })
+    return out
+
+
+def risk_index_post_save(sender, instance, created, raw=False, **kwargs) -> None:
+    """Edits to an existing HistoricalDisaster row cannot be folded in by id watermark."""
+    if created or raw:
+        return
+    # Stored version remembered by rollups' pre_save receiver
+    previous = getattr(instance, "_rollup_previous", None)
+    if previous is not None and (previous.district, previous.severity) == (instance.district, instance.severity):
+        return
+    risk_index.invalidate()
+
+
+def _from_settings() -> RiskIndex:
+    from django.conf import settings
+
+    return RiskIndex(
+        Path(getattr(settings, "RISK_INDEX_PATH", DEFAULT_INDEX_PATH)),
+        history_weight=float(getattr(settings, "RISK_INDEX_HISTORY_WEIGHT", 0.4)),
+        model_weight=float(getattr(settings, "RISK_INDEX_MODEL_WEIGHT", 0.6)),
+        refresh_interval=float(getattr(settings, "RISK_INDEX_REFRESH_SECONDS", 60)),
+    )
+
+
+risk_index = _from_settings()
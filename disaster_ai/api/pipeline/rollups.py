@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+
+# Months of each Indian season, for the seasonal breakdown of trends
+SEASONS = {
+    "winter": (12, 1, 2),
+    "summer": (3, 4, 5),
+    "monsoon": (6, 7, 8, 9),
+    "post_monsoon": (10, 11),
+}
+
+# (type, state_key, first day of month)
+Bucket = Tuple[str, str, date]
+
+
+def _as_date(value) -> date:
+    """A row's date as a date: instances created with an ISO string keep the string until reloaded."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    from django.utils.dateparse import parse_date
+
+    parsed = parse_date(str(value))
+    if parsed is None:
+        raise ValueError(f"Invalid date: {value!r}")
+    return parsed
+
+
+def _month(day: date) -> date:
+    return _as_date(day).replace(day=1)
+
+
+def _add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bucket(row) -> Bucket:
+    return row.type, row.state_key, _month(row.date)
+
+
+class _Delta:
+    __slots__ = ("state", "count", "casualties", "damage")
+
+    def __init__(self, state: str):
+        self.state = state
+        self.count = 0
+        self.casualties = 0
+        self.damage = Decimal(0)
+
+    def add(self, row, sign: int) -> None:
+        self.count += sign
+        self.casualties += sign * int(row.casualties or 0)
+        self.damage += sign * Decimal(row.damage_estimate or 0)
+
+
+def apply_rows(rows: Iterable, sign: int = 1) -> int:
+    """Add (sign=1) or remove (sign=-1) HistoricalDisaster rows from the rollups.
+
+    Rows are summed per bucket first, so a bulk import costs one UPDATE per touched
+    bucket; buckets seen for the first time are created. Increments use F() expressions,
+    so concurrent writers never lose each other's counts. Returns the buckets touched.
+    """
+    from django.db import IntegrityError, transaction
+    from django.db.models import F
+    from ..models import DisasterRollup
+
+    deltas: Dict[Bucket, _Delta] = {}
+    for row in rows:
+        key = _bucket(row)
+        if key not in deltas:
+            deltas[key] = _Delta(row.state)
+        deltas[key].add(row, sign)
+
+    with transaction.atomic():
+        for (kind, state_key, month), delta in deltas.items():
+            if not delta.count and not delta.casualties and not delta.damage:
+                continue
+            bucket = DisasterRollup.objects.filter(type=kind, state_key=state_key, month=month)
+            changes = dict(
+                count=F("count") + delta.count,
+                casualties=F("casualties") + delta.casualties,
+                damage_estimate=F("damage_estimate") + delta.damage,
+            )
+            if sign > 0:
+                changes["state"] = delta.state
+            if bucket.update(**changes):
+                continue
+            try:
+                with transaction.atomic():
+                    DisasterRollup.objects.create(
+                        type=kind, state_key=state_key, state=delta.state, month=month,
+                        count=delta.count, casualties=delta.casualties, damage_estimate=delta.damage,
+                    )
+            except IntegrityError:
+                # Another writer created the bucket in between
+                bucket.update(**changes)
+        # Buckets whose last event went away
+        DisasterRollup.objects.filter(count__lte=0).delete()
+    return len(deltas)
+
+
+def rebuild() -> int:
+    """Recompute every rollup from HistoricalDisaster in one aggregate query; returns the bucket count."""
+    from django.db import transaction
+    from django.db.models import Count, Max, Sum
+    from django.db.models.functions import TruncMonth
+    from ..models import DisasterRollup, HistoricalDisaster
+
+    grouped = (
+        HistoricalDisaster.objects
+        .annotate(month=TruncMonth("date"))
+        .values("type", "state_key", "month")
+        .annotate(n=Count("id"), casualties=Sum("casualties"), damage=Sum("damage_estimate"), state=Max("state"))
+        .order_by()
+    )
+    buckets = [
+        DisasterRollup(
+            type=g["type"], state_key=g["state_key"], state=g["state"], month=g["month"],
+            count=g["n"], casualties=g["casualties"] or 0, damage_estimate=g["damage"] or 0,
+        )
+        for g in grouped.iterator(chunk_size=2000)
+    ]
+    with transaction.atomic():
+        DisasterRollup.objects.all().delete()
+        DisasterRollup.objects.bulk_create(buckets, batch_size=1000)
+    return len(buckets)
+
+
+# ----------------------
+# Signal receivers for HistoricalDisaster
+# ----------------------
+def rollup_pre_save(sender, instance, raw=False, **kwargs) -> None:
+    """Remember the stored version of an updated row so post_save can move it between buckets."""
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_previous = sender.objects.filter(pk=instance.pk).first()
+
+
+def rollup_post_save(sender, instance, created, raw=False, **kwargs) -> None:
+    if raw:
+        return
+    previous = getattr(instance, "_rollup_previous", None)
+    if previous is not None:
+        apply_rows([previous], sign=-1)
+    apply_rows([instance])
+
+
+def rollup_post_delete(sender, instance, **kwargs) -> None:
+    apply_rows([instance], sign=-1)
+
+
+# ----------------------
+# Trends
+# ----------------------
+def compute_trends(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    state: Optional[str] = None,
+    kind: Optional[str] = None,
+    years: int = 5,
+) -> dict:
+    """Trend statistics for months start..end (inclusive), read from the rollups.
+
+    The cost depends on the number of type x state x month buckets in range, not on
+    how many events were recorded. Without a range the last `years` years are used.
+    The direction compares the newer half of the range with the older half.
+    """
+    from ..models import DisasterRollup, HistoricalDisaster
+
+    end = _month(end or date.today())
+    start = _month(start or _add_months(end, -12 * years + 1))
+    span = (end.year - start.year) * 12 + end.month - start.month + 1
+    midpoint = _add_months(start, span // 2)
+
+    buckets = DisasterRollup.objects.filter(month__gte=start, month__lte=end)
+    if state:
+        buckets = buckets.filter(state_key=HistoricalDisaster.normalize_state(state))
+    if kind:
+        buckets = buckets.filter(type=kind.lower())
+
+    by_type: Dict[str, int] = {}
+    by_state: Dict[str, int] = {}
+    by_month: Dict[str, int] = {}
+    per_season: Dict[str, Dict[str, int]] = {season: {} for season in SEASONS}
+    casualties = 0
+    damage = Decimal(0)
+    newer = older = 0
+    rows = buckets.values_list("type", "state", "month", "count", "casualties", "damage_estimate")
+    for kind_, state_, month, count, lost, cost in rows.iterator(chunk_size=2000):
+        by_type[kind_] = by_type.get(kind_, 0) + count
+        by_state[state_] = by_state.get(state_, 0) + count
+        key = f"{month:%Y-%m}"
+        by_month[key] = by_month.get(key, 0) + count
+        for season, months in SEASONS.items():
+            if month.month in months:
+                per_season[season][kind_] = per_season[season].get(kind_, 0) + count
+        casualties += lost
+        damage += cost
+        if month >= midpoint:
+            newer += count
+        else:
+            older += count
+
+    if newer > older * 1.1:
+        direction = "increasing"
+    elif newer < older * 0.9:
+        direction = "decreasing"
+    else:
+        direction = "stable"
+
+    def top(counts: Dict[str, int], n: int = 1):
+        return [k for k, _ in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:n]]
+
+    return {
+        "total_disasters": newer + older,
+        "trend_period": f"last_{years}_years" if span == 12 * years else f"{start:%Y-%m}..{end:%Y-%m}",
+        "range": {"start": f"{start:%Y-%m}", "end": f"{end:%Y-%m}"},
+        "filters": {"state": state, "type": kind},
+        "most_common_type": (top(by_type) or [None])[0],
+        "most_affected_state": (top(by_state) or [None])[0],
+        "trend_direction": direction,
+        "total_casualties": casualties,
+        "total_damage_estimate": float(damage),
+        "by_type": dict(sorted(by_type.items(), key=lambda kv: -kv[1])),
+        "by_month": dict(sorted(by_month.items())),
+        "seasonal_patterns": {season: top(counts, 2) for season, counts in per_season.items()},
+    }
@@ -1,13 +1,70 @@
 from __future__ import annotations
 
+import heapq
+import itertools
+import logging
 import os
+import random
+import sys
 import threading
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
 
 from django.conf import settings
 
-from .predictor import run_predictions
+from .data_sources import SOURCE_FETCHERS
+from .leader import FileLeaderLock
+from .model_store import MODEL_DIR
+from .partition import ClusterMembership, default_node_id
+from .polling import AdaptivePollingPolicy
+from .predictor import DEFAULT_LOCATIONS, current_model
+from .feature_store import record_features
+from .data_version import history_version
+from .risk_index import risk_index
+from .stream import StreamingPipeline
+from .suppression import get_suppressor
+
+
+logger = logging.getLogger(__name__)
+
+# manage.py commands that serve requests; every other command (check, migrate, test, ...)
+# leaves the scheduler off
+_SERVER_COMMANDS = {"runserver"}
+
+
+def _is_server_process() -> bool:
+    """False under manage.py / django-admin unless the command serves requests.
+    WSGI/ASGI servers (gunicorn, uvicorn, daphne, mod_wsgi) do not go through manage.py."""
+    argv = sys.argv or [""]
+    program = os.path.basename(argv[0])
+    if program in ("manage.py", "django-admin", "django-admin.py") or argv[0].endswith(os.path.join("django", "__main__.py")):
+        return len(argv) > 1 and argv[1] in _SERVER_COMMANDS
+    return True
+
+
+JobKey = Tuple[str, str]  # (source_type, location name)
+
+
+class _FetchJob:
+    """One data source for one location, fetched on its own interval."""
+
+    def __init__(self, source: str, location: str, lat: float, lon: float, interval: float, jitter: float):
+        self.source = source
+        self.location = location
+        self.lat = lat
+        self.lon = lon
+        self.interval = interval
+        self.jitter = jitter
+
+    @property
+    def key(self) -> JobKey:
+        return (self.source, self.location)
+
+    def next_due(self, after: float, interval: Optional[float] = None) -> float:
+        interval = self.interval if interval is None else interval
+        return after + interval + random.uniform(0, self.jitter * interval)
 
 
 class _Scheduler:
@@ -15,36 +72,373 @@ class _Scheduler:
         self._thread: Optional[threading.Thread] = None
         self._stop = threading.Event()
         self._started = False
+        self._lock: Optional[FileLeaderLock] = None
+
+        # Job state; guarded by _cond
+        self._cond = threading.Condition()
+        self._queue: list = []  # heap of (due_ts, seq, key)
+        self._due: Dict[JobKey, float] = {}  # authoritative due time; other heap entries are stale
+        self._seq = itertools.count()
+        self._jobs: Dict[JobKey, _FetchJob] = {}
+        self._running: set = set()
+        self._features: Dict[str, Dict[str, dict]] = {}  # location -> source -> last values
+        self._fetched_at: Dict[str, Dict[str, float]] = {}  # location -> source -> epoch of those values
+        self._dirty: set = set()  # locations with values newer than their last scoring
+        self._synced_at = 0.0
+        self._polling: Optional[AdaptivePollingPolicy] = None
+        self._membership: Optional[ClusterMembership] = None
+        self._stream: Optional[StreamingPipeline] = None
+        self._heartbeat_at = 0.0
+        self._risk_thread: Optional[threading.Thread] = None
+        self._risk_version: Optional[str] = None
+        self._risk_refreshed_at = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock is not None and self._lock.held
+
+    def stats(self) -> dict:
+        with self._cond:
+            jobs, running = len(self._jobs), len(self._running)
+        return {
+            "leader": self.is_leader,
+            "node": self._membership.node_id if self._membership is not None else None,
+            "members": self._membership.members() if self._membership is not None else None,
+            "jobs": jobs,
+            "running": running,
+            "stream": self._stream.stats() if self._stream is not None else None,
+        }
 
     def start(self):
         if self._started:
             return
+        if not getattr(settings, "PIPELINE_SCHEDULER_ENABLED", True):
+            return
+        if not _is_server_process():
+            return
+
+        # Under runserver's autoreloader the parent only watches files; the child (RUN_MAIN=true) serves
+        if "runserver" in sys.argv and "--noreload" not in sys.argv and os.environ.get("RUN_MAIN") != "true":
+            return
         self._started = True
 
-        # prevent duplicate start under autoreload
-        if os.environ.get("RUN_MAIN") != "true":
-            # In tests or management commands, RUN_MAIN may be None, still avoid duplicate
-            pass
-        self._thread = threading.Thread(target=self._loop, name="AI-PipelineScheduler", daemon=True)
+        lock_path = getattr(settings, "PIPELINE_LEADER_LOCK_PATH", None) or MODEL_DIR / "scheduler.lock"
+        self._lock = FileLeaderLock(lock_path)
+        self._thread = threading.Thread(target=self._run, name="AI-PipelineScheduler", daemon=True)
         self._thread.start()
 
-    def _loop(self):
-        interval_min = getattr(settings, "PIPELINE_FETCH_INTERVAL_MINUTES", 60)
-        threshold = float(getattr(settings, "PIPELINE_RISK_THRESHOLD", 0.7))
-        interval_sec = max(60, int(interval_min * 60))  # not less than 60s
-
-        # Initial small delay to let server boot
-        time.sleep(2)
+    def _run(self):
+        # Every web worker starts a scheduler; only the lock holder runs the pipeline,
+        # the rest retry so one of them takes over within seconds if the leader dies.
+        # A loop that crashes gives up the lock and is retried with a doubling backoff.
+        retry_sec = float(getattr(settings, "PIPELINE_LEADER_RETRY_SECONDS", 5))
+        max_retry_sec = float(getattr(settings, "PIPELINE_LEADER_MAX_RETRY_SECONDS", 300))
+        failures = 0
         while not self._stop.is_set():
+            wait = retry_sec
+            if self._lock.try_acquire():
+                started = time.time()
+                try:
+                    self._loop()
+                except Exception:
+                    # A loop that stayed up longer than the longest backoff starts the count over
+                    failures = 1 if time.time() - started >= max_retry_sec else failures + 1
+                    wait = min(max_retry_sec, retry_sec * 2 ** (failures - 1))
+                    logger.exception("Pipeline scheduler loop failed (%d in a row); retrying in %.0fs", failures, wait)
+                finally:
+                    self._lock.release()
+                    self._reset_jobs()
+            self._stop.wait(wait)
+
+    def _reset_jobs(self):
+        """Forget the job set so the next leadership term resyncs from scratch."""
+        with self._cond:
+            self._queue.clear()
+            self._due.clear()
+            self._jobs.clear()
+            self._running.clear()
+            self._dirty.clear()
+        self._synced_at = 0.0
+        self._heartbeat_at = 0.0
+
+    # ----------------------
+    # Job bookkeeping
+    # ----------------------
+    def _source_config(self) -> Dict[str, Tuple[float, float]]:
+        """(interval_sec, jitter_fraction) per active source type.
+        Active ExternalDataSource rows override the defaults; without any rows every
+        known fetcher runs at PIPELINE_FETCH_INTERVAL_MINUTES.
+        """
+        from ..models import ExternalDataSource
+
+        floor = float(getattr(settings, "PIPELINE_MIN_FETCH_INTERVAL_SECONDS", 60))
+        default_interval = max(floor, float(getattr(settings, "PIPELINE_FETCH_INTERVAL_MINUTES", 60)) * 60)
+        default_jitter = float(getattr(settings, "PIPELINE_FETCH_JITTER", 0.1))
+
+        rows = list(ExternalDataSource.objects.filter(source_type__in=list(SOURCE_FETCHERS)))
+        if not rows:
+            return {source: (default_interval, default_jitter) for source in SOURCE_FETCHERS}
+
+        config = {}
+        for row in rows:
+            if not row.is_active:
+                continue
+            jitter = float((row.configuration or {}).get("jitter", default_jitter))
+            interval = max(floor, float(row.fetch_interval or default_interval))
+            # Several rows of one type: the most frequent wins
+            if row.source_type not in config or interval < config[row.source_type][0]:
+                config[row.source_type] = (interval, jitter)
+        return config
+
+    def _interval(self, job: _FetchJob) -> float:
+        if self._polling is None:
+            return job.interval
+        return self._polling.interval_for(job.location, job.interval)
+
+    def _schedule(self, key: JobKey, due: float):
+        # Caller holds _cond
+        self._due[key] = due
+        heapq.heappush(self._queue, (due, next(self._seq), key))
+        self._cond.notify_all()
+
+    def _owned_locations(self):
+        if self._membership is None:
+            return list(DEFAULT_LOCATIONS)
+        return [loc for loc in DEFAULT_LOCATIONS if self._membership.owns(loc[0])]
+
+    def _sync_jobs(self):
+        """Reconcile the job set with the configured sources and this node's locations."""
+        from ..models import SourceFetchState
+
+        sources = self._source_config()
+        wanted = {}
+        for name, lat, lon in self._owned_locations():
+            for source, (interval, jitter) in sources.items():
+                wanted[(source, name)] = _FetchJob(source, name, lat, lon, interval, jitter)
+
+        states = {
+            (s.source_type, s.location): s
+            for s in SourceFetchState.objects.filter(source_type__in=list(sources))
+        }
+        now = time.time()
+        with self._cond:
+            for key in list(self._jobs):
+                if key not in wanted:
+                    # Its heap entry goes stale and is skipped when popped
+                    del self._jobs[key]
+                    self._due.pop(key, None)
+            for key, job in wanted.items():
+                existing = self._jobs.get(key)
+                if existing is not None:
+                    existing.interval, existing.jitter = job.interval, job.jitter
+                    continue
+                self._jobs[key] = job
+                state = states.get(key)
+                if state is not None and state.last_values:
+                    self._features.setdefault(job.location, {})[job.source] = state.last_values
+                    if state.last_fetch is not None:
+                        self._fetched_at.setdefault(job.location, {})[job.source] = state.last_fetch.timestamp()
+                if state is not None and state.last_fetch is not None:
+                    # Resume the persisted schedule instead of refetching everything
+                    due = max(now, job.next_due(state.last_fetch.timestamp(), self._interval(job)))
+                else:
+                    # Stagger cold starts a little so sources are not hit all at once
+                    due = now + random.uniform(0, min(job.jitter * job.interval, 10))
+                if key not in self._running:
+                    self._schedule(key, due)
+            self._synced_at = now
+
+    def _run_job(self, job: _FetchJob):
+        from django.db import close_old_connections
+        from ..models import ExternalDataSource, SourceFetchState
+
+        try:
+            values = SOURCE_FETCHERS[job.source](job.lat, job.lon)
+            if values:
+                fetched_at = datetime.now(timezone.utc)
+                SourceFetchState.objects.update_or_create(
+                    source_type=job.source,
+                    location=job.location,
+                    defaults={"last_fetch": fetched_at, "last_values": values},
+                )
+                ExternalDataSource.objects.filter(source_type=job.source, is_active=True).update(last_fetch=fetched_at)
+                with self._cond:
+                    self._features.setdefault(job.location, {})[job.source] = values
+                    self._fetched_at.setdefault(job.location, {})[job.source] = fetched_at.timestamp()
+                    self._dirty.add(job.location)
+        except Exception:
+            # keep running; optionally log via Django logging
+            pass
+        finally:
+            close_old_connections()
+            with self._cond:
+                self._running.discard(job.key)
+                current = self._jobs.get(job.key)
+                if current is not None and job.key not in self._due:
+                    self._schedule(job.key, current.next_due(time.time(), self._interval(current)))
+                score = self._cycle_complete(job.location)
+                self._cond.notify_all()
+        if score:
+            try:
+                self._score(job.location)
+            except Exception:
+                pass
+
+    def _cycle_complete(self, location: str) -> bool:
+        """Whether a location's fetches for this cycle are done and it should be scored now.
+        Sources of one location come due within their jitter of each other; scoring waits for
+        the last of them, so each cycle is scored (and observed by the polling policy) once.
+        Caller holds _cond.
+        """
+        if location not in self._dirty:
+            return False
+        now = time.time()
+        for key, other in self._jobs.items():
+            if key[1] != location:
+                continue
+            if key in self._running:
+                return False
+            due = self._due.get(key)
+            if due is not None and due - now <= other.jitter * self._interval(other):
+                return False
+        self._dirty.discard(location)
+        return True
+
+    def _score(self, location: str):
+        with self._cond:
+            cached = dict(self._features.get(location, {}))
+            fetched_at = dict(self._fetched_at.get(location, {}))
+            sources = {key[0] for key in self._jobs if key[1] == location}
+        # Wait until every source has reported once; partial vectors read as calm weather
+        if not sources or not sources.issubset(cached):
+            return
+        feats = {}
+        for source in sorted(cached):
+            feats.update(cached[source])
+        now = time.time()
+        record_features(location, feats, freshness={s: now - t for s, t in fetched_at.items()})
+        # Blocks while inference is saturated, which holds back further fetches
+        self._stream.submit_features(location, feats)
+
+    def _on_scored(self, location: str, proba):
+        if self._polling is not None and self._polling.observe(location, proba):
+            self._expedite(location)
+
+    def _expedite(self, location: str):
+        """Pull a location's pending fetches forward after its polling interval shrank."""
+        now = time.time()
+        with self._cond:
+            for key, job in self._jobs.items():
+                if key[1] != location or key in self._running:
+                    continue
+                due = job.next_due(now, self._interval(job))
+                if due < self._due.get(key, float("inf")):
+                    self._schedule(key, due)
+
+    def _refresh_risk_index(self):
+        """Rebuild the risk index off the loop thread when history changed or it got old."""
+        if self._risk_thread is not None and self._risk_thread.is_alive():
+            return
+        version = history_version.current()[0]
+        if version == self._risk_version and time.time() - self._risk_refreshed_at < risk_index.refresh_interval:
+            return
+        self._risk_version, self._risk_refreshed_at = version, time.time()
+
+        def run():
+            from django.db import close_old_connections
+
             try:
-                run_predictions(threshold=threshold)
+                risk_index.refresh()
             except Exception:
-                # keep running; optionally log via Django logging
                 pass
-            self._stop.wait(interval_sec)
+            finally:
+                close_old_connections()
+
+        self._risk_thread = threading.Thread(target=run, name="AI-RiskIndex", daemon=True)
+        self._risk_thread.start()
+
+    # ----------------------
+    # Main loop
+    # ----------------------
+    def _loop(self):
+        cap = max(1, int(getattr(settings, "PIPELINE_MAX_CONCURRENT_FETCHES", 4)))
+        resync_sec = float(getattr(settings, "PIPELINE_SOURCE_RELOAD_SECONDS", 60))
+
+        if getattr(settings, "PIPELINE_ADAPTIVE_POLLING", True):
+            floor = float(getattr(settings, "PIPELINE_MIN_FETCH_INTERVAL_SECONDS", 60))
+            self._polling = AdaptivePollingPolicy(
+                threshold=float(getattr(settings, "PIPELINE_RISK_THRESHOLD", 0.7)),
+                min_interval=max(floor, float(getattr(settings, "PIPELINE_MIN_POLL_SECONDS", 300))),
+                max_interval=float(getattr(settings, "PIPELINE_MAX_POLL_SECONDS", 21600)),
+                margin=float(getattr(settings, "PIPELINE_POLL_RISK_MARGIN", 0.15)),
+            )
+
+        heartbeat_sec = float(getattr(settings, "PIPELINE_NODE_HEARTBEAT_SECONDS", 10))
+        if getattr(settings, "PIPELINE_PARTITIONING", True):
+            self._membership = ClusterMembership(
+                getattr(settings, "PIPELINE_NODE_ID", None) or default_node_id(),
+                lease_seconds=float(getattr(settings, "PIPELINE_NODE_LEASE_SECONDS", 30)),
+            )
+
+        self._stream = StreamingPipeline(
+            current_model,
+            threshold=float(getattr(settings, "PIPELINE_RISK_THRESHOLD", 0.7)),
+            on_scored=self._on_scored,
+            suppressor=get_suppressor(),
+        ).start()
+
+        # Initial small delay to let server boot
+        time.sleep(2)
+        pool = ThreadPoolExecutor(max_workers=cap, thread_name_prefix="AI-PipelineFetch")
+        try:
+            while not self._stop.is_set():
+                if self._membership is not None and time.time() - self._heartbeat_at >= heartbeat_sec:
+                    try:
+                        if self._membership.heartbeat():
+                            # Nodes joined or left: pick up or drop locations right away
+                            self._synced_at = 0.0
+                    except Exception:
+                        pass
+                    self._heartbeat_at = time.time()
+                if time.time() - self._synced_at >= resync_sec:
+                    try:
+                        self._sync_jobs()
+                    except Exception:
+                        pass
+                self._refresh_risk_index()
+                with self._cond:
+                    now = time.time()
+                    while self._queue and self._queue[0][0] <= now and len(self._running) < cap:
+                        due, _, key = heapq.heappop(self._queue)
+                        job = self._jobs.get(key)
+                        if job is None or self._due.get(key) != due:
+                            continue
+                        del self._due[key]
+                        # Never overlap runs of the same job; it is rescheduled when the run ends
+                        if key in self._running:
+                            continue
+                        self._running.add(key)
+                        pool.submit(self._run_job, job)
+                    wait = resync_sec
+                    if self._membership is not None:
+                        wait = min(wait, heartbeat_sec)
+                    if self._queue and len(self._running) < cap:
+                        wait = min(wait, max(0.0, self._queue[0][0] - now))
+                    self._cond.wait(timeout=wait)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._stream.close(timeout=5)
+            if self._membership is not None:
+                try:
+                    # Hand locations over now instead of after the lease expires
+                    self._membership.leave()
+                except Exception:
+                    pass
 
     def stop(self):
         self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=2)
 
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import itertools
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import StratifiedKFold
+except Exception:  # pragma: no cover
+    RandomForestClassifier = None
+
+from .model_store import save_search_results
+
+
+# Candidate forest hyperparameters; trials sample distinct combinations
+SEARCH_SPACE = {
+    "n_estimators": [50, 100, 200, 300, 500],
+    "max_depth": [None, 8, 12, 16, 24],
+    "min_samples_leaf": [1, 2, 4, 8],
+    "max_features": ["sqrt", "log2", 0.5],
+}
+
+# Dataset shared read-only with pool workers (memory-mapped .npy files)
+_X = None
+_y = None
+
+
+def sample_configs(n_trials: int, seed: int = 42) -> List[Dict]:
+    keys = list(SEARCH_SPACE)
+    combos = list(itertools.product(*(SEARCH_SPACE[k] for k in keys)))
+    rng = np.random.default_rng(seed)
+    picks = rng.permutation(len(combos))[:n_trials]
+    return [dict(zip(keys, combos[i])) for i in picks]
+
+
+def _init_worker(x_path: str, y_path: str) -> None:
+    global _X, _y
+    _X = np.load(x_path, mmap_mode="r")
+    _y = np.load(y_path, mmap_mode="r")
+
+
+def _run_trial(task) -> Dict:
+    trial_id, params, folds, seed = task
+    started = time.perf_counter()
+    try:
+        result = _evaluate(params, folds, seed)
+    except Exception as exc:
+        # Recorded as a failed trial; the rest of the search carries on
+        result = {"error": f"{type(exc).__name__}: {exc}"}
+    return {"trial": trial_id, "params": params, **result, "wall_seconds": time.perf_counter() - started}
+
+
+def _evaluate(params: Dict, folds: int, seed: int) -> Dict:
+    skf = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    scores = []
+    fit_time = 0.0
+    model = test_idx = None
+    for train_idx, test_idx in skf.split(np.zeros(len(_y)), _y):
+        model = RandomForestClassifier(**params, random_state=seed, n_jobs=1)
+        t0 = time.perf_counter()
+        model.fit(_X[train_idx], _y[train_idx])
+        fit_time += time.perf_counter() - t0
+        scores.append(float((model.predict(_X[test_idx]) == _y[test_idx]).mean()))
+
+    # Single-row latency is what the scheduler pays per location
+    row = np.asarray(_X[test_idx[:1]])
+    latencies = []
+    for _ in range(10):
+        t0 = time.perf_counter()
+        model.predict_proba(row)
+        latencies.append(time.perf_counter() - t0)
+
+    return {
+        "accuracy": float(np.mean(scores)),
+        "accuracy_std": float(np.std(scores)),
+        "fit_seconds": fit_time / folds,
+        "predict_latency_ms": float(np.median(latencies) * 1000),
+        "model_size_bytes": len(pickle.dumps(model)),
+    }
+
+
+def _select_best(trials: List[Dict], max_latency_ms: Optional[float], max_size_bytes: Optional[int]) -> Optional[Dict]:
+    eligible = [
+        t for t in trials
+        if "error" not in t
+        and (max_latency_ms is None or t["predict_latency_ms"] <= max_latency_ms)
+        and (max_size_bytes is None or t["model_size_bytes"] <= max_size_bytes)
+    ]
+    if not eligible:
+        return None
+    # Highest accuracy; ties go to the faster model
+    return max(eligible, key=lambda t: (round(t["accuracy"], 4), -t["predict_latency_ms"]))
+
+
+def run_search(
+    X: np.ndarray,
+    y_idx: np.ndarray,
+    n_trials: int = 20,
+    folds: int = 3,
+    budget_seconds: float = 600,
+    workers: Optional[int] = None,
+    max_latency_ms: Optional[float] = None,
+    max_size_bytes: Optional[int] = None,
+    seed: int = 42,
+) -> Dict:
+    """Stratified k-fold search over SEARCH_SPACE in a process pool.
+    The dataset is written once to .npy files that workers memory-map read-only. Trials
+    still running when budget_seconds elapses are terminated. The best configuration
+    satisfying the latency/size limits is persisted with the full trial log; the log is
+    saved with best_params=None when no trial qualifies. A trial that raises is logged with
+    its error instead of ending the search.
+    """
+    if RandomForestClassifier is None:
+        raise RuntimeError("scikit-learn is required for hyperparameter search. Install via: pip install scikit-learn")
+
+    deadline = time.monotonic() + budget_seconds
+    tasks = [(i, params, folds, seed) for i, params in enumerate(sample_configs(n_trials, seed))]
+    workers = workers or os.cpu_count() or 1
+    trials: List[Dict] = []
+    stopped_early = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        x_path = str(Path(tmp) / "X.npy")
+        y_path = str(Path(tmp) / "y.npy")
+        np.save(x_path, np.ascontiguousarray(X, dtype=float))
+        np.save(y_path, np.asarray(y_idx))
+
+        pool = multiprocessing.Pool(processes=min(workers, len(tasks)) or 1, initializer=_init_worker, initargs=(x_path, y_path))
+        try:
+            results = pool.imap_unordered(_run_trial, tasks)
+            for _ in tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    stopped_early = True
+                    break
+                try:
+                    trials.append(results.next(timeout=remaining))
+                except multiprocessing.TimeoutError:
+                    stopped_early = True
+                    break
+        finally:
+            # terminate() also stops trials that would overrun the budget
+            pool.terminate()
+            pool.join()
+
+    best = _select_best(trials, max_latency_ms, max_size_bytes)
+    results = {
+        "completed_at": datetime.utcnow().isoformat() + "Z",
+        "budget_seconds": budget_seconds,
+        "stopped_early": stopped_early,
+        "folds": folds,
+        "trials_requested": len(tasks),
+        "trials_completed": len(trials),
+        "trials_failed": sum(1 for t in trials if "error" in t),
+        "constraints": {"max_latency_ms": max_latency_ms, "max_size_bytes": max_size_bytes},
+        "best_params": best["params"] if best else None,
+        "best_accuracy": best["accuracy"] if best else None,
+        "trials": sorted(trials, key=lambda t: t["trial"]),
+    }
+    save_search_results(results)
+    return results
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .alerts import get_dispatcher
+from .data_sources import SOURCE_FETCHERS
+from .feature_store import record_features
+from .predictor import alert_from_proba, predict_proba_matrix, to_feature_vector
+from .suppression import AlertSuppressor, alert_events
+
+
+_STOP = object()
+
+
+class _StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, n_in: int, n_out: int, busy: float) -> None:
+        with self._lock:
+            self.items_in += n_in
+            self.items_out += n_out
+            self.busy_seconds += busy
+
+    def snapshot(self, elapsed: float, depth: Optional[int]) -> dict:
+        with self._lock:
+            return {
+                "items_in": self.items_in,
+                "items_out": self.items_out,
+                "busy_seconds": round(self.busy_seconds, 4),
+                "throughput_per_sec": round(self.items_in / elapsed, 3) if elapsed > 0 else 0.0,
+                "queue_depth": depth,
+            }
+
+
+class StreamingPipeline:
+    """fetch -> featurize -> infer -> emit, connected by bounded queues.
+
+    Fetch runs on an asyncio loop, fetching every source of a location concurrently.
+    Inference groups rows into micro-batches of up to batch_size or batch_window seconds
+    so one predict_proba call covers many locations. Emission is buffered and flushed by
+    size or interval. With a suppressor, only onset/escalation/repeat/cleared events pass
+    inference. Every queue is bounded, so a slow stage blocks its producer and
+    backpressure reaches submit_location()/submit_features().
+    """
+
+    def __init__(
+        self,
+        model_provider: Callable,
+        threshold: float = 0.7,
+        queue_size: int = 64,
+        fetch_concurrency: int = 8,
+        batch_size: int = 32,
+        batch_window: float = 0.05,
+        emit_buffer: int = 50,
+        emit_interval: float = 1.0,
+        on_scored: Optional[Callable[[str, np.ndarray], None]] = None,
+        suppressor: Optional[AlertSuppressor] = None,
+    ):
+        self.model_provider = model_provider
+        self.threshold = threshold
+        self.fetch_concurrency = fetch_concurrency
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.emit_buffer = emit_buffer
+        self.emit_interval = emit_interval
+        self.on_scored = on_scored
+        self.suppressor = suppressor
+
+        self._featurize_q: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._infer_q: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._emit_q: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._fetch_q: Optional[asyncio.Queue] = None
+        self._queue_size = queue_size
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._io_pool = ThreadPoolExecutor(
+            max_workers=fetch_concurrency * max(1, len(SOURCE_FETCHERS)) + 1,
+            thread_name_prefix="AI-StreamFetch",
+        )
+        self._threads: List[threading.Thread] = []
+        self._stats = {name: _StageStats(name) for name in ("fetch", "featurize", "infer", "emit")}
+        self._batches = 0
+        self._started_at: Optional[float] = None
+        self._closed = False
+
+    # ----------------------
+    # Lifecycle
+    # ----------------------
+    def start(self) -> "StreamingPipeline":
+        self._started_at = time.monotonic()
+        ready = threading.Event()
+
+        def run_loop():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._fetch_q = asyncio.Queue(maxsize=self._queue_size)
+            ready.set()
+            self._loop.run_until_complete(self._fetch_stage())
+            self._loop.close()
+
+        for name, target in (
+            ("fetch", run_loop),
+            ("featurize", self._featurize_stage),
+            ("infer", self._infer_stage),
+            ("emit", self._emit_stage),
+        ):
+            t = threading.Thread(target=target, name=f"AI-Stream-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        ready.wait()
+        return self
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting input and wait until everything submitted has been emitted."""
+        if self._closed:
+            return
+        self._closed = True
+        asyncio.run_coroutine_threadsafe(self._fetch_q.put(_STOP), self._loop).result()
+        for t in self._threads:
+            t.join(timeout)
+        self._io_pool.shutdown(wait=False)
+
+    # ----------------------
+    # Input
+    # ----------------------
+    def submit_location(self, name: str, lat: float, lon: float) -> None:
+        """Queue a location for fetching; blocks while the fetch stage is saturated."""
+        asyncio.run_coroutine_threadsafe(self._fetch_q.put((name, lat, lon)), self._loop).result()
+
+    def submit_features(self, name: str, feature_dict: Dict[str, float]) -> None:
+        """Queue already-fetched features, skipping the fetch stage; blocks when full."""
+        self._featurize_q.put((name, feature_dict))
+
+    # ----------------------
+    # Stages
+    # ----------------------
+    async def _fetch_stage(self):
+        sem = asyncio.Semaphore(self.fetch_concurrency)
+        pending = set()
+        while True:
+            item = await self._fetch_q.get()
+            if item is _STOP:
+                break
+            await sem.acquire()
+            task = asyncio.ensure_future(self._fetch_one(item, sem))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self._loop.run_in_executor(self._io_pool, self._featurize_q.put, _STOP)
+
+    async def _fetch_one(self, item, sem: asyncio.Semaphore):
+        name, lat, lon = item
+        started = time.monotonic()
+        try:
+            parts = await asyncio.gather(
+                *(self._loop.run_in_executor(self._io_pool, fetch, lat, lon) for fetch in SOURCE_FETCHERS.values()),
+                return_exceptions=True,
+            )
+            feats = {}
+            freshness = {}
+            for source, part in zip(SOURCE_FETCHERS, parts):
+                if isinstance(part, dict):
+                    feats.update(part)
+                    freshness[source] = 0.0
+            self._stats["fetch"].record(1, 1, time.monotonic() - started)
+            await self._loop.run_in_executor(self._io_pool, record_features, name, feats, freshness)
+            # Blocking put off the event loop: a full queue stalls this fetch, not the loop
+            await self._loop.run_in_executor(self._io_pool, self._featurize_q.put, (name, feats))
+        finally:
+            sem.release()
+
+    def _featurize_stage(self):
+        while True:
+            item = self._featurize_q.get()
+            if item is _STOP:
+                self._infer_q.put(_STOP)
+                return
+            started = time.monotonic()
+            name, feats = item
+            vector = to_feature_vector(feats)
+            self._stats["featurize"].record(1, 1, time.monotonic() - started)
+            self._infer_q.put((name, vector))
+
+    def _infer_stage(self):
+        stopping = False
+        while not stopping:
+            first = self._infer_q.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._infer_q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            started = time.monotonic()
+            emitted = 0
+            try:
+                X = np.array([vector for _, vector in batch])
+                probas = predict_proba_matrix(self.model_provider(), X)
+                for (name, _), proba in zip(batch, probas):
+                    if self.on_scored is not None:
+                        try:
+                            self.on_scored(name, proba)
+                        except Exception:
+                            pass
+                    out = alert_from_proba(name, proba, self.threshold)
+                    for event in alert_events(self.suppressor, name, out):
+                        self._emit_q.put(event)
+                        emitted += 1
+            except Exception:
+                # keep the stream alive; a bad batch is dropped
+                pass
+            self._batches += 1
+            self._stats["infer"].record(len(batch), emitted, time.monotonic() - started)
+        self._emit_q.put(_STOP)
+
+    def _emit_stage(self):
+        buffer: List[dict] = []
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.emit_interval - (time.monotonic() - last_flush))
+            try:
+                item = self._emit_q.get(timeout=timeout if buffer else None)
+            except queue.Empty:
+                item = None
+            if item is not None and item is not _STOP:
+                buffer.append(item)
+            if buffer and (item is None or item is _STOP or len(buffer) >= self.emit_buffer
+                           or time.monotonic() - last_flush >= self.emit_interval):
+                started = time.monotonic()
+                self._flush(buffer)
+                self._stats["emit"].record(len(buffer), len(buffer), time.monotonic() - started)
+                buffer = []
+                last_flush = time.monotonic()
+            if item is _STOP:
+                return
+
+    def _flush(self, alerts: List[dict]) -> None:
+        # Hand-off only; delivery, retries and spooling happen on the dispatcher's thread
+        get_dispatcher().publish_many(alerts)
+
+    # ----------------------
+    # Observability
+    # ----------------------
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        depths = {
+            "fetch": self._fetch_q.qsize() if self._fetch_q is not None else 0,
+            "featurize": self._featurize_q.qsize(),
+            "infer": self._infer_q.qsize(),
+            "emit": self._emit_q.qsize(),
+        }
+        stages = {name: s.snapshot(elapsed, depths[name]) for name, s in self._stats.items()}
+        batches = self._batches
+        stages["infer"]["batches"] = batches
+        stages["infer"]["avg_batch_size"] = round(stages["infer"]["items_in"] / batches, 2) if batches else 0.0
+        return {"uptime_seconds": round(elapsed, 3), "stages": stages}
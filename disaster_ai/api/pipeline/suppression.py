@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# Ordering of the risk labels used by the pipeline (Low..Severe) and the live feed (Low..Critical)
+SEVERITY_RANK = {"low": 0, "moderate": 1, "medium": 1, "high": 2, "severe": 3, "critical": 3}
+
+
+def _fields(alert: dict) -> Tuple[str, int]:
+    disaster = str(alert.get("disaster") or alert.get("type") or "").lower()
+    level = str(alert.get("risk_level") or alert.get("severity") or "").lower()
+    return disaster, SEVERITY_RANK.get(level, 0)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class AlertSuppressor:
+    """Tracks active alerts per (location, disaster) and decides which ones go downstream.
+
+    An alert is emitted on onset, when its severity exceeds the peak reached since onset
+    (escalation), and again as a reminder once `window_seconds` have passed since the last
+    emission. Everything else is suppressed. When a location is scored without that alert,
+    a "cleared" event closes it. Emitted alerts carry an "event" field naming which of
+    these applied. With `state_path` the active set is saved to JSON on every change, so a
+    restart does not re-announce alerts that are still active.
+    """
+
+    def __init__(self, window_seconds: float = 3600, state_path: Optional[Path] = None):
+        self.window_seconds = window_seconds
+        self.state_path = Path(state_path) if state_path else None
+        self._lock = threading.Lock()
+        # location -> disaster -> {"peak": rank, "last_emitted": epoch, "alert": last emitted alert}
+        self._active: Dict[str, Dict[str, dict]] = {}
+        self._counters = {"evaluated": 0, "onset": 0, "escalation": 0, "repeat": 0, "cleared": 0, "suppressed": 0}
+        self._load()
+
+    def process(self, location: str, alert: Optional[dict], now: Optional[float] = None) -> List[dict]:
+        """Feed the latest result for a location (None when nothing is above threshold);
+        returns the events to deliver, possibly none."""
+        now = time.time() if now is None else now
+        events: List[dict] = []
+        with self._lock:
+            disaster, rank = _fields(alert) if alert is not None else ("", 0)
+            changed = False
+
+            active = self._active.get(location, {})
+            # Anything active here that is not the current alert has cleared
+            for other in [d for d in active if d != disaster]:
+                entry = active.pop(other)
+                events.append({**entry["alert"], "event": "cleared", "timestamp": _now_iso()})
+                self._counters["cleared"] += 1
+                changed = True
+
+            if alert is not None:
+                self._counters["evaluated"] += 1
+                entry = active.get(disaster)
+                if entry is None:
+                    kind = "onset"
+                elif rank > entry["peak"]:
+                    kind = "escalation"
+                elif now - entry["last_emitted"] >= self.window_seconds:
+                    kind = "repeat"
+                else:
+                    kind = None
+
+                if kind is None:
+                    self._counters["suppressed"] += 1
+                else:
+                    emitted = {**alert, "event": kind}
+                    peak = max(rank, entry["peak"]) if entry else rank
+                    active[disaster] = {"peak": peak, "last_emitted": now, "alert": emitted}
+                    self._counters[kind] += 1
+                    events.append(emitted)
+                    changed = True
+
+            if active:
+                self._active[location] = active
+            else:
+                self._active.pop(location, None)
+            if changed:
+                self._save()
+        return events
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            active = sum(len(v) for v in self._active.values())
+        emitted = counters["onset"] + counters["escalation"] + counters["repeat"]
+        counters.update({
+            "active": active,
+            "emitted": emitted,
+            # Share of above-threshold results that did not go downstream
+            "suppression_ratio": round(counters["suppressed"] / counters["evaluated"], 4) if counters["evaluated"] else 0.0,
+            "window_seconds": self.window_seconds,
+        })
+        return counters
+
+    # ----------------------
+    # Persistence
+    # ----------------------
+    def _load(self) -> None:
+        if self.state_path is None or not self.state_path.exists():
+            return
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+            for item in data.get("active", []):
+                self._active.setdefault(item["location"], {})[item["disaster"]] = {
+                    "peak": int(item["peak"]),
+                    "last_emitted": float(item["last_emitted"]),
+                    "alert": item["alert"],
+                }
+        except Exception:
+            # A corrupt state file only costs re-announcing active alerts
+            self._active.clear()
+
+    def _save(self) -> None:
+        if self.state_path is None:
+            return
+        payload = {
+            "active": [
+                {"location": loc, "disaster": dis, **entry}
+                for loc, by_disaster in self._active.items()
+                for dis, entry in by_disaster.items()
+            ]
+        }
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.state_path)
+        except OSError:
+            pass
+
+
+def alert_events(suppressor: Optional[AlertSuppressor], location: str, alert: Optional[dict]) -> List[dict]:
+    """Events to deliver for a scoring result; without a suppressor every alert passes."""
+    if suppressor is None:
+        return [alert] if alert is not None else []
+    return suppressor.process(location, alert)
+
+
+_suppressors: Dict[str, AlertSuppressor] = {}
+_suppressors_lock = threading.Lock()
+
+
+def get_suppressor(channel: str = "pipeline") -> Optional[AlertSuppressor]:
+    """Shared suppressor per alert channel, or None when PIPELINE_ALERT_DEDUP is off."""
+    from django.conf import settings
+
+    if not getattr(settings, "PIPELINE_ALERT_DEDUP", True):
+        return None
+    with _suppressors_lock:
+        if channel not in _suppressors:
+            state_dir = getattr(settings, "PIPELINE_ALERT_DEDUP_STATE_DIR", "")
+            _suppressors[channel] = AlertSuppressor(
+                window_seconds=getattr(settings, "PIPELINE_ALERT_DEDUP_WINDOW_SECONDS", 3600),
+                state_path=Path(state_dir) / f"{channel}.json" if state_dir else None,
+            )
+        return _suppressors[channel]
+
+
+def suppression_stats() -> Dict[str, dict]:
+    with _suppressors_lock:
+        return {channel: s.stats() for channel, s in _suppressors.items()}
@@ -1,18 +1,42 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import numpy as np
 from pathlib import Path
 from datetime import datetime
 
 try:
-    from sklearn.ensemble import RandomForestClassifier
+    import sklearn
+    from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, GradientBoostingClassifier
+    from sklearn.linear_model import SGDClassifier
     from sklearn.model_selection import train_test_split
     from sklearn.metrics import accuracy_score
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
 except Exception:  # pragma: no cover
+    sklearn = None
     RandomForestClassifier = None
+    ExtraTreesClassifier = GradientBoostingClassifier = SGDClassifier = Pipeline = None
 
-from .model_store import save_model
-from .data_ingest import load_csv_dataset, balance_by_oversample, FEATURES as CSV_FEATURES
+from .model_store import (
+    MODEL_PATH,
+    save_model,
+    load_model,
+    load_meta,
+    load_best_params,
+    save_checkpoint,
+    load_checkpoint,
+    clear_checkpoint,
+)
+from .data_ingest import (
+    load_csv_dataset,
+    balance_by_oversample,
+    list_csv_files,
+    iter_csv_chunks,
+    files_signature,
+    FEATURES as CSV_FEATURES,
+)
 
 
 DISASTER_CLASSES = [
@@ -206,24 +230,86 @@ def _generate_balanced_synthetic(n_per_class: int = 2000, seed: int = 42):
     return X, y
 
 
-def train_and_save(n_per_class: int = 1500, prefer_csv: bool = True):
-    """Train model, preferring CSV datasets when available.
+# Forest hyperparameters used unless a search (train_model --search) persisted better ones
+DEFAULT_RF_PARAMS = {"n_estimators": 300, "max_depth": None}
+
+
+def load_training_data(n_per_class: int = 1500, prefer_csv: bool = True):
+    """Resolve the training set as (X, y) with string labels.
     If CSVs are found under data/ paths, load, clean, and balance them; otherwise fall back to synthetic.
     """
-    X = y = None
+    X, y, _ = _load_training_data(n_per_class=n_per_class, prefer_csv=prefer_csv)
+    return X, y
+
+
+def _load_training_data(n_per_class: int, prefer_csv: bool):
+    """(X, y, description of the data that was actually loaded)."""
     if prefer_csv:
         try:
             # base_dir is two levels up from this file (project root)
             base_dir = Path(__file__).resolve().parents[2]
-            X_csv, y_csv = load_csv_dataset(base_dir)
-            # Balance dataset by oversampling minority classes
-            X, y = balance_by_oversample(X_csv, y_csv)
+            files = list_csv_files(base_dir)
+            if files:
+                # Signed before reading, so a file changed mid-load is picked up next time
+                data = {"csv": files_signature(files)}
+                X_csv, y_csv = load_csv_dataset(base_dir)
+                # Balance dataset by oversampling minority classes
+                X, y = balance_by_oversample(X_csv, y_csv)
+                return X, y, data
         except Exception:
             # No CSVs or failed to load; fall back
             pass
+    X, y = _generate_balanced_synthetic(n_per_class=n_per_class)
+    return X, y, _synthetic_data(n_per_class)
+
+
+def _synthetic_data(n_per_class: int) -> dict:
+    return {"synthetic": {"n_per_class": n_per_class, "seed": 42}}
+
+
+def training_fingerprint(n_per_class: int = 1500, prefer_csv: bool = True, params: dict | None = None, data: dict | None = None) -> str:
+    """Hash of everything that determines the trained model: the data (the CSV files by
+    path, size and mtime, or the synthetic generator parameters) plus the model config.
+    `data` describes what was actually loaded; without it the data training would try
+    to use is assumed (the CSVs when any are found).
+    """
+    if data is None:
+        files = list_csv_files(Path(__file__).resolve().parents[2]) if prefer_csv else []
+        data = {"csv": files_signature(files)} if files else _synthetic_data(n_per_class)
+
+    config = {
+        "engine": "RandomForestClassifier" if RandomForestClassifier is not None else "RuleBasedModel",
+        "sklearn": getattr(sklearn, "__version__", None),
+        "params": params,
+        "features": list(FEATURES),
+        "classes": list(DISASTER_CLASSES),
+    }
+    payload = json.dumps({"data": data, "config": config}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def train_and_save(n_per_class: int = 1500, prefer_csv: bool = True, params: dict | None = None, force: bool = False):
+    """Train model, preferring CSV datasets when available.
+    params overrides the forest hyperparameters; by default DEFAULT_RF_PARAMS are merged
+    with the best configuration persisted by the last hyperparameter search.
+    Unless force=True, training is skipped when the saved model was built from the same
+    data and config (see training_fingerprint); the existing meta is returned with skipped=True.
+    The saved fingerprint describes the data actually loaded: CSVs that failed to load and
+    fell back to synthetic data are recorded as such (with the CSV fingerprint under
+    fallback_for, so the same unreadable files do not retrain on every run).
+    """
+    if params is None:
+        params = {**DEFAULT_RF_PARAMS, **load_best_params()}
+
+    expected = training_fingerprint(n_per_class=n_per_class, prefer_csv=prefer_csv, params=params)
+    if not force and MODEL_PATH.exists():
+        prev_meta = load_meta()
+        if expected in (prev_meta.get("fingerprint"), prev_meta.get("fallback_for")):
+            return {**prev_meta, "skipped": True}
 
-    if X is None or y is None:
-        X, y = _generate_balanced_synthetic(n_per_class=n_per_class)
+    X, y, data = _load_training_data(n_per_class=n_per_class, prefer_csv=prefer_csv)
+    fingerprint = training_fingerprint(params=params, data=data)
+    fallback_for = expected if fingerprint != expected else None
 
     if RandomForestClassifier is None:
         model = RuleBasedModel()
@@ -233,16 +319,18 @@ def train_and_save(n_per_class: int = 1500, prefer_csv: bool = True):
             "features": list(FEATURES),
             "classes": list(DISASTER_CLASSES),
             "accuracy": None,
+            "data_source": next(iter(data)),
+            "fingerprint": fingerprint,
+            "fallback_for": fallback_for,
         }
         save_model(model, meta)
         return meta
 
     # encode labels
-    class_to_idx = {c: i for i, c in enumerate(DISASTER_CLASSES)}
-    y_idx = np.array([class_to_idx[c] for c in y])
+    y_idx = encode_labels(y)
 
     X_train, X_test, y_train, y_test = train_test_split(X, y_idx, test_size=0.2, random_state=42, stratify=y_idx)
-    rf = RandomForestClassifier(n_estimators=300, max_depth=None, random_state=42, n_jobs=-1)
+    rf = RandomForestClassifier(**params, random_state=42, n_jobs=-1)
     rf.fit(X_train, y_train)
     preds = rf.predict(X_test)
     acc = float((preds == y_test).mean())
@@ -253,6 +341,237 @@ def train_and_save(n_per_class: int = 1500, prefer_csv: bool = True):
         "features": list(FEATURES),
         "classes": list(DISASTER_CLASSES),
         "accuracy": acc,
+        "params": params,
+        "data_source": next(iter(data)),
+        "fingerprint": fingerprint,
+        "fallback_for": fallback_for,
     }
     save_model(rf, meta)
     return meta
+
+
+def encode_labels(y) -> np.ndarray:
+    class_to_idx = {c: i for i, c in enumerate(DISASTER_CLASSES)}
+    return np.array([class_to_idx[c] for c in y])
+
+
+def _with_class_coverage(X: np.ndarray, y_idx: np.ndarray):
+    """Append zero-weight rows for classes missing from a batch.
+    Warm-started trees must see every class label to keep the existing probability layout;
+    the padding rows copy the first sample so they cannot influence any split.
+    """
+    missing = np.setdiff1d(np.arange(len(DISASTER_CLASSES)), y_idx)
+    weights = np.ones(len(y_idx))
+    if len(missing):
+        X = np.vstack([X, np.repeat(X[:1], len(missing), axis=0)])
+        y_idx = np.concatenate([y_idx, missing])
+        weights = np.concatenate([weights, np.zeros(len(missing))])
+    return X, y_idx, weights
+
+
+def _parse_trained_at(value) -> float | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def train_incremental(X_new=None, y_new=None, n_new_trees: int = 50, max_trees: int = 300):
+    """Update the persisted model from newly ingested rows only, without a full refit.
+    Forests grow n_new_trees trees on the new batch and retire the oldest beyond max_trees;
+    gradient boosting appends n_new_trees stages; estimators with partial_fit are updated in place.
+    When no rows are passed, CSVs modified since the last training run are used.
+    Falls back to a full train_and_save() if no model exists yet.
+    """
+    model = load_model()
+    prev_meta = load_meta()
+    if model is None:
+        return train_and_save()
+
+    if X_new is None or y_new is None:
+        base_dir = Path(__file__).resolve().parents[2]
+        since = _parse_trained_at(prev_meta.get("trained_at"))
+        try:
+            X_new, y_new = load_csv_dataset(base_dir, modified_after=since)
+        except Exception:
+            X_new = y_new = None
+
+    if X_new is None or y_new is None or len(y_new) == 0:
+        return {**prev_meta, "mode": "incremental", "incremental_rows": 0}
+
+    X_new = np.asarray(X_new, dtype=float)
+    y_idx = encode_labels(y_new)
+    # train_streaming() persists Pipeline([scaler, SGDClassifier])
+    pipeline = Pipeline is not None and isinstance(model, Pipeline)
+    if pipeline:
+        # Streaming models: impute like train_streaming so scoring and updates see no NaN
+        X_new = np.where(np.isnan(X_new), model[0].mean_, X_new)
+
+    # Prequential accuracy: score the current model on the batch before learning from it
+    batch_acc = None
+    if hasattr(model, "predict"):
+        preds = np.asarray(model.predict(X_new))
+        if preds.dtype.kind in "iu":
+            batch_acc = float((preds == y_idx).mean())
+        else:
+            batch_acc = float((preds == np.asarray(DISASTER_CLASSES)[y_idx]).mean())
+
+    if isinstance(model, RuleBasedModel):
+        # Heuristic model has nothing to learn
+        return {**prev_meta, "mode": "incremental", "incremental_rows": 0, "batch_accuracy": batch_acc}
+
+    if RandomForestClassifier is not None and isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        X_fit, y_fit, w_fit = _with_class_coverage(X_new, y_idx)
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new_trees)
+        model.fit(X_fit, y_fit, sample_weight=w_fit)
+        if len(model.estimators_) > max_trees:
+            model.estimators_ = model.estimators_[-max_trees:]
+        model.set_params(warm_start=False, n_estimators=len(model.estimators_))
+    elif GradientBoostingClassifier is not None and isinstance(model, GradientBoostingClassifier):
+        X_fit, y_fit, w_fit = _with_class_coverage(X_new, y_idx)
+        model.set_params(warm_start=True, n_estimators=model.n_estimators_ + n_new_trees)
+        model.fit(X_fit, y_fit, sample_weight=w_fit)
+        model.set_params(warm_start=False)
+    elif pipeline and hasattr(model[-1], "partial_fit"):
+        # Keep the fitted scaling: the classifier's weights are only valid for it
+        model[-1].partial_fit(model[:-1].transform(X_new), y_idx, classes=np.arange(len(DISASTER_CLASSES)))
+    elif hasattr(model, "partial_fit"):
+        model.partial_fit(X_new, y_idx, classes=np.arange(len(DISASTER_CLASSES)))
+    else:
+        raise ValueError(f"{type(model).__name__} does not support incremental training")
+
+    meta = {
+        **prev_meta,
+        "model": type(model[-1] if pipeline else model).__name__,
+        "trained_at": datetime.utcnow().isoformat() + "Z",
+        "mode": "incremental",
+        "incremental_rows": int(len(y_idx)),
+        "batch_accuracy": batch_acc,
+        # No longer the product of a full training run on the fingerprinted inputs
+        "fingerprint": None,
+    }
+    # The held-out accuracy describes the last full fit, not the updated model
+    meta["accuracy_at_full_fit"] = meta.pop("accuracy", prev_meta.get("accuracy_at_full_fit"))
+    save_model(model, meta)
+    return meta
+
+
+def _validation_mask(file_idx: int, chunk_idx: int, n: int, fraction: float, seed: int = 42) -> np.ndarray:
+    # Seeded per chunk position, so every pass over the data holds out the same rows
+    rng = np.random.default_rng([seed, file_idx, chunk_idx])
+    return rng.random(n) < fraction
+
+
+def train_streaming(
+    chunk_size: int = 50000,
+    epochs: int = 1,
+    val_fraction: float = 0.2,
+    checkpoint_every: int = 10,
+    resume: bool = True,
+):
+    """Out-of-core training over the CSV datasets, reading them chunk by chunk.
+    Pass 1 accumulates scaling/imputation statistics and class counts, pass 2 runs
+    SGD epochs on the training split, pass 3 scores the held-out split. Progress is
+    checkpointed every checkpoint_every chunks and resumed unless resume=False or the
+    data files/parameters changed. Memory use is bounded by chunk_size, not dataset size.
+    """
+    if SGDClassifier is None:
+        raise RuntimeError("scikit-learn is required for streaming training. Install via: pip install scikit-learn")
+
+    base_dir = Path(__file__).resolve().parents[2]
+    files = list_csv_files(base_dir)
+    if not files:
+        raise FileNotFoundError("No CSV files found in data/raw, data, dataset, or datasets directories.")
+
+    signature = files_signature(files)
+    params = {"chunk_size": chunk_size, "epochs": epochs, "val_fraction": val_fraction}
+    n_classes = len(DISASTER_CLASSES)
+    classes = np.arange(n_classes)
+
+    state = load_checkpoint() if resume else None
+    if not state or state.get("signature") != signature or state.get("params") != params:
+        state = {
+            "signature": signature,
+            "params": params,
+            "stage": "stats",
+            "epoch": 0,
+            "next": (0, 0),
+            "scaler": StandardScaler(),
+            "class_counts": np.zeros(n_classes),
+            "model": SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42),
+            "rows_seen": 0,
+        }
+    scaler = state["scaler"]
+    model = state["model"]
+
+    def checkpoint(next_pos):
+        state["next"] = next_pos
+        save_checkpoint(state)
+
+    def prepare(X, y):
+        # Mean-impute and 5-sigma clip with the streamed statistics, then scale
+        X = np.where(np.isnan(X), scaler.mean_, X)
+        keep = np.all(np.abs(X - scaler.mean_) <= 5 * scaler.scale_, axis=1)
+        return scaler.transform(X[keep]), encode_labels(y[keep]), keep
+
+    # Pass 1: streaming statistics
+    if state["stage"] == "stats":
+        for done, (fi, ci, X, y) in enumerate(iter_csv_chunks(files, chunk_size, start=state["next"]), 1):
+            scaler.partial_fit(X)
+            state["class_counts"] += np.bincount(encode_labels(y), minlength=n_classes)
+            if done % checkpoint_every == 0:
+                checkpoint((fi, ci + 1))
+        if not hasattr(scaler, "mean_"):
+            raise ValueError("No training rows: the CSV datasets contain no data rows.")
+        # Columns that were never observed impute to 0 and scale as-is
+        scaler.mean_ = np.nan_to_num(scaler.mean_)
+        scaler.scale_ = np.where(np.isfinite(scaler.scale_) & (scaler.scale_ > 0), scaler.scale_, 1.0)
+        state.update(stage="train", next=(0, 0))
+        save_checkpoint(state)
+
+    # Balance classes through sample weights; oversampling would need the whole dataset
+    counts = state["class_counts"]
+    class_weight = np.where(counts > 0, counts.sum() / (n_classes * np.maximum(counts, 1)), 0.0)
+
+    # Pass 2: SGD epochs over the training split
+    while state["epoch"] < epochs:
+        for done, (fi, ci, X, y) in enumerate(iter_csv_chunks(files, chunk_size, start=state["next"]), 1):
+            val = _validation_mask(fi, ci, len(y), val_fraction)
+            Xs, ys, keep = prepare(X, y)
+            train = ~val[keep]
+            if train.any():
+                model.partial_fit(Xs[train], ys[train], classes=classes, sample_weight=class_weight[ys[train]])
+                state["rows_seen"] += int(train.sum())
+            if done % checkpoint_every == 0:
+                checkpoint((fi, ci + 1))
+        state["epoch"] += 1
+        state["next"] = (0, 0)
+        save_checkpoint(state)
+    if not state["rows_seen"]:
+        raise ValueError("No training rows: every row was held out for validation or filtered as an outlier.")
+
+    # Pass 3: streaming evaluation on the held-out rows
+    correct = total = 0
+    for fi, ci, X, y in iter_csv_chunks(files, chunk_size):
+        val = _validation_mask(fi, ci, len(y), val_fraction)
+        Xs, ys, keep = prepare(X, y)
+        held_out = val[keep]
+        if held_out.any():
+            correct += int((model.predict(Xs[held_out]) == ys[held_out]).sum())
+            total += int(held_out.sum())
+
+    meta = {
+        "model": "SGDClassifier",
+        "trained_at": datetime.utcnow().isoformat() + "Z",
+        "features": list(FEATURES),
+        "classes": list(DISASTER_CLASSES),
+        "accuracy": (correct / total) if total else None,
+        "mode": "streaming",
+        "rows_seen": state["rows_seen"],
+        "validation_rows": total,
+    }
+    save_model(Pipeline([("scaler", scaler), ("clf", model)]), meta)
+    clear_checkpoint()
+    return meta
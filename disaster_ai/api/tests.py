@@ -1,3 +1,816 @@
-from django.test import TestCase
+import csv
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.test import TestCase, TransactionTestCase
+
+from .models import DisasterPrediction, DisasterRollup, HistoricalDisaster, PredictionRequest
+from .pipeline import model_store, trainer
+from .pipeline.alerts import AlertDispatcher, HttpSink, _Spool
+from .pipeline.audit import AuditWriter
+from .pipeline.data_version import history_version
+from .pipeline.response_cache import ResponseCache, history_cache, prediction_cache
+from .pipeline.suppression import AlertSuppressor
+
+
+class PipelineTestCase(TestCase):
+    """Keeps the files the pipeline writes next to the models out of the repository."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        original = history_version.path
+        history_version.path = self.tmp / "history_version.json"
+        self.addCleanup(setattr, history_version, "path", original)
+        history_cache.clear()
+
+    def disaster(self, **fields):
+        values = {
+            "type": "flood", "state": "Kerala", "district": "Ernakulam", "date": date(2023, 7, 14),
+            "severity": "high", "casualties": 2, "damage_estimate": 1000,
+        }
+        values.update(fields)
+        return HistoricalDisaster.objects.create(**values)
+
+
+class RollupTests(PipelineTestCase):
+    def bucket(self, month):
+        return DisasterRollup.objects.get(type="flood", state_key="kerala", month=month)
+
+    def test_counts_follow_create_update_and_delete(self):
+        first = self.disaster()
+        self.disaster(date=date(2023, 7, 2), casualties=3)
+        july = self.bucket(date(2023, 7, 1))
+        self.assertEqual((july.count, july.casualties), (2, 5))
+
+        first.date = date(2023, 8, 5)
+        first.save()
+        self.assertEqual(self.bucket(date(2023, 7, 1)).count, 1)
+        self.assertEqual(self.bucket(date(2023, 8, 1)).count, 1)
+
+        first.delete()
+        self.assertFalse(DisasterRollup.objects.filter(month=date(2023, 8, 1)).exists())
+
+    def test_string_date(self):
+        row = self.disaster(date="2023-07-01")
+        self.assertEqual(self.bucket(date(2023, 7, 1)).count, 1)
+        row.delete()
+        self.assertFalse(DisasterRollup.objects.exists())
+
+
+class HistoricalPaginationTests(PipelineTestCase):
+    def test_cursor_round_trip(self):
+        for day in range(1, 8):
+            self.disaster(date=date(2023, 7, day))
+            self.disaster(date=date(2023, 7, day), state="Assam")
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 4, "fields": "state"}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get("/api/historical/disasters/", params, HTTP_ORIGIN="http://localhost:3000")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("X-Next-Cursor", response["Access-Control-Expose-Headers"])
+            seen.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            self.assertIn(f"cursor={cursor}", response["Link"])
+
+        expected = list(HistoricalDisaster.objects.order_by("-date", "-id").values_list("id", flat=True))
+        self.assertEqual([row["id"] for row in seen], expected)
+        self.assertEqual(set(seen[0]), {"id", "date", "state"})
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/historical/disasters/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportTests(PipelineTestCase):
+    def setUp(self):
+        super().setUp()
+        self.disaster()
+        self.disaster(district="Idukki", date=date(2024, 8, 1))
+        self.disaster(state="Odisha", type="cyclone")
+
+    def download(self, **params):
+        response = self.client.get("/api/historical/export/", params)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_formats(self):
+        response, body = self.download(format="json", fields="district")
+        self.assertTrue(response["Content-Type"].startswith("application/json"))
+        rows = json.loads(body)
+        self.assertEqual([r["district"] for r in rows][:2], ["Idukki", "Ernakulam"])
+        self.assertEqual(set(rows[0]), {"id", "date", "district"})
+
+        response, body = self.download(state="kerala")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="historical_disasters.ndjson"')
+        self.assertEqual(len([json.loads(line) for line in body.splitlines()]), 2)
+
+        response, body = self.download(format="csv", type="cyclone", fields="state")
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        lines = list(csv.reader(body.decode().splitlines()))
+        self.assertEqual(len(lines), 2)
+        self.assertIn("Odisha", lines[1])
+
+    def test_gzip(self):
+        import gzip
+
+        response, body = self.download(format="csv", gzip="1")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="historical_disasters.csv.gz"')
+        self.assertEqual(gzip.decompress(body), self.download(format="csv")[1])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get("/api/historical/export/", {"format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/historical/export/", {"fields": "nope"}).status_code, 400)
+        self.assertEqual(self.client.post("/api/historical/export/").status_code, 405)
+
+
+class LiveStreamTests(TestCase):
+    def test_event_stream_resumes_after_last_event_id(self):
+        from .pipeline.live_feed import live_events
+
+        first = live_events.append({"location": "Pune", "disaster": "Flood"})
+        second = live_events.append({"location": "Kochi", "disaster": "Cyclone"})
+        with self.settings(LIVE_FEED_SSE_MAX_SECONDS=0.2):
+            response = self.client.get("/api/live-feed/stream/", HTTP_ACCEPT="text/event-stream", HTTP_LAST_EVENT_ID=str(first))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            body = b"".join(response.streaming_content).decode()
+        self.assertTrue(body.startswith("retry: 3000\n\n"))
+        self.assertIn(f"id: {second}\nevent: prediction\n", body)
+        self.assertNotIn(f"id: {first}\n", body)
+        self.assertIn('"location": "Kochi"', body)
+
+    def test_bad_cursor(self):
+        response = self.client.get("/api/live-feed/stream/", {"since": "soon"}, HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, 400)
+
+
+class VersionedResponseTests(PipelineTestCase):
+    def test_etag_not_modified_until_history_changes(self):
+        self.disaster()
+        first = self.client.get("/api/historical/disasters/")
+        etag = first["ETag"]
+        self.assertEqual(first.status_code, 200)
+
+        again = self.client.get("/api/historical/disasters/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], etag)
+
+        self.disaster(district="Idukki")
+        changed = self.client.get("/api/historical/disasters/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+        self.assertEqual(len(changed.json()), 2)
+
+    def test_back_to_back_bumps_are_seen(self):
+        versions = {history_version.bump() for _ in range(20)}
+        self.assertEqual(len(versions), 20)
+        for _ in range(20):
+            version = history_version.bump()
+            self.assertEqual(history_version.current()[0], version)
+
+
+class ResponseCacheTests(PipelineTestCase):
+    def test_least_recently_used_entry_evicted(self):
+        cache = ResponseCache(ttl_seconds=60, max_entries=2)
+        cache.put("a", "v1", 1)
+        cache.put("b", "v1", 2)
+        self.assertEqual(cache.get("a", "v1")[0], 1)
+        cache.put("c", "v1", 3)
+        self.assertIsNone(cache.get("b", "v1"))
+        self.assertEqual((cache.get("a", "v1")[0], cache.get("c", "v1")[0]), (1, 3))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_entries_expire_after_ttl(self):
+        cache = ResponseCache(ttl_seconds=10)
+        with mock.patch("api.pipeline.response_cache.time.monotonic", return_value=100.0):
+            cache.put("a", "v1", 1)
+        with mock.patch("api.pipeline.response_cache.time.monotonic", return_value=109.0):
+            self.assertEqual(cache.get("a", "v1"), (1, 9.0))
+        with mock.patch("api.pipeline.response_cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a", "v1"))
+        self.assertEqual(cache.stats()["expired"], 1)
+
+    def test_new_version_empties_cache(self):
+        cache = ResponseCache(ttl_seconds=60)
+        cache.put("a", "v1", 1)
+        cache.put("b", "v1", 2)
+        self.assertIsNone(cache.get("a", "v2"))
+        self.assertIsNone(cache.get("b", "v1"))
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+    def test_prediction_cached_until_model_version_changes(self):
+        prediction_cache.clear()
+        version = mock.Mock(return_value="v1")
+
+        def post():
+            return self.client.post("/api/predict/", {"location": "Pune"}, content_type="application/json").json()
+
+        with mock.patch("api.views.model_version", version), \
+                mock.patch("api.views.features_for_location", return_value=({"rainfall": 50.0}, "live")) as features, \
+                mock.patch("api.views.current_model", return_value=trainer.RuleBasedModel()), \
+                mock.patch("api.views.audit_log"):
+            self.assertFalse(post()["metadata"]["cached"])
+            self.assertTrue(post()["metadata"]["cached"])
+            self.assertEqual(features.call_count, 1)
+            version.return_value = "v2"
+            self.assertFalse(post()["metadata"]["cached"])
+            self.assertEqual(features.call_count, 2)
+
+    def test_history_payload_rebuilt_when_data_version_changes(self):
+        from .pipeline.history import history_page
+
+        self.disaster()
+        with mock.patch("api.views.history_page", side_effect=history_page) as page:
+            self.client.get("/api/historical/disasters/")
+            self.client.get("/api/historical/disasters/")
+            self.assertEqual(page.call_count, 1)
+            self.disaster(district="Idukki")
+            self.assertEqual(len(self.client.get("/api/historical/disasters/").json()), 2)
+            self.assertEqual(page.call_count, 2)
+
+
+class NearbyTests(PipelineTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mumbai = self.disaster(district="Mumbai", coordinates={"lat": 19.076, "lon": 72.8777})
+        self.thane = self.disaster(district="Thane", date=date(2023, 8, 1), coordinates={"lat": 19.2183, "lon": 72.9781})
+        self.pune = self.disaster(district="Pune", coordinates={"lat": 18.5204, "lon": 73.8567})
+        self.fiji_east = self.disaster(district="Taveuni", coordinates={"lat": -16.85, "lon": 179.95})
+        self.fiji_west = self.disaster(district="Lau", coordinates={"lat": -16.85, "lon": -179.9})
+
+    def get(self, **params):
+        return self.client.get("/api/historical/nearby/", params)
+
+    def test_radius_nearest_first(self):
+        response = self.get(lat=19.076, lon=72.8777, radius_km=50, fields="district")
+        rows = response.json()
+        self.assertEqual([r["id"] for r in rows], [self.mumbai.id, self.thane.id])
+        self.assertEqual(rows[0]["distance_km"], 0.0)
+        # lat/lon are only read to compute distances
+        self.assertEqual(set(rows[0]), {"id", "date", "district", "distance_km"})
+
+    def test_radius_across_antimeridian(self):
+        rows = self.get(lat=-16.85, lon=179.99, radius_km=50).json()
+        self.assertEqual({r["id"] for r in rows}, {self.fiji_east.id, self.fiji_west.id})
+
+    def test_bbox_newest_first_with_limit(self):
+        rows = self.get(bbox="18,72,20,74", limit=2).json()
+        self.assertEqual([r["id"] for r in rows], [self.thane.id, self.pune.id])
+
+    def test_bbox_too_large(self):
+        self.assertEqual(self.get(bbox="0,0,40,40").status_code, 400)
+
+
+class RiskIndexTests(PipelineTestCase):
+    def setUp(self):
+        super().setUp()
+        from .pipeline import risk_index as risk_index_module
+
+        self.index = risk_index_module.RiskIndex(self.tmp / "risk_index.npz")
+        patcher = mock.patch.object(risk_index_module, "risk_index", self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_build_save_load_and_lookup(self):
+        from .pipeline.risk_index import RISK_TYPES, RiskIndex
+
+        self.disaster()
+        self.disaster(severity="critical")
+        self.disaster(district="Idukki", severity="low")
+        DisasterPrediction.objects.create(
+            type="flood", location="Ernakulam, Kerala", predicted_date=date(2026, 10, 1), severity="high",
+            confidence="0.9", probability=0.9, model_used="random_forest", input_features={},
+        )
+        stats = self.index.refresh()
+        self.assertEqual((stats["keys"], stats["history_rows"], stats["new_predictions"]), (2, 3, 1))
+
+        loaded = RiskIndex(self.tmp / "risk_index.npz")
+        result = loaded.assess(["ernakulam", {"district": "Idukki"}, "Nowhere"])
+        self.assertEqual(result["found"].tolist(), [True, True, False])
+        self.assertEqual(result["events"].tolist(), [2, 1, 0])
+        self.assertAlmostEqual(float(result["model"][0][RISK_TYPES.index("flood")]), 0.9, places=5)
+        self.assertTrue(result["score"][0] > result["score"][1])
+        self.assertTrue(np.isnan(result["score"][2]))
+
+    def test_edited_rows_trigger_full_rebuild(self):
+        self.disaster()
+        row = self.disaster(district="Idukki")
+        self.index.refresh()
+
+        row.casualties = 10
+        row.save()
+        self.assertFalse(self.index.stale_path.exists())
+
+        row.district = "Ernakulam"
+        row.save()
+        self.assertTrue(self.index.stale_path.exists())
+        self.index.refresh()
+        self.assertFalse(self.index.stale_path.exists())
+        result = self.index.assess(["Ernakulam", "Idukki"])
+        self.assertEqual(result["events"].tolist(), [2, 0])
+        self.assertEqual(self.index.stats()["keys"], 1)
+
+
+class FeatureStoreTests(PipelineTestCase):
+    def test_rows_survive_segment_rollover_and_reopen(self):
+        from .pipeline.feature_store import FeatureStore
+
+        store = FeatureStore(self.tmp / "features", segment_rows=4)
+        now = time.time()
+        for i in range(10):
+            # Out of order on purpose: the newest row is not the last one appended
+            stamp = now - 600 + (i if i != 7 else 20) * 10
+            store.append("Kochi, Kerala", {"rainfall": float(i), "humidity": 80.0}, timestamp=stamp, freshness={"weather": i * 1.5})
+        self.assertFalse(store.append("Unknown", {"rainfall": 1.0}, create=False))
+
+        reopened = FeatureStore(self.tmp / "features", segment_rows=4)
+        self.assertEqual(reopened.locations(), ["Kochi, Kerala"])
+        self.assertEqual(reopened.stats()["rows"], 10)
+        latest = reopened.latest("Kochi, Kerala", max_age=3600)
+        self.assertEqual((latest["rainfall"], latest["age_weather"]), (7.0, 10.5))
+        self.assertNotIn("age_seismic", latest)
+        self.assertIsNone(reopened.latest("Kochi, Kerala", max_age=60))
+
+        ts, values = reopened.read("Kochi, Kerala", columns=["rainfall", "age_weather"])
+        self.assertEqual(len(ts), 10)
+        self.assertTrue((np.diff(ts) >= 0).all())
+        self.assertEqual(values[-1].tolist(), [7.0, 10.5])
+        ts, _ = reopened.read("Kochi, Kerala", start=now - 600, end=now - 600 + 30)
+        self.assertEqual(len(ts), 3)
+
+        # Appending after the reopen continues the open segment instead of starting over
+        reopened.append("Kochi, Kerala", {"rainfall": 99.0}, timestamp=now)
+        self.assertEqual(FeatureStore(self.tmp / "features").latest("Kochi, Kerala")["rainfall"], 99.0)
+        self.assertEqual(len(list((self.tmp / "features").glob("*/*.values.npy"))), 3)
+
+
+class PartitionTests(TestCase):
+    keys = [f"location-{i}" for i in range(2000)]
+
+    def test_assignment_is_stable(self):
+        from .pipeline.partition import HashRing
+
+        first = HashRing(["a", "b", "c"])
+        second = HashRing(["c", "a", "b", "a"])
+        self.assertEqual([first.owner(k) for k in self.keys], [second.owner(k) for k in self.keys])
+        self.assertEqual(set(first.owner(k) for k in self.keys), {"a", "b", "c"})
+        self.assertIsNone(HashRing([]).owner("Pune"))
+
+    def test_join_and_leave_move_few_keys(self):
+        from .pipeline.partition import HashRing
+
+        before = HashRing(["a", "b", "c"])
+        joined = HashRing(["a", "b", "c", "d"])
+        moved = [k for k in self.keys if before.owner(k) != joined.owner(k)]
+        # Only keys taken over by the new node move, about a quarter of them
+        self.assertTrue(all(joined.owner(k) == "d" for k in moved))
+        self.assertLess(len(moved) / len(self.keys), 0.4)
+
+        left = HashRing(["a", "c"])
+        moved = [k for k in self.keys if before.owner(k) != left.owner(k)]
+        self.assertTrue(all(before.owner(k) == "b" for k in moved))
+        self.assertLess(len(moved) / len(self.keys), 0.5)
+
+    def test_expired_leases_drop_off_the_ring(self):
+        from datetime import datetime, timedelta, timezone
+        from .models import PipelineNode
+        from .pipeline.partition import ClusterMembership
+
+        now = datetime.now(timezone.utc)
+        PipelineNode.objects.create(node_id="live", hostname="h1", heartbeat_at=now, lease_expires_at=now + timedelta(seconds=30))
+        PipelineNode.objects.create(node_id="dead", hostname="h2", heartbeat_at=now, lease_expires_at=now - timedelta(seconds=1))
+        membership = ClusterMembership("self", lease_seconds=30)
+        self.assertTrue(membership.heartbeat())
+        self.assertEqual(membership.members(), ["live", "self"])
+        self.assertFalse(membership.heartbeat())
+
+        PipelineNode.objects.filter(node_id="live").update(lease_expires_at=now - timedelta(seconds=1))
+        self.assertTrue(membership.heartbeat())
+        self.assertEqual(membership.members(), ["self"])
+        self.assertTrue(all(membership.owns(k) for k in self.keys[:50]))
+
+        membership.leave()
+        self.assertFalse(PipelineNode.objects.filter(node_id="self").exists())
+
+
+class SchedulerScoringTests(TestCase):
+    def test_location_scored_once_per_cycle(self):
+        from .pipeline import scheduler as scheduler_module
+
+        sched = scheduler_module._Scheduler()
+        sources = ("weather", "seismic", "satellite")
+        jobs = [scheduler_module._FetchJob(source, "Pune", 18.52, 73.86, 3600, 0.1) for source in sources]
+        fetchers = {source: (lambda lat, lon, source=source: {f"{source}_value": 1.0}) for source in sources}
+        now = time.time()
+        for job in jobs:
+            sched._jobs[job.key] = job
+            sched._due[job.key] = now
+        with mock.patch.dict(scheduler_module.SOURCE_FETCHERS, fetchers), mock.patch.object(sched, "_score") as score:
+            for job in jobs:
+                del sched._due[job.key]
+                sched._running.add(job.key)
+                sched._run_job(job)
+            score.assert_called_once_with("Pune")
+
+            # Next cycle: one source alone, the others not due for an hour
+            sched._due.pop(jobs[0].key)
+            sched._running.add(jobs[0].key)
+            sched._run_job(jobs[0])
+            self.assertEqual(score.call_count, 2)
+
+
+class SchedulerLeadershipTests(PipelineTestCase):
+    def test_crashed_loop_releases_lock_and_retries(self):
+        from .pipeline import scheduler as scheduler_module
+        from .pipeline.leader import FileLeaderLock
+
+        sched = scheduler_module._Scheduler()
+        sched._lock = FileLeaderLock(self.tmp / "scheduler.lock")
+        calls = []
+
+        def loop():
+            calls.append(time.time())
+            self.assertTrue(sched.is_leader)
+            if len(calls) < 3:
+                raise RuntimeError("boom")
+            sched._stop.set()
+
+        with self.settings(PIPELINE_LEADER_RETRY_SECONDS=0.01, PIPELINE_LEADER_MAX_RETRY_SECONDS=0.02), \
+                mock.patch.object(sched, "_loop", side_effect=loop), \
+                self.assertLogs(scheduler_module.logger, "ERROR") as logs:
+            sched._run()
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(len(logs.records), 2)
+        self.assertFalse(sched.is_leader)
+
+    def test_management_commands_do_not_start_scheduler(self):
+        from .pipeline import scheduler as scheduler_module
+
+        for argv, expected in (
+            (["manage.py", "check"], False),
+            (["manage.py", "migrate"], False),
+            (["/srv/app/manage.py", "runserver", "--noreload"], True),
+            (["/usr/bin/gunicorn", "disaster_ai.wsgi"], True),
+        ):
+            with self.subTest(argv=argv), mock.patch.object(scheduler_module.sys, "argv", argv):
+                self.assertIs(scheduler_module._is_server_process(), expected)
+
+        sched = scheduler_module._Scheduler()
+        with self.settings(PIPELINE_SCHEDULER_ENABLED=True), \
+                mock.patch.object(scheduler_module.sys, "argv", ["manage.py", "check"]):
+            sched.start()
+        self.assertIsNone(sched._thread)
+
+
+class PollingPolicyTests(TestCase):
+    def proba(self, risk):
+        proba = [0.0] * len(trainer.DISASTER_CLASSES)
+        proba[trainer.DISASTER_CLASSES.index("none")] = 1.0 - risk
+        proba[trainer.DISASTER_CLASSES.index("flood")] = risk
+        return proba
+
+    def test_short_base_intervals_never_slow_down_near_threshold(self):
+        from .pipeline.polling import AdaptivePollingPolicy
+
+        policy = AdaptivePollingPolicy(threshold=0.7, min_interval=300, max_interval=3600)
+        self.assertEqual(policy.interval_for("Pune", 60), 60)
+        policy.observe("Pune", self.proba(0.4))
+        self.assertEqual(policy.interval_for("Pune", 60), 60)
+        self.assertEqual(policy.interval_for("Pune", 900), 900)
+        policy.observe("Pune", self.proba(0.6))
+        self.assertEqual(policy.interval_for("Pune", 60), 60)
+        self.assertEqual(policy.interval_for("Pune", 900), 300)
+
+    def test_calm_locations_back_off_up_to_max(self):
+        from .pipeline.polling import AdaptivePollingPolicy
+
+        policy = AdaptivePollingPolicy(threshold=0.7, min_interval=300, max_interval=3600)
+        for _ in range(10):
+            policy.observe("Pune", self.proba(0.01))
+        self.assertEqual(policy.interval_for("Pune", 900), 3600)
+
+
+class _StubAlertServer(ThreadingHTTPServer):
+    """Local endpoint that answers 503 to the first `failures` POSTs, then records alerts."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.received = []
+        self.lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(handler):
+                body = json.loads(handler.rfile.read(int(handler.headers["Content-Length"])))
+                with self.lock:
+                    failing = self.failures > 0
+                    if failing:
+                        self.failures -= 1
+                    else:
+                        self.received.append(body)
+                handler.send_response(503 if failing else 201)
+                handler.send_header("Content-Length", "0")
+                handler.end_headers()
+
+            def log_message(handler, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/alerts"
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class AlertDeliveryTests(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def wait_for(self, condition, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("timed out")
+            time.sleep(0.02)
+
+    def test_spooled_alerts_replayed_in_order(self):
+        server = _StubAlertServer(failures=2)
+        self.addCleanup(server.close)
+        dispatcher = AlertDispatcher(
+            [HttpSink(server.url, timeout=2)], name="test", spool_dir=self.tmp,
+            flush_interval=0.05, backoff_base=0.05, backoff_max=0.1,
+        )
+        self.addCleanup(dispatcher.close)
+        for i in range(5):
+            dispatcher.publish({"location": "Pune", "n": i})
+            time.sleep(0.06)
+        self.wait_for(lambda: len(server.received) == 5)
+        self.assertEqual([a["n"] for a in server.received], list(range(5)))
+        stats = dispatcher.stats()["sinks"][0]
+        self.assertEqual((stats["delivered"], stats["spool"]["segments"]), (5, 0))
+        self.assertGreaterEqual(stats["failures"], 1)
+
+    def test_replay_claimed_by_one_process(self):
+        server = _StubAlertServer()
+        self.addCleanup(server.close)
+        _Spool(self.tmp / "test" / "0-http", 1 << 20).append([{"n": 0}, {"n": 1}])
+        # Two dispatchers on one spool directory stand in for two worker processes
+        first, second = (
+            AlertDispatcher([HttpSink(server.url, timeout=2)], name="test", spool_dir=self.tmp)
+            for _ in range(2)
+        )
+        self.assertTrue(second._states[0].spool.claim())
+        first._replay(first._states[0])
+        self.assertEqual(server.received, [])
+        second._replay_claimed(second._states[0])
+        second._states[0].spool.release()
+        first._replay(first._states[0])
+        self.assertEqual([a["n"] for a in server.received], [0, 1])
+
+
+class AlertSuppressionTests(TestCase):
+    def test_duplicates_suppressed_until_escalation_or_window(self):
+        suppressor = AlertSuppressor(window_seconds=600)
+        high = {"location": "Pune", "disaster": "Flood", "risk_level": "High"}
+        severe = {**high, "risk_level": "Severe"}
+        events = [
+            [e["event"] for e in suppressor.process("Pune", alert, now=now)]
+            for alert, now in ((high, 0), (high, 60), (severe, 120), (high, 180), (high, 800), (None, 900))
+        ]
+        self.assertEqual(events, [["onset"], [], ["escalation"], [], ["repeat"], ["cleared"]])
+        self.assertEqual(suppressor.stats()["suppressed"], 2)
+
+
+class BatchPredictionTests(TestCase):
+    item = {"temperature": 31, "humidity": 90, "rainfall": 180, "wind_speed": 20}
+
+    def setUp(self):
+        patcher = mock.patch("api.pipeline.batch.current_model", return_value=trainer.RuleBasedModel())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def lines(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_json_and_ndjson_bodies(self):
+        body = json.dumps({"items": [self.item, self.item, "bad"]})
+        lines = self.lines(self.client.post("/api/predict/batch/", body, content_type="application/json"))
+        self.assertEqual(len(lines), 4)
+        self.assertIn("error", lines[2])
+        ndjson = "\n".join(json.dumps(self.item) for _ in range(3)) + "\nnot json\n"
+        lines = self.lines(self.client.post("/api/predict/batch/", ndjson, content_type="application/x-ndjson"))
+        self.assertEqual([("error" in line) for line in lines[:4]], [False, False, False, True])
+
+    def test_oversized_body_refused(self):
+        with self.settings(PIPELINE_BATCH_MAX_BODY_BYTES=100):
+            response = self.client.post("/api/predict/batch/", json.dumps([self.item] * 10), content_type="application/json")
+        self.assertEqual(response.status_code, 413)
+
+    def test_get_not_allowed(self):
+        self.assertEqual(self.client.get("/api/predict/batch/").status_code, 405)
+
+
+class AuditWriterTests(TransactionTestCase):
+    def test_batches_flushed_on_close(self):
+        writer = AuditWriter(batch_size=4, flush_interval=0.05)
+        for i in range(10):
+            self.assertTrue(writer.record(request_type="disaster_prediction", input_data={"i": i}, status="completed"))
+        writer.close()
+        self.assertEqual(PredictionRequest.objects.count(), 10)
+        stats = writer.stats()
+        self.assertEqual((stats["recorded"], stats["written"], stats["dropped"], stats["queue_depth"]), (10, 10, 0, 0))
+        self.assertGreaterEqual(stats["batches"], 3)
+
+    def test_full_queue_drops_records(self):
+        writer = AuditWriter(queue_size=2)
+        # No worker draining the queue
+        with mock.patch.object(writer, "_ensure_started"):
+            results = [writer.record(request_type="disaster_prediction", input_data={}) for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual((writer.stats()["recorded"], writer.stats()["dropped"]), (2, 1))
+
+
+class PredictDisasterTests(PipelineTestCase):
+    stored = {"temperature": 28.0, "humidity": 70.0, "rainfall": 12.0, "wind_speed": 10.0}
+    live = {"temperature": 33.0, "humidity": 95.0, "rainfall": 220.0, "wind_speed": 25.0}
+
+    def setUp(self):
+        super().setUp()
+        from .pipeline import feature_store as feature_store_module
+
+        self.store = feature_store_module.FeatureStore(self.tmp / "features", segment_rows=8)
+        self.collect = mock.Mock(return_value=dict(self.live))
+        for target, value in (
+            ("api.pipeline.feature_store.feature_store", self.store),
+            ("api.pipeline.predictor.collect_features", self.collect),
+            ("api.views.current_model", mock.Mock(return_value=trainer.RuleBasedModel())),
+            ("api.views.model_version", mock.Mock(return_value="2026-10-01T00:00:00")),
+            ("api.views.audit_log", mock.Mock()),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        prediction_cache.clear()
+
+    def predict(self, **body):
+        return self.client.post("/api/predict/", json.dumps(body), content_type="application/json")
+
+    def test_store_hit_skips_live_fetch(self):
+        self.store.append("Pune", self.stored)
+        response = self.predict(location="Pune", disaster_type="flood")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["metadata"]["feature_source"], "feature_store")
+        self.assertEqual(body["metadata"]["model_version"], "2026-10-01T00:00:00")
+        self.assertEqual([p["type"] for p in body["predictions"]], ["flood"])
+        self.collect.assert_not_called()
+        saved = DisasterPrediction.objects.get()
+        self.assertEqual(saved.input_features["features"], self.stored)
+        self.assertEqual(saved.model_version, "2026-10-01T00:00:00")
+
+    def test_store_miss_fetches_live(self):
+        response = self.predict(location={"city": "Kochi", "coordinates": {"lat": 9.93, "lon": 76.26}})
+        body = response.json()
+        self.assertEqual(body["metadata"]["feature_source"], "live")
+        self.collect.assert_called_once_with(9.93, 76.26)
+        self.assertEqual(len(body["predictions"]), 3)
+        # Request paths never start a new location in the store
+        self.assertEqual(self.store.locations(), [])
+
+    def test_stale_store_row_falls_back_to_live(self):
+        self.store.append("Pune", self.stored, timestamp=time.time() - 7200)
+        with self.settings(PIPELINE_FEATURE_MAX_AGE_SECONDS=3600):
+            body = self.predict(location="Pune", lat=18.52, lon=73.86).json()
+        self.assertEqual(body["metadata"]["feature_source"], "live")
+        # The location is already tracked, so the live values are recorded for the next request
+        self.assertEqual(self.store.latest("Pune")["rainfall"], self.live["rainfall"])
+
+    def test_overrides_replace_features(self):
+        self.store.append("Pune", self.stored)
+        body = self.predict(location="Pune", weather_data={"rainfall": 300}, humidity=99).json()
+        self.assertEqual(body["metadata"]["feature_source"], "feature_store+request")
+        features = DisasterPrediction.objects.first().input_features["features"]
+        self.assertEqual((features["rainfall"], features["humidity"], features["temperature"]), (300, 99, 28.0))
+
+    def test_unknown_disaster_type_rejected(self):
+        for kind in ("meteor", "none"):
+            response = self.predict(location="Pune", disaster_type=kind)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("flood", response.json()["error"])
+        self.assertFalse(DisasterPrediction.objects.exists())
+
+
+class TrainingTests(PipelineTestCase):
+    def setUp(self):
+        super().setUp()
+        for name, path in (("MODEL_PATH", "model.pkl"), ("META_PATH", "meta.json")):
+            patcher = mock.patch.object(model_store, name, self.tmp / path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(trainer, "MODEL_PATH", self.tmp / "model.pkl")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        checkpoint = self.tmp / "checkpoint.pkl"
+        for name, function in (
+            ("save_checkpoint", lambda state: model_store.save_checkpoint(state, checkpoint)),
+            ("load_checkpoint", lambda: model_store.load_checkpoint(checkpoint)),
+            ("clear_checkpoint", lambda: model_store.clear_checkpoint(checkpoint)),
+        ):
+            patcher = mock.patch.object(trainer, name, function)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write_csv(self, name, X, y):
+        path = self.tmp / name
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(trainer.FEATURES + ["label"])
+            writer.writerows([*row, label] for row, label in zip(X.tolist(), y))
+        return path
+
+    def test_streaming_then_incremental(self):
+        X, y = trainer._generate_balanced_synthetic(n_per_class=200)
+        files = [self.write_csv("train.csv", X, y)]
+        with mock.patch.object(trainer, "list_csv_files", return_value=files):
+            meta = trainer.train_streaming(chunk_size=500, resume=False)
+        self.assertEqual(meta["mode"], "streaming")
+        self.assertGreater(meta["accuracy"], 0.5)
+        full_fit_accuracy = meta["accuracy"]
+        self.assertFalse((self.tmp / "checkpoint.pkl").exists())
+
+        X_new, y_new = trainer._generate_balanced_synthetic(n_per_class=20, seed=7)
+        X_new[0, 0] = float("nan")
+        before = model_store.load_model()[-1].coef_.copy()
+        meta = trainer.train_incremental(X_new, y_new)
+        self.assertEqual((meta["mode"], meta["model"], meta["incremental_rows"]), ("incremental", "SGDClassifier", len(y_new)))
+        self.assertIsNotNone(meta["batch_accuracy"])
+        self.assertNotIn("accuracy", model_store.load_meta())
+        self.assertEqual(model_store.load_meta()["accuracy_at_full_fit"], full_fit_accuracy)
+        self.assertFalse((model_store.load_model()[-1].coef_ == before).all())
+
+    def test_streaming_without_rows(self):
+        header_only = self.write_csv("empty.csv", trainer.np.empty((0, len(trainer.FEATURES))), [])
+        with mock.patch.object(trainer, "list_csv_files", return_value=[header_only]):
+            with self.assertRaisesMessage(ValueError, "No training rows"):
+                trainer.train_streaming(resume=False)
+
+    def test_search_logs_failed_trials_and_saves_without_a_winner(self):
+        from .pipeline import search
+
+        space = {"n_estimators": [5], "max_depth": [2], "min_samples_leaf": [1], "max_features": ["sqrt", "bogus"]}
+        X, y = trainer._generate_balanced_synthetic(n_per_class=20)
+        with mock.patch.object(search, "SEARCH_SPACE", space), \
+                mock.patch.object(model_store, "SEARCH_RESULTS_PATH", self.tmp / "search.json"):
+            results = search.run_search(X, trainer.encode_labels(y), n_trials=2, folds=2, workers=1, max_size_bytes=1)
+            saved = json.loads((self.tmp / "search.json").read_text())
+        self.assertEqual((results["trials_completed"], results["trials_failed"]), (2, 1))
+        self.assertIsNone(saved["best_params"])
+        self.assertEqual(len(saved["trials"]), 2)
+        self.assertIn("error", next(t for t in saved["trials"] if t["params"]["max_features"] == "bogus"))
+
+    def test_unchanged_fingerprint_skips_retraining(self):
+        X, y = trainer._generate_balanced_synthetic(n_per_class=20)
+        path = self.write_csv("train.csv", X, y)
+        params = {"n_estimators": 5}
+        with mock.patch.object(trainer, "list_csv_files", return_value=[path]), \
+                mock.patch.object(trainer, "load_csv_dataset", return_value=(X, y)) as load:
+            meta = trainer.train_and_save(params=params)
+            self.assertEqual((meta["data_source"], meta["fallback_for"]), ("csv", None))
+            self.assertTrue(trainer.train_and_save(params=params)["skipped"])
+            self.assertEqual(load.call_count, 1)
+
+            self.write_csv("train.csv", X[:-1], y[:-1])
+            self.assertNotIn("skipped", trainer.train_and_save(params=params))
+            self.assertEqual(load.call_count, 2)
+
+    def test_fingerprint_records_synthetic_fallback(self):
+        path = self.write_csv("broken.csv", trainer.np.empty((0, len(trainer.FEATURES))), [])
+        params = {"n_estimators": 5}
+        with mock.patch.object(trainer, "list_csv_files", return_value=[path]), \
+                mock.patch.object(trainer, "load_csv_dataset", side_effect=RuntimeError("unreadable")):
+            expected = trainer.training_fingerprint(n_per_class=20, params=params)
+            meta = trainer.train_and_save(n_per_class=20, params=params)
+            self.assertEqual(meta["data_source"], "synthetic")
+            self.assertEqual(meta["fingerprint"], trainer.training_fingerprint(params=params, data=trainer._synthetic_data(20)))
+            self.assertEqual(meta["fallback_for"], expected)
+            self.assertTrue(trainer.train_and_save(n_per_class=20, params=params)["skipped"])
@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     # Core prediction endpoints
     path('predict/', views.predict_disaster, name='predict_disaster'),
+    path('predict/batch/', views.predict_batch, name='predict_batch'),
     
     # LLM and advice endpoints
     path('llm-advice/', views.llm_advice, name='llm_advice'),
@@ -15,6 +16,8 @@ urlpatterns = [
     # Historical data endpoints
     path('historical/disasters/', views.get_historical_disasters, name='get_historical_disasters'),
     path('historical/disasters/<str:state>/', views.get_disasters_by_state, name='get_disasters_by_state'),
+    path('historical/nearby/', views.get_nearby_disasters, name='get_nearby_disasters'),
+    path('historical/export/', views.export_historical_disasters, name='export_historical_disasters'),
     
     # Analytics and insights
     path('analytics/disaster-trends/', views.get_disaster_trends, name='get_disaster_trends'),
@@ -28,4 +31,5 @@ urlpatterns = [
     path('live-feed/start/', views.start_live_feed, name='start_live_feed'),
     path('live-feed/stop/', views.stop_live_feed, name='stop_live_feed'),
     path('live-feed/predictions/', views.get_live_predictions, name='get_live_predictions'),
+    path('live-feed/stream/', views.stream_live_predictions, name='stream_live_predictions'),
 ] 
\ No newline at end of file
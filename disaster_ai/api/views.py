@@ -1,138 +1,169 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, content_negotiation_class
+from rest_framework.exceptions import ParseError
+from rest_framework.negotiation import BaseContentNegotiation
 from rest_framework.response import Response
 from rest_framework import status
-from django.db import models
+from django.conf import settings
+from django.db import connection, models
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.utils import timezone
-from datetime import datetime, timedelta
+from django.utils.http import http_date, parse_http_date_safe
+from datetime import date, datetime, timedelta
+import hashlib
 import json
+import logging
 import time
 import random
-import requests
 import threading
+import uuid
 from datetime import datetime
 
+import numpy as np
+
 from .models import (
     HistoricalDisaster, DisasterPrediction, WeatherData, 
     ModelConfiguration, PredictionRequest, ExternalDataSource
 )
+from .pipeline.alerts import alert_stats, get_dispatcher
+from .pipeline.audit import audit_log
+from .pipeline.batch import score_batch
+from .pipeline.bootstrap import model_readiness
+from .pipeline.data_version import history_version
+from .pipeline.geo import within_bbox, within_radius
+from .pipeline.history import (
+    EXPORT_FORMATS, decode_cursor, export_rows, gzip_chunks, history_page, parse_fields, serialize_row,
+)
+from .pipeline.live_feed import live_events, live_feed_control
+from .pipeline.model_store import model_version
+from .pipeline.predictor import (
+    current_model, feature_overrides, features_for_location, model_label, parse_location, predict_proba_row,
+    severity_from_prob,
+)
+from .pipeline.response_cache import history_cache, prediction_cache
+from .pipeline.risk_index import assessments, risk_index
+from .pipeline.rollups import compute_trends
+from .pipeline.scheduler import scheduler
+from .pipeline.suppression import alert_events, get_suppressor, suppression_stats
+from .pipeline.trainer import DISASTER_CLASSES
+
+logger = logging.getLogger(__name__)
 
 # Core prediction endpoints
 @api_view(['GET', 'POST'])
 def predict_disaster(request):
-    """Enhanced disaster prediction with multiple model support"""
+    """Disaster prediction scored by the persisted model.
+    Features come from the feature store, a live fetch for known coordinates, and any
+    feature values in the request (flat or under weather_data). Predictions are written in
+    one statement; the request's audit record goes through the write-behind audit queue.
+    """
+    start_time = time.time()
+    request_id = uuid.uuid4().hex
+    
+    # Parse JSON data
+    if request.method == 'POST':
+        data = request.data
+    else:  # GET request
+        data = request.query_params.dict()
+    
     try:
-        start_time = time.time()
-        
-        # Parse JSON data
-        if request.method == 'POST':
-            data = request.data
-        else:  # GET request
-            data = request.query_params.dict()
-            
         location = data.get('location', 'Unknown Location')
-        disaster_type = data.get('disaster_type', 'Unknown')
+        disaster_type = str(data.get('disaster_type', 'all')).lower()
         model_preference = data.get('model_preference', 'ensemble')
+        if disaster_type != 'all' and (disaster_type == 'none' or disaster_type not in DISASTER_CLASSES):
+            known = ', '.join(c for c in DISASTER_CLASSES if c != 'none')
+            return Response(
+                {'error': f"Unknown disaster_type '{disaster_type}'; expected 'all' or one of: {known}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Create prediction request record
-        prediction_request = PredictionRequest.objects.create(
-            request_type='disaster_prediction',
-            input_data=data,
-            status='processing'
-        )
-        
-        # Enhanced prediction logic with more realistic data
-        predictions = []
-        confidence_score = 0.0
+        # Location may be a name or {city, state, coordinates: {lat, lon}}
+        location_name, lat, lon = parse_location(data)
+        overrides = feature_overrides(data)
+        version = model_version()
         
-        # Location-based disaster likelihood mapping
-        location_risks = {
-            'Mumbai': {'flood': 0.8, 'cyclone': 0.7, 'earthquake': 0.3, 'drought': 0.2},
-            'Delhi': {'earthquake': 0.4, 'flood': 0.5, 'drought': 0.6, 'wildfire': 0.3},
-            'Chennai': {'cyclone': 0.9, 'flood': 0.7, 'earthquake': 0.3, 'drought': 0.4},
-            'Kolkata': {'flood': 0.8, 'cyclone': 0.6, 'earthquake': 0.4, 'drought': 0.3},
-            'Bangalore': {'drought': 0.6, 'wildfire': 0.4, 'earthquake': 0.2, 'flood': 0.3},
-            'Ahmedabad': {'earthquake': 0.7, 'drought': 0.8, 'flood': 0.4, 'wildfire': 0.5},
-            'Hyderabad': {'drought': 0.7, 'flood': 0.4, 'earthquake': 0.3, 'wildfire': 0.4},
-            'Pune': {'drought': 0.5, 'flood': 0.4, 'earthquake': 0.3, 'wildfire': 0.3}
-        }
+        # Identical requests against the same model are answered from the cache without scoring
+        cache_key = prediction_cache.make_key(
+            location_name.strip().lower(),
+            None if lat is None else round(lat, 3),
+            None if lon is None else round(lon, 3),
+            disaster_type,
+            str(model_preference).lower(),
+            overrides,
+        )
+        cached = prediction_cache.get(cache_key, version)
+        if cached is not None:
+            payload, age = cached
+            processing_time = time.time() - start_time
+            audit_log.record(
+                request_type='disaster_prediction',
+                input_data=data,
+                output_data={
+                    'request_id': request_id,
+                    'predictions_count': len(payload['predictions']),
+                    'confidence_score': payload['confidence_score'],
+                    'cached': True
+                },
+                status='completed',
+                processing_time=processing_time,
+                completed_at=timezone.now()
+            )
+            return Response({
+                **payload,
+                'processing_time': processing_time,
+                'metadata': {**payload['metadata'], 'request_id': request_id, 'cached': True, 'cache_age': round(age, 3)},
+            }, status=status.HTTP_200_OK)
         
-        # Get location name for risk calculation
-        location_name = location if isinstance(location, str) else location.get('city', 'Unknown')
-        location_risk = location_risks.get(location_name, {})
+        feats, feature_source = features_for_location(
+            location_name, lat=lat, lon=lon,
+            overrides=overrides,
+            max_age=getattr(settings, 'PIPELINE_FEATURE_MAX_AGE_SECONDS', 3600),
+        )
+        model = current_model()
+        proba = predict_proba_row(model, feats)
+        model_name = type(model).__name__
+        model_used = model_label(model)
+        # How sure the model is of its top class, shared by every row of this request
+        confidence_score = round(float(np.max(proba)), 4)
         
-        if model_preference == 'ensemble':
-            # Generate realistic predictions based on location
-            disaster_types = [disaster_type] if disaster_type != 'all' else list(location_risk.keys()) if location_risk else ['flood', 'earthquake', 'drought']
-            
-            for disaster in disaster_types[:3]:  # Limit to 3 predictions
-                base_risk = location_risk.get(disaster, random.uniform(0.1, 0.5))
-                probability = min(0.9, base_risk + random.uniform(-0.1, 0.2))
-                confidence_val = random.uniform(0.6, 0.95)
-                
-                # Determine severity based on probability
-                if probability > 0.7:
-                    severity = 'high'
-                elif probability > 0.4:
-                    severity = 'medium'
-                else:
-                    severity = 'low'
-                
-                pred_date = timezone.now().date() + timedelta(days=random.randint(1, 14))
-                prediction = DisasterPrediction.objects.create(
-                    type=disaster,
-                    location=location_name,
-                    predicted_date=pred_date,
-                    severity=severity,
-                    confidence=confidence_val,  # Store as numeric
-                    probability=probability,
-                    model_used=random.choice(['lstm', 'cnn', 'random_forest']),
-                    input_features={'location': location, 'model': model_preference, 'risk_score': base_risk},
-                    prediction_metadata={'ensemble_weight': random.uniform(0.2, 0.8), 'location_risk': base_risk}
-                )
-                predictions.append(prediction)
-            
-            confidence_score = sum(p.confidence for p in predictions) / len(predictions) if predictions else 0.7
+        # A specific disaster type scores just that class; 'all' the most likely ones
+        ranked = [DISASTER_CLASSES[i] for i in np.argsort(proba)[::-1] if DISASTER_CLASSES[i] != 'none']
+        if disaster_type != 'all':
+            disaster_types = [disaster_type]
         else:
-            # Single model prediction with realistic data
-            disaster = disaster_type if disaster_type != 'all' else random.choice(list(location_risk.keys()) if location_risk else ['flood', 'earthquake', 'drought'])
-            base_risk = location_risk.get(disaster, random.uniform(0.1, 0.5))
-            probability = min(0.9, base_risk + random.uniform(-0.1, 0.2))
-            confidence_val = random.uniform(0.5, 0.9)
-            
-            # Determine severity based on probability
-            if probability > 0.7:
-                severity = 'high'
-            elif probability > 0.4:
-                severity = 'medium'
-            else:
-                severity = 'low'
-            
-            pred_date = timezone.now().date() + timedelta(days=random.randint(1, 14))
-            prediction = DisasterPrediction.objects.create(
+            disaster_types = ranked[:3] if model_preference == 'ensemble' else ranked[:1]
+        
+        today = timezone.now().date()
+        predictions = []
+        for disaster in disaster_types:
+            probability = round(float(proba[DISASTER_CLASSES.index(disaster)]), 4)
+            predictions.append(DisasterPrediction(
                 type=disaster,
                 location=location_name,
-                predicted_date=pred_date,
-                severity=severity,
-                confidence=confidence_val,  # Store as numeric
+                predicted_date=today,
+                severity=severity_from_prob(probability),
+                confidence=confidence_score,  # Store as numeric
                 probability=probability,
-                model_used=model_preference,
-                input_features={'location': location, 'model': model_preference, 'risk_score': base_risk},
-                prediction_metadata={'single_model': True, 'location_risk': base_risk}
-            )
-            predictions.append(prediction)
-            confidence_score = confidence_val
+                model_used=model_used,
+                model_version=version,
+                input_features={'location': location, 'model': model_preference, 'features': feats, 'feature_source': feature_source},
+                prediction_metadata={'model_class': model_name, 'class_probabilities': dict(zip(DISASTER_CLASSES, map(float, np.round(proba, 4))))}
+            ))
         
         processing_time = time.time() - start_time
         
-        # Update prediction request
-        prediction_request.status = 'completed'
-        prediction_request.output_data = {
-            'predictions_count': len(predictions),
-            'confidence_score': confidence_score
-        }
-        prediction_request.processing_time = processing_time
-        prediction_request.completed_at = timezone.now()
-        prediction_request.save()
+        DisasterPrediction.objects.bulk_create(predictions)
+        audit_log.record(
+            request_type='disaster_prediction',
+            input_data=data,
+            output_data={
+                'request_id': request_id,
+                'predictions_count': len(predictions),
+                'confidence_score': confidence_score
+            },
+            status='completed',
+            processing_time=processing_time,
+            completed_at=timezone.now()
+        )
         
         response_data = {
             'predictions': [
@@ -152,16 +183,78 @@ def predict_disaster(request):
             'model_used': model_preference,
             'processing_time': processing_time,
             'metadata': {
-                'request_id': prediction_request.id,
-                'timestamp': timezone.now().isoformat()
+                'request_id': request_id,
+                'model_version': version,
+                'feature_source': feature_source,
+                'timestamp': timezone.now().isoformat(),
+                'cached': False
             }
         }
+        prediction_cache.put(cache_key, version, response_data)
         
         return Response(response_data, status=status.HTTP_200_OK)
         
     except Exception as e:
+        audit_log.record(
+            request_type='disaster_prediction',
+            input_data=data,
+            output_data={'request_id': request_id},
+            status='failed',
+            error_message=str(e),
+            processing_time=time.time() - start_time,
+            completed_at=timezone.now()
+        )
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# Batch prediction: many locations or feature rows per request, streamed back as NDJSON
+@api_view(['POST'])
+def predict_batch(request):
+    """Score many items in one request and stream one JSON line per item, then a summary line.
+    The body is {"items": [...], "chunk_size": n, "persist": bool}, a bare JSON array, or
+    NDJSON (application/x-ndjson), which is read line by line without buffering the upload.
+    Each item is shaped like a predict/ request (location, coordinates, weather_data or
+    feature values); items with only feature values are scored as raw rows. Bodies larger
+    than PIPELINE_BATCH_MAX_BODY_BYTES are refused before anything is parsed.
+    """
+    max_bytes = getattr(settings, 'PIPELINE_BATCH_MAX_BODY_BYTES', 16 * 1024 * 1024)
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+    if length > max_bytes:
+        return Response(
+            {'error': f'Batch body exceeds {max_bytes} bytes; split it into several requests'},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+    try:
+        if request.content_type in ('application/x-ndjson', 'application/jsonl'):
+            def parse(line):
+                try:
+                    return json.loads(line)
+                except ValueError:
+                    return None  # reported as an error for that line
+            items = (parse(line) for line in (request.stream or ()) if line.strip())
+            options = request.query_params.dict()
+        else:
+            body = request.data if length else {}
+            items = body if isinstance(body, list) else body.get('items', [])
+            options = {**request.query_params.dict(), **(body if isinstance(body, dict) else {})}
+        chunk_size = max(1, min(int(options.get('chunk_size', 256)), 2048))
+        persist = str(options.get('persist', 'false')).lower() in ('1', 'true', 'yes')
+    except (ValueError, TypeError, AttributeError, ParseError) as e:
+        return Response({'error': f'Invalid batch request: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = score_batch(
+        items,
+        chunk_size=chunk_size,
+        persist=persist,
+        max_items=getattr(settings, 'PIPELINE_BATCH_MAX_ITEMS', 10000),
+        max_age=getattr(settings, 'PIPELINE_FEATURE_MAX_AGE_SECONDS', 3600),
+    )
+    response = StreamingHttpResponse((json.dumps(r) + '\n' for r in results), content_type='application/x-ndjson')
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 # LLM and advice endpoints
 @api_view(['POST'])
 def llm_advice(request):
@@ -260,109 +353,230 @@ def get_weather_forecast(request):
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # Historical data endpoints
+def _versioned_response(request, key, build):
+    """Serve a historical payload from the version-keyed cache, with ETag/Last-Modified validators.
+    A matching If-None-Match (or If-Modified-Since) gets a 304 before any database work.
+    `build` returns (data, extra headers) and only runs on a cache miss.
+    """
+    version, modified = history_version.current()
+    etag = f'"{version}-{hashlib.sha1(key.encode()).hexdigest()[:12]}"'
+    validators = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if modified is not None:
+        validators['Last-Modified'] = http_date(modified)
+    
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        not_modified = if_none_match.strip() == '*' or etag in [t.strip().removeprefix('W/') for t in if_none_match.split(',')]
+    else:
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        not_modified = since is not None and modified is not None and int(modified) <= since
+    if not_modified:
+        response = HttpResponseNotModified()
+    else:
+        cached = history_cache.get(key, version)
+        if cached is None:
+            data, headers = build()
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            history_cache.put(key, version, (body, headers))
+        else:
+            body, headers = cached[0]
+        response = HttpResponse(body, content_type='application/json')
+        for name, value in headers.items():
+            response[name] = value
+    for name, value in validators.items():
+        response[name] = value
+    return response
+
+def _history_response(request, queryset):
+    """A keyset-paginated page of historical disasters, newest first.
+    The body stays a plain list; the next page is linked through the Link and
+    X-Next-Cursor headers. Query parameters: limit, cursor and fields (comma-separated).
+    """
+    try:
+        max_limit = getattr(settings, 'HISTORICAL_PAGE_MAX_LIMIT', 1000)
+        limit = max(1, min(int(request.query_params.get('limit', getattr(settings, 'HISTORICAL_PAGE_SIZE', 100))), max_limit))
+        fields = parse_fields(request.query_params.get('fields'))
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    def build():
+        rows, next_cursor = history_page(queryset, cursor, limit, fields)
+        headers = {}
+        if next_cursor:
+            params = request.query_params.copy()
+            params['cursor'] = next_cursor
+            headers['X-Next-Cursor'] = next_cursor
+            headers['Link'] = f'<{request.build_absolute_uri(request.path)}?{params.urlencode()}>; rel="next"'
+        return rows, headers
+    
+    return _versioned_response(request, request.get_full_path(), build)
+
 @api_view(['GET'])
 def get_historical_disasters(request):
-    """Get all historical disasters"""
+    """Get historical disasters, one page at a time"""
     try:
-        disasters = HistoricalDisaster.objects.all()
-        data = []
-        for disaster in disasters:
-            data.append({
-                'id': disaster.id,
-                'type': disaster.type,
-                'subtype': disaster.subtype,
-                'state': disaster.state,
-                'district': disaster.district,
-                'city': disaster.city,
-                'date': disaster.date.isoformat(),
-                'severity': disaster.severity,
-                'casualties': disaster.casualties,
-                'damage_estimate': float(disaster.damage_estimate),
-                'coordinates': disaster.coordinates,
-                'source': disaster.source,
-                'created_at': disaster.created_at.isoformat()
-            })
-        return Response(data)
+        return _history_response(request, HistoricalDisaster.objects.all())
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
 def get_disasters_by_state(request, state):
-    """Get disasters by state"""
+    """Get disasters by state (case-insensitive), one page at a time"""
     try:
-        disasters = HistoricalDisaster.objects.filter(state__iexact=state)
-        data = []
-        for disaster in disasters:
-            data.append({
-                'id': disaster.id,
-                'type': disaster.type,
-                'subtype': disaster.subtype,
-                'state': disaster.state,
-                'district': disaster.district,
-                'city': disaster.city,
-                'date': disaster.date.isoformat(),
-                'severity': disaster.severity,
-                'casualties': disaster.casualties,
-                'damage_estimate': float(disaster.damage_estimate),
-                'coordinates': disaster.coordinates,
-                'source': disaster.source,
-                'created_at': disaster.created_at.isoformat()
-            })
-        return Response(data)
+        queryset = HistoricalDisaster.objects.filter(state_key=HistoricalDisaster.normalize_state(state))
+        return _history_response(request, queryset)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def get_nearby_disasters(request):
+    """Historical disasters near a point or inside a box.
+    Either lat, lon and radius_km (km, default 50; nearest first, with distance_km) or
+    bbox=min_lat,min_lon,max_lat,max_lon (newest first, sides up to HISTORICAL_MAX_BBOX_DEGREES).
+    Also accepts type, limit and fields.
+    """
+    params = request.query_params
+    try:
+        limit = max(1, min(int(params.get('limit', getattr(settings, 'HISTORICAL_PAGE_SIZE', 100))), getattr(settings, 'HISTORICAL_PAGE_MAX_LIMIT', 1000)))
+        fields = parse_fields(params.get('fields'))
+        if params.get('bbox'):
+            bbox = tuple(float(v) for v in params['bbox'].split(','))
+            if len(bbox) != 4 or not (bbox[0] <= bbox[2] and bbox[1] <= bbox[3]):
+                raise ValueError('bbox must be min_lat,min_lon,max_lat,max_lon')
+            max_span = getattr(settings, 'HISTORICAL_MAX_BBOX_DEGREES', 10)
+            if bbox[2] - bbox[0] > max_span or bbox[3] - bbox[1] > max_span:
+                raise ValueError(f'bbox sides may span at most {max_span:g} degrees')
+            lat = lon = radius = None
+        else:
+            lat, lon = float(params['lat']), float(params['lon'])
+            radius = float(params.get('radius_km', 50))
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180 and 0 < radius <= getattr(settings, 'HISTORICAL_MAX_RADIUS_KM', 1000)):
+                raise ValueError('lat, lon or radius_km out of range')
+    except KeyError:
+        return Response({'error': 'lat and lon, or bbox, are required'}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    queryset = HistoricalDisaster.objects.all()
+    if params.get('type'):
+        queryset = queryset.filter(type=params['type'].lower())
+    
+    def build():
+        if radius is None:
+            rows = within_bbox(queryset, bbox, fields, limit)
+        else:
+            rows = within_radius(queryset, lat, lon, radius, fields, limit)
+        return [serialize_row(r) for r in rows], {}
+    
+    try:
+        return _versioned_response(request, request.get_full_path(), build)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class _StreamNegotiation(BaseContentNegotiation):
+    """For views that stream their own response: ?format= and the Accept header (csv,
+    text/event-stream) choose the stream, not a DRF renderer. Error payloads use JSON."""
+    def select_parser(self, request, parsers):
+        return parsers[0] if parsers else None
+    
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+# Full-table export, streamed
+@api_view(['GET'])
+@content_negotiation_class(_StreamNegotiation)
+def export_historical_disasters(request):
+    """Stream every historical disaster (or one state's) without building the response in memory.
+    Query parameters: format (json, ndjson or csv), gzip=1 for a .gz download, state,
+    type and fields (comma-separated).
+    """
+    params = request.query_params
+    fmt = params.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        return Response({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        fields = parse_fields(params.get('fields'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    queryset = HistoricalDisaster.objects.all()
+    if params.get('state'):
+        queryset = queryset.filter(state_key=HistoricalDisaster.normalize_state(params['state']))
+    if params.get('type'):
+        queryset = queryset.filter(type=params['type'].lower())
+    
+    chunks = export_rows(queryset, fmt, fields, chunk_size=getattr(settings, 'HISTORICAL_EXPORT_CHUNK_SIZE', 2000))
+    filename = f'historical_disasters.{fmt}'
+    if str(params.get('gzip', '')).lower() in ('1', 'true', 'yes'):
+        response = StreamingHttpResponse(gzip_chunks(chunks), content_type='application/gzip')
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(chunks, content_type=f'{EXPORT_FORMATS[fmt]}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 # Analytics and insights
 @api_view(['GET'])
 def get_disaster_trends(request):
-    """Get disaster trends analysis"""
+    """Disaster trends from the monthly rollups.
+    Query parameters: start and end (YYYY-MM or YYYY-MM-DD, default the last five years),
+    state and type.
+    """
     try:
-        # Simulate trend analysis
-        trends = {
-            'total_disasters': random.randint(100, 500),
-            'trend_period': 'last_5_years',
-            'most_common_type': 'flood',
-            'most_affected_state': 'Maharashtra',
-            'trend_direction': 'increasing',
-            'seasonal_patterns': {
-                'monsoon': ['flood', 'landslide'],
-                'summer': ['drought', 'wildfire'],
-                'winter': ['cold_wave']
-            }
-        }
-        
-        return Response(trends)
+        params = request.query_params
+        start, end = (
+            date.fromisoformat(params[p] if len(params[p]) > 7 else f'{params[p]}-01') if params.get(p) else None
+            for p in ('start', 'end')
+        )
+    except ValueError:
+        return Response({'error': 'start and end must be YYYY-MM or YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        return _versioned_response(
+            request, request.get_full_path(),
+            lambda: (compute_trends(start, end, state=params.get('state'), kind=params.get('type')), {}),
+        )
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
 def risk_assessment(request):
-    """Perform risk assessment for location"""
+    """Risk assessment from the precomputed district risk index.
+    Send {"location": ...} for one location or {"locations": [...]} for many; a location is a
+    name or {state, district, city}. Historical frequency and severity are combined with the
+    latest model probabilities; locations the index does not know get risk_level "unknown".
+    """
     try:
         data = request.data
-        location = data.get('location', {})
-        
-        # Simulate risk assessment
-        risk_score = random.uniform(0.1, 0.9)
-        risk_level = 'low' if risk_score < 0.3 else 'medium' if risk_score < 0.7 else 'high'
+        started = time.time()
+        if 'locations' in data:
+            locations = data.get('locations')
+            if not isinstance(locations, list):
+                return Response({'error': 'locations must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+            results = assessments(risk_index, locations)
+            return Response({
+                'assessments': results,
+                'count': len(results),
+                'index': risk_index.stats(),
+                'processing_time': round(time.time() - started, 6),
+            })
         
-        assessment = {
-            'location': location,
-            'risk_score': risk_score,
-            'risk_level': risk_level,
+        location = data.get('location', {})
+        assessment = assessments(risk_index, [location])[0]
+        assessment.update({
             'factors': [
                 'historical_disaster_frequency',
-                'geographic_vulnerability',
-                'population_density',
-                'infrastructure_quality'
+                'historical_disaster_severity',
+                'latest_model_probability'
             ],
             'recommendations': [
                 'Improve early warning systems',
                 'Strengthen infrastructure',
                 'Enhance emergency response capacity'
             ]
-        }
-        
+        })
         return Response(assessment)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -370,10 +584,9 @@ def risk_assessment(request):
 # Stop live feed endpoint
 @api_view(['POST'])
 def stop_live_feed(request):
-    """Stop live feed simulation"""
-    global live_feed_running
+    """Stop live feed simulation; the runner may be in any worker and exits on its next check"""
     try:
-        live_feed_running = False
+        live_feed_control.stop()
         return Response({
             'status': 'Live feed stopped',
             'message': 'Live feed has been stopped.',
@@ -406,29 +619,32 @@ def service_status(request):
             'active_models': ModelConfiguration.objects.filter(is_active=True).count(),
             'total_predictions': DisasterPrediction.objects.count(),
             'total_requests': PredictionRequest.objects.count(),
+            'model': model_readiness(),
+            'scheduler': scheduler.stats(),
+            'alerts': alert_stats(),
+            'alert_suppression': suppression_stats(),
+            'prediction_cache': prediction_cache.stats(),
+            'history_cache': history_cache.stats(),
+            'audit': audit_log.stats(),
             'last_updated': timezone.now().isoformat()
         }
         return Response(status_data)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-# Global variables to track live feed status and store live predictions
-live_feed_running = False
-live_predictions_queue = []
-
 # Live feed simulation endpoint
 @api_view(['GET'])
 def start_live_feed(request):
-    """Start live feed simulation that prints to console and emits to frontend"""
-    global live_feed_running
-    
-    if live_feed_running:
+    """Start live feed simulation that prints to console and emits to frontend.
+    Run state is shared through the database, so only one worker runs the feed.
+    """
+    token = live_feed_control.claim()
+    if token is None:
         return Response({"status": "already_running", "message": "Live feed is already running"}, status=200)
     
-    live_feed_running = True
-    
     def simulate_live_feed():
-        while live_feed_running:
+        running = True
+        while running:
             try:
                 # Generate random disaster data
                 disaster_types = ['Earthquake', 'Flood', 'Hurricane', 'Wildfire', 'Tornado']
@@ -459,7 +675,7 @@ def start_live_feed(request):
                     }
                 }
                 
-                # Print to console (for Django logs) and store in queue
+                # Emit to the alert sinks (stdout by default) and store in queue
                 live_prediction = {
                     'location': prediction['location'],
                     'disaster': prediction['type'],
@@ -467,46 +683,38 @@ def start_live_feed(request):
                     'timestamp': prediction['timestamp'],
                     'accuracy': prediction['confidence']
                 }
-                print(json.dumps(live_prediction))
+                get_dispatcher().publish(live_prediction)
                 
-                # Add to live predictions queue (keep last 50 predictions)
-                live_predictions_queue.append(live_prediction)
-                if len(live_predictions_queue) > 50:
-                    live_predictions_queue.pop(0)
+                # Add to the live events ring (keeps the last LIVE_FEED_HISTORY_SIZE predictions)
+                live_events.append(live_prediction)
                 
                 # Auto-flag high-risk disasters for alerts
+                alert_data = None
                 if live_prediction['risk_level'].lower() in ['high', 'critical'] and live_prediction['accuracy'] > 0.7:
-                    try:
-                        # Import here to avoid circular imports
-                        import requests
-                        
-                        # Send alert to backend
-                        alert_data = {
-                            'type': live_prediction['disaster'].lower(),
-                            'severity': live_prediction['risk_level'].lower(),
-                            'location': live_prediction['location'],
-                            'message': f"High-risk {live_prediction['disaster']} predicted for {live_prediction['location']} with {live_prediction['accuracy']*100:.1f}% accuracy",
-                            'source': 'ai_auto_detection',
-                            'timestamp': live_prediction['timestamp']
-                        }
-                        
-                        # Send to backend disaster alert endpoint
-                        backend_url = 'http://localhost:5000'  # Adjust if different
-                        try:
-                            requests.post(f'{backend_url}/api/disasters', json=alert_data, timeout=5)
-                            print(f"Auto-flagged disaster alert: {alert_data['message']}")
-                        except requests.exceptions.RequestException as e:
-                            print(f"Failed to send auto-alert to backend: {e}")
-                            
-                    except Exception as e:
-                        print(f"Error in auto-alert system: {e}")
+                    alert_data = {
+                        'type': live_prediction['disaster'].lower(),
+                        'severity': live_prediction['risk_level'].lower(),
+                        'location': live_prediction['location'],
+                        'message': f"High-risk {live_prediction['disaster']} predicted for {live_prediction['location']} with {live_prediction['accuracy']*100:.1f}% accuracy",
+                        'source': 'ai_auto_detection',
+                        'timestamp': live_prediction['timestamp']
+                    }
+                # Only onsets, escalations and reminders reach the backend; repeats within the window are dropped
+                events = alert_events(get_suppressor('live_feed'), live_prediction['location'], alert_data)
+                # The backend has no notion of a cleared alert
+                events = [e for e in events if e.get('event') != 'cleared']
+                if events:
+                    # Non-blocking: posted to the backend over a pooled session, spooled and retried if it is down
+                    get_dispatcher('backend').publish_many(events)
                 
-                # Wait before next update
-                time.sleep(30)
+                # Wait before next update; ends early once any worker stops the feed
+                running = live_feed_control.sleep(token, 30)
                 
-            except Exception as e:
-                print(f"Error in live feed simulation: {str(e)}")
-                time.sleep(5)  # Wait before retrying
+            except Exception:
+                logger.exception("Error in live feed simulation")
+                running = live_feed_control.sleep(token, 5)  # Wait before retrying
+        live_feed_control.release(token)
+        connection.close()
     
     # Start the live feed in a separate thread
     live_feed_thread = threading.Thread(target=simulate_live_feed, daemon=True)
@@ -520,14 +728,60 @@ def start_live_feed(request):
 # New endpoint to get live predictions for frontend
 @api_view(['GET'])
 def get_live_predictions(request):
-    """Get current live predictions from the queue"""
-    global live_predictions_queue
+    """Get current live predictions.
+    Without `since`, returns the last 10. With `since=<seq>`, returns only newer events;
+    adding `wait=<seconds>` long-polls until one arrives or the wait expires.
+    """
     try:
+        since = request.query_params.get('since')
+        if since is None:
+            predictions = live_events.latest(10)  # Last 10 predictions
+        else:
+            since = int(since)
+            wait = min(float(request.query_params.get('wait', 0)), getattr(settings, 'LIVE_FEED_MAX_WAIT_SECONDS', 25))
+            if wait > 0:
+                live_events.wait(since, wait)
+            predictions = live_events.since(since)
         return Response({
-            'live_predictions': live_predictions_queue[-10:] if live_predictions_queue else [],  # Last 10 predictions
-            'total_predictions': len(live_predictions_queue),
+            'live_predictions': predictions,
+            'total_predictions': len(live_events),
+            'last_seq': live_events.last_seq,
+            'running': live_feed_control.is_running(),
             'timestamp': timezone.now().isoformat()
         })
+    except ValueError:
+        return Response({'error': 'since and wait must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# Server-Sent Events stream of live predictions
+@api_view(['GET'])
+@content_negotiation_class(_StreamNegotiation)
+def stream_live_predictions(request):
+    """Push live predictions as Server-Sent Events.
+    Resumes after the `since` query parameter or the Last-Event-ID header. The stream ends
+    after LIVE_FEED_SSE_MAX_SECONDS (25 by default), so under sync workers it behaves like a
+    long poll: EventSource clients reconnect automatically and continue from the last id
+    they received. Raise the limit only when serving from threaded or ASGI workers.
+    """
+    try:
+        cursor = int(request.query_params.get('since') or request.headers.get('Last-Event-ID') or live_events.last_seq)
+    except ValueError:
+        return Response({'error': 'since must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+    def events(cursor):
+        deadline = time.monotonic() + getattr(settings, 'LIVE_FEED_SSE_MAX_SECONDS', 25)
+        yield 'retry: 3000\n\n'
+        while time.monotonic() < deadline:
+            if not live_events.wait(cursor, min(15.0, max(0.0, deadline - time.monotonic()))):
+                yield ': keepalive\n\n'
+                continue
+            for event in live_events.since(cursor):
+                cursor = event['seq']
+                yield f"id: {cursor}\nevent: prediction\ndata: {json.dumps(event)}\n\n"
+
+    response = StreamingHttpResponse(events(cursor), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
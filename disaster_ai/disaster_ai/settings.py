@@ -142,15 +142,127 @@ REST_FRAMEWORK = {
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+# Pagination cursors of the historical endpoints travel in these headers
+CORS_EXPOSE_HEADERS = ['X-Next-Cursor', 'Link']
 
 # ----------------------
 # AI Pipeline settings
 # ----------------------
+# Set to 0 to keep this process from running the background prediction scheduler
+PIPELINE_SCHEDULER_ENABLED = os.getenv('PIPELINE_SCHEDULER_ENABLED', '1') != '0'
+
+# Only the process holding this file lock runs the scheduler; other workers retry and take over if it dies
+PIPELINE_LEADER_LOCK_PATH = os.getenv('PIPELINE_LEADER_LOCK_PATH', str(BASE_DIR / 'models' / 'scheduler.lock'))
+PIPELINE_LEADER_RETRY_SECONDS = float(os.getenv('PIPELINE_LEADER_RETRY_SECONDS', '5'))
+# After a crash of the leader's loop the retry delay doubles up to this cap
+PIPELINE_LEADER_MAX_RETRY_SECONDS = float(os.getenv('PIPELINE_LEADER_MAX_RETRY_SECONDS', '300'))
+
 # Interval to fetch live data and run predictions (minutes)
 PIPELINE_FETCH_INTERVAL_MINUTES = int(os.getenv('PIPELINE_FETCH_INTERVAL_MINUTES', '60'))
 
+# Per-source scheduling: floor for any fetch interval, random jitter as a fraction of the interval,
+# max fetches in flight, and how often ExternalDataSource configuration is re-read (seconds)
+PIPELINE_MIN_FETCH_INTERVAL_SECONDS = float(os.getenv('PIPELINE_MIN_FETCH_INTERVAL_SECONDS', '60'))
+PIPELINE_FETCH_JITTER = float(os.getenv('PIPELINE_FETCH_JITTER', '0.1'))
+PIPELINE_MAX_CONCURRENT_FETCHES = int(os.getenv('PIPELINE_MAX_CONCURRENT_FETCHES', '4'))
+PIPELINE_SOURCE_RELOAD_SECONDS = float(os.getenv('PIPELINE_SOURCE_RELOAD_SECONDS', '60'))
+
+# Adaptive polling: locations near the risk threshold or trending up are polled every MIN seconds,
+# calm and stable ones back off towards MAX seconds
+PIPELINE_ADAPTIVE_POLLING = os.getenv('PIPELINE_ADAPTIVE_POLLING', '1') != '0'
+PIPELINE_MIN_POLL_SECONDS = float(os.getenv('PIPELINE_MIN_POLL_SECONDS', '300'))
+PIPELINE_MAX_POLL_SECONDS = float(os.getenv('PIPELINE_MAX_POLL_SECONDS', '21600'))
+PIPELINE_POLL_RISK_MARGIN = float(os.getenv('PIPELINE_POLL_RISK_MARGIN', '0.15'))
+
+# Multi-node partitioning: monitored locations are split by consistent hashing across nodes
+# holding a live lease in the PipelineNode table (node id defaults to the hostname)
+PIPELINE_PARTITIONING = os.getenv('PIPELINE_PARTITIONING', '1') != '0'
+PIPELINE_NODE_ID = os.getenv('PIPELINE_NODE_ID', '')
+PIPELINE_NODE_HEARTBEAT_SECONDS = float(os.getenv('PIPELINE_NODE_HEARTBEAT_SECONDS', '10'))
+PIPELINE_NODE_LEASE_SECONDS = float(os.getenv('PIPELINE_NODE_LEASE_SECONDS', '30'))
+
+# Alert delivery: comma-separated sinks (stdout, file, http, db), batched by a background thread.
+# Batches a sink fails to take are spooled to disk and retried with exponential backoff
+PIPELINE_ALERT_SINKS = os.getenv('PIPELINE_ALERT_SINKS', 'stdout')
+PIPELINE_ALERT_FILE_PATH = os.getenv('PIPELINE_ALERT_FILE_PATH', str(BASE_DIR / 'models' / 'alerts.jsonl'))
+PIPELINE_ALERT_HTTP_URL = os.getenv('PIPELINE_ALERT_HTTP_URL', '')
+PIPELINE_ALERT_HTTP_BATCH = os.getenv('PIPELINE_ALERT_HTTP_BATCH', '0') == '1'
+PIPELINE_ALERT_BATCH_SIZE = int(os.getenv('PIPELINE_ALERT_BATCH_SIZE', '50'))
+PIPELINE_ALERT_FLUSH_SECONDS = float(os.getenv('PIPELINE_ALERT_FLUSH_SECONDS', '1'))
+PIPELINE_ALERT_SPOOL_DIR = os.getenv('PIPELINE_ALERT_SPOOL_DIR', str(BASE_DIR / 'models' / 'alert_spool'))
+PIPELINE_ALERT_MAX_SPOOL_MB = float(os.getenv('PIPELINE_ALERT_MAX_SPOOL_MB', '50'))
+
+# Alert deduplication: per (location, disaster) only onset, escalation and clearing are emitted,
+# plus a reminder once the window has passed; set a state dir to keep active alerts across restarts
+PIPELINE_ALERT_DEDUP = os.getenv('PIPELINE_ALERT_DEDUP', '1') != '0'
+PIPELINE_ALERT_DEDUP_WINDOW_SECONDS = float(os.getenv('PIPELINE_ALERT_DEDUP_WINDOW_SECONDS', '3600'))
+PIPELINE_ALERT_DEDUP_STATE_DIR = os.getenv('PIPELINE_ALERT_DEDUP_STATE_DIR', '')
+
+# Backend endpoint that receives auto-flagged live feed alerts
+BACKEND_ALERT_URL = os.getenv('BACKEND_ALERT_URL', 'http://localhost:5000/api/disasters')
+
+# Record every collected feature vector in the local time-series store (models/feature_store)
+PIPELINE_FEATURE_STORE = os.getenv('PIPELINE_FEATURE_STORE', '1') != '0'
+# On-demand predictions reuse stored features younger than this instead of fetching live (seconds)
+PIPELINE_FEATURE_MAX_AGE_SECONDS = float(os.getenv('PIPELINE_FEATURE_MAX_AGE_SECONDS', '3600'))
+
+# Most items scored by one predict/batch/ request; the rest are dropped and reported as truncated
+PIPELINE_BATCH_MAX_ITEMS = int(os.getenv('PIPELINE_BATCH_MAX_ITEMS', '10000'))
+# Largest predict/batch/ request body, in bytes; larger uploads are refused with 413 unread
+PIPELINE_BATCH_MAX_BODY_BYTES = int(os.getenv('PIPELINE_BATCH_MAX_BODY_BYTES', str(16 * 1024 * 1024)))
+
+# Repeated predict/ requests (same location, disaster type, model preference and model version)
+# are answered from an in-process cache for this many seconds; 0 disables it
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv('PREDICTION_CACHE_TTL_SECONDS', '900'))
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv('PREDICTION_CACHE_MAX_ENTRIES', '1024'))
+
+# PredictionRequest audit rows are queued and bulk-inserted off the request path,
+# once this many are waiting or every flush interval; a full queue drops new records
+PIPELINE_AUDIT_BATCH_SIZE = int(os.getenv('PIPELINE_AUDIT_BATCH_SIZE', '100'))
+PIPELINE_AUDIT_FLUSH_SECONDS = float(os.getenv('PIPELINE_AUDIT_FLUSH_SECONDS', '2'))
+PIPELINE_AUDIT_QUEUE_SIZE = int(os.getenv('PIPELINE_AUDIT_QUEUE_SIZE', '10000'))
+
+# Page size of the historical disaster endpoints (?limit= may ask for up to the max)
+HISTORICAL_PAGE_SIZE = int(os.getenv('HISTORICAL_PAGE_SIZE', '100'))
+HISTORICAL_PAGE_MAX_LIMIT = int(os.getenv('HISTORICAL_PAGE_MAX_LIMIT', '1000'))
+
+# Rows fetched per database round trip by historical/export/
+HISTORICAL_EXPORT_CHUNK_SIZE = int(os.getenv('HISTORICAL_EXPORT_CHUNK_SIZE', '2000'))
+
+# Largest radius historical/nearby/ accepts
+HISTORICAL_MAX_RADIUS_KM = float(os.getenv('HISTORICAL_MAX_RADIUS_KM', '1000'))
+# Largest bbox side, in degrees, historical/nearby/ accepts
+HISTORICAL_MAX_BBOX_DEGREES = float(os.getenv('HISTORICAL_MAX_BBOX_DEGREES', '10'))
+
+# Serialized historical and trends responses are cached per data version; writes to
+# historical disasters bump the version stamp file shared by all workers
+HISTORY_VERSION_PATH = os.getenv('HISTORY_VERSION_PATH', str(BASE_DIR / 'models' / 'history_version.json'))
+HISTORY_CACHE_TTL_SECONDS = float(os.getenv('HISTORY_CACHE_TTL_SECONDS', '86400'))
+HISTORY_CACHE_MAX_ENTRIES = int(os.getenv('HISTORY_CACHE_MAX_ENTRIES', '256'))
+
+# District risk index behind analytics/risk-assessment/: weights of the historical and model
+# components, and how often the scheduler leader folds in new rows (it also refreshes as soon
+# as the historical data version moves; refresh_risk_index does it by hand)
+RISK_INDEX_PATH = os.getenv('RISK_INDEX_PATH', str(BASE_DIR / 'models' / 'risk_index.npz'))
+RISK_INDEX_HISTORY_WEIGHT = float(os.getenv('RISK_INDEX_HISTORY_WEIGHT', '0.4'))
+RISK_INDEX_MODEL_WEIGHT = float(os.getenv('RISK_INDEX_MODEL_WEIGHT', '0.6'))
+RISK_INDEX_REFRESH_SECONDS = float(os.getenv('RISK_INDEX_REFRESH_SECONDS', '60'))
+
 # Probability threshold (0-1) above which a non-"none" class is considered risk
 PIPELINE_RISK_THRESHOLD = float(os.getenv('PIPELINE_RISK_THRESHOLD', '0.7'))
 
+# Live feed: predictions kept for clients, longest long-poll wait, and how long one SSE
+# connection is held before the client is made to reconnect (seconds). Every waiting client
+# occupies a worker for that long: under sync workers keep both short, and serve long SSE
+# connections only from threaded (gunicorn --threads) or ASGI workers
+LIVE_FEED_HISTORY_SIZE = int(os.getenv('LIVE_FEED_HISTORY_SIZE', '50'))
+LIVE_FEED_MAX_WAIT_SECONDS = float(os.getenv('LIVE_FEED_MAX_WAIT_SECONDS', '25'))
+LIVE_FEED_SSE_MAX_SECONDS = float(os.getenv('LIVE_FEED_SSE_MAX_SECONDS', '25'))
+
+# The live feed's run state and history live in the database so every worker sees one feed;
+# waiting readers poll for new events this often, and a runner that stops renewing its lease is replaced
+LIVE_FEED_POLL_SECONDS = float(os.getenv('LIVE_FEED_POLL_SECONDS', '1'))
+LIVE_FEED_LEASE_SECONDS = float(os.getenv('LIVE_FEED_LEASE_SECONDS', '60'))
+
 # Optional external API keys
 OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY', '')
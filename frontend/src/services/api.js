@@ -76,6 +76,7 @@ export const userAPI = {
 
 // AI Service API (Django endpoints on port 8000)
 const aiBaseURL = 'http://localhost:8000/api';
+const withNextCursor = (response) => ({ ...response, nextCursor: response.headers['x-next-cursor'] || null });
 export const aiAPI = {
     predictDisaster: (predictionData) => axios.post(`${aiBaseURL}/predict/`, predictionData),
     getLLMAdvice: (adviceData) => axios.post(`${aiBaseURL}/llm-advice/`, adviceData),
@@ -85,8 +86,11 @@ export const aiAPI = {
         axios.get(`${aiBaseURL}/weather/current/`, { params: { location: JSON.stringify(location) } }),
     getDisasterTrends: () => axios.get(`${aiBaseURL}/analytics/disaster-trends/`),
     riskAssessment: (location) => axios.post(`${aiBaseURL}/analytics/risk-assessment/`, { location }),
-    getHistoricalDisasters: () => axios.get(`${aiBaseURL}/historical/disasters/`),
-    getDisastersByState: (state) => axios.get(`${aiBaseURL}/historical/disasters/${state}/`),
+    // Pages of up to `limit` rows; pass the returned nextCursor as `cursor` for the next page (null at the end)
+    getHistoricalDisasters: (params = {}) =>
+        axios.get(`${aiBaseURL}/historical/disasters/`, { params }).then(withNextCursor),
+    getDisastersByState: (state, params = {}) =>
+        axios.get(`${aiBaseURL}/historical/disasters/${state}/`, { params }).then(withNextCursor),
     healthCheck: () => axios.get(`${aiBaseURL}/health/`),
     serviceStatus: () => axios.get(`${aiBaseURL}/status/`),
     getLivePredictions: () => axios.get(`${aiBaseURL}/live-feed/predictions/`),